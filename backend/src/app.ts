@@ -6,6 +6,8 @@ import dotenv from 'dotenv';
 import path from 'path';
 import routes from './routes';
 import logger from './utils/logger';
+import { httpRequestDuration, httpRequestsInFlight, runWithRequestStats, renderMetrics } from './utils/metrics';
+import { serveFrontend } from './utils/frontendAssets';
 
 // 加载环境变量
 dotenv.config();
@@ -16,17 +18,41 @@ const app = express();
 // 简化的请求监控中间件 - 避免类型问题
 app.use((req, res, next) => {
   const start = Date.now();
+  const endTimer = httpRequestDuration.startTimer({ method: req.method });
+  httpRequestsInFlight.inc();
+  
+  // 连接中断时不会触发finish，两个事件都可能发生，只计数一次
+  let settled = false;
+  const settle = () => {
+    if (!settled) {
+      settled = true;
+      httpRequestsInFlight.dec();
+    }
+  };
+  res.on('close', settle);
+  
+  // 在请求上下文中继续处理，解析和缓存服务会把消耗计入本次请求
+  const stats = runWithRequestStats(next);
   
   // 监听response完成事件
   res.on('finish', () => {
+    settle();
     const duration = Date.now() - start;
     const size = parseInt(String(res.getHeaders()['content-length'] || '0'), 10);
     const status = res.statusCode;
     
-    console.log(`[请求] ${req.method} ${req.url} - ${status} - ${size} bytes - ${duration}ms`);
+    // 路由标签使用匹配到的路由模板，避免文件ID等参数造成标签膨胀
+    const route = req.route ? `${req.baseUrl}${req.route.path}` : 'unmatched';
+    endTimer({ route, status });
+    
+    let detail = '';
+    if (stats.cacheHits + stats.cacheMisses > 0) {
+      detail = ` - 解析 ${stats.parseMs.toFixed(1)}ms, 读取 ${stats.bytesRead} bytes, ` +
+        `${stats.rowsProduced} 行, 缓存命中 ${stats.cacheHits}/${stats.cacheHits + stats.cacheMisses}`;
+    }
+    
+    console.log(`[请求] ${req.method} ${req.url} - ${status} - ${size} bytes - ${duration}ms${detail}`);
   });
-  
-  next();
 });
 
 // 配置跨域
@@ -36,7 +62,14 @@ app.use(cors({
 }));
 
 // 安全中间件
-app.use(helmet());
+// 关闭upgrade-insecure-requests，否则通过局域网IP以http访问前端页面时资源请求会被升级为https
+app.use(helmet({
+  contentSecurityPolicy: {
+    directives: {
+      upgradeInsecureRequests: null
+    }
+  }
+}));
 
 // 日志中间件
 app.use(morgan('dev', {
@@ -62,11 +95,21 @@ app.get('/api/health', (req, res) => {
   res.json({ status: 'UP', timestamp: new Date() });
 });
 
+// Prometheus格式的性能指标
+app.get('/metrics', (req, res) => {
+  res.type('text/plain; version=0.0.4').send(renderMetrics());
+});
+
 // 保留原来的健康检查路径，以确保兼容性
 app.get('/health', (req, res) => {
   res.json({ status: 'UP', timestamp: new Date() });
 });
 
+// 生产模式下由后端托管前端构建产物
+if (process.env.FRONTEND_DIST) {
+  app.use(serveFrontend(process.env.FRONTEND_DIST));
+}
+
 // 错误处理
 app.use((err: any, req: any, res: any, next: any) => {
   logger.error('未处理的错误:', err);
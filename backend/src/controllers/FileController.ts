@@ -1,17 +1,32 @@
 import { Request, Response } from 'express';
+import fs from 'fs';
 import path from 'path';
+import { Readable } from 'stream';
+import { pipeline } from 'stream/promises';
 import multer from 'multer';
 import { v4 as uuidv4 } from 'uuid';
 import logger from '../utils/logger';
 import fileUtils from '../utils/fileUtils';
 import responseUtils from '../utils/responseUtils';
-import fileParserService from '../services/FileParserService';
+import tableCacheService, { CachedTable } from '../services/TableCacheService';
+import contentHashService from '../services/ContentHashService';
+import { MemoryBudgetError } from '../services/MemoryGovernorService';
+import { CancelledError } from '../utils/singleFlight';
+import { exportsTotal } from '../utils/metrics';
+import httpCache from '../utils/httpCache';
 import configService from '../services/ConfigService';
+import tableViewService, { ViewSpecError } from '../services/TableViewService';
+import exportService, { ExportFormat, EXPORT_FORMATS, EXPORT_CONTENT_TYPES } from '../services/ExportService';
 
 // 获取文件上传目录
 const uploadsDir = process.env.UPLOADS_DIR || path.join(__dirname, '../../uploads');
 const dataDir = process.env.DATA_DIR || path.join(__dirname, '../../data');
 
+// 分块读取行时单次最多返回的行数
+const MAX_BLOCK_ROWS = 1000;
+// 文件在读取期间变化时重新读取的次数
+const MAX_VERSION_ATTEMPTS = 3;
+
 // 配置文件上传
 const storage = multer.diskStorage({
   destination: async (req, file, cb) => {
@@ -56,6 +71,66 @@ export const upload = multer({
   }
 });
 
+/**
+ * 解码文件ID（Base64编码的URL编码路径）为系统路径
+ * @param fileId 文件ID
+ * @returns 系统路径，无法解码时返回null
+ */
+const decodeFileId = (fileId: string): string | null => {
+  try {
+    const filePath = decodeURIComponent(Buffer.from(fileId, 'base64').toString()).replace(/\\/g, '/');
+    return filePath ? path.normalize(filePath) : null;
+  } catch (e) {
+    return null;
+  }
+};
+
+/**
+ * 检查文件存在且是支持的表格文件，不满足时直接发送错误响应
+ * @param res Express响应对象
+ * @param filePath 系统路径
+ * @returns 文件状态，已发送错误响应时返回null
+ */
+const statTableFile = async (res: Response, filePath: string): Promise<fs.Stats | null> => {
+  let stats: fs.Stats;
+  try {
+    stats = await fileUtils.statAsync(filePath);
+  } catch (err) {
+    responseUtils.notFound(res, `文件不存在或无法访问: ${path.basename(filePath)}`);
+    return null;
+  }
+  if (stats.isDirectory()) {
+    responseUtils.error(res, `无法读取目录内容作为文件`);
+    return null;
+  }
+
+  const config = await configService.getConfig();
+  const ext = path.extname(filePath).toLowerCase();
+  if (!config.fileWatching.fileTypes.includes(ext)) {
+    responseUtils.error(res, `不支持的文件类型: ${ext}`);
+    return null;
+  }
+  return stats;
+};
+
+/**
+ * 获取文件的表格及其对应的文件状态
+ * 文件可能在请求检查之后、读取之前发生变化，读取后重新检查文件状态，
+ * 内容与表格一致时返回该状态，响应的ETag和元数据据此计算
+ * @param filePath 系统路径
+ * @param signal 取消信号
+ */
+const loadTableVersion = async (filePath: string, signal: AbortSignal): Promise<{ table: CachedTable; stats: fs.Stats }> => {
+  for (let attempt = 0; attempt < MAX_VERSION_ATTEMPTS; attempt++) {
+    const table = await tableCacheService.getTable(filePath, signal);
+    const stats = await fileUtils.statAsync(filePath);
+    if (await contentHashService.getHash(filePath, stats, signal) === table.version) {
+      return { table, stats };
+    }
+  }
+  throw new Error('文件在读取期间持续变化，请稍后重试');
+};
+
 /**
  * 文件控制器，处理文件相关的API请求
  */
@@ -133,6 +208,7 @@ class FileController {
   
   /**
    * 获取文件内容
+   * 响应带有由文件路径、大小和修改时间生成的ETag，文件未变化时返回304，不解析文件
    * @param req Express请求对象
    * @param res Express响应对象
    */
@@ -161,8 +237,9 @@ class FileController {
       logger.info(`系统路径格式: "${systemFilePath}"`);
       
       // 验证文件存在
+      let stats: fs.Stats;
       try {
-        const stats = await fileUtils.statAsync(systemFilePath);
+        stats = await fileUtils.statAsync(systemFilePath);
         logger.info(`文件统计信息: ${JSON.stringify({
           size: stats.size,
           isDirectory: stats.isDirectory(),
@@ -192,18 +269,40 @@ class FileController {
       
       // 解析文件
       try {
-        logger.info(`开始解析文件: ${filePath}`);
-        // 传入系统路径格式给解析服务
-        const data = await fileParserService.parseFile(systemFilePath);
-        
-        if (!data || !data.rows || !data.headers) {
-          logger.error(`文件解析失败，无法提取数据: ${filePath}`);
-          return responseUtils.error(res, `文件解析失败，无法提取数据`);
-        }
-        
-        logger.info(`文件解析成功: ${filePath}, 行数: ${data.rows.length}, 列数: ${data.headers.length}`);
-        return responseUtils.success(res, data);
+        // 客户端断开后不再等待解析结果，同一文件的其他请求仍在等待时解析继续进行
+        const controller = new AbortController();
+        res.on('close', () => {
+          if (!res.writableFinished) controller.abort();
+        });
+        // 解码编码随配置变化，计入ETag，修改配置后客户端缓存的旧版本不再有效
+        const contentETag = (current: fs.Stats, encoding: string) =>
+          httpCache.createETag('content', systemFilePath, current.size, current.mtimeMs, encoding);
+        const encoding = await tableCacheService.getEncoding(systemFilePath, stats);
+        await httpCache.sendCached(req, res, contentETag(stats, encoding), async signal => {
+          logger.info(`开始解析文件: ${filePath}`);
+          // 传入系统路径格式给表格缓存，未命中时由解析服务解析
+          const current = await loadTableVersion(systemFilePath, signal);
+          const data = current.table.withMetadata(systemFilePath, current.stats);
+          
+          if (!data || !data.rows || !data.headers) {
+            throw new Error('无法提取数据');
+          }
+          
+          logger.info(`文件解析成功: ${filePath}, 行数: ${data.rows.length}, 列数: ${data.headers.length}`);
+          return {
+            data,
+            etag: contentETag(current.stats, current.table.encoding)
+          };
+        }, controller.signal);
       } catch (parseErr) {
+        if (parseErr instanceof CancelledError) {
+          logger.info(`客户端已断开，停止等待解析: ${filePath}`);
+          return;
+        }
+        if (parseErr instanceof MemoryBudgetError) {
+          logger.warn(`内存预算不足，暂缓解析: ${filePath}, ${parseErr.message}`);
+          return responseUtils.serviceUnavailable(res, parseErr.message);
+        }
         logger.error(`文件解析失败: ${filePath}`, parseErr);
         return responseUtils.error(res, `文件解析失败: ${(parseErr as Error).message}`);
       }
@@ -213,6 +312,146 @@ class FileController {
     }
   }
   
+  /**
+   * 分块获取文件的行，供表格视图滚动时按需加载
+   * 支持与导出相同的搜索、过滤和排序参数，同一视图的行顺序在服务端缓存，各块之间无需重复排序
+   * @param req Express请求对象
+   * @param res Express响应对象
+   */
+  public async getFileRows(req: Request, res: Response) {
+    const filePath = decodeFileId(req.params.id);
+    if (!filePath) {
+      return responseUtils.error(res, `无效的文件ID: ${req.params.id}`);
+    }
+
+    const offset = parseInt(String(req.query.offset ?? '0'), 10);
+    const limit = parseInt(String(req.query.limit ?? '100'), 10);
+    if (isNaN(offset) || offset < 0 || isNaN(limit) || limit < 1 || limit > MAX_BLOCK_ROWS) {
+      return responseUtils.error(res, `无效的分块参数，offset 不能为负，limit 范围为 1-${MAX_BLOCK_ROWS}`);
+    }
+
+    const controller = new AbortController();
+    res.on('close', () => {
+      if (!res.writableFinished) controller.abort();
+    });
+
+    try {
+      const stats = await statTableFile(res, filePath);
+      if (!stats) return;
+
+      const spec = tableViewService.parseSpec(req.query);
+      const rowsETag = (current: fs.Stats, encoding: string) => httpCache.createETag(
+        'rows', filePath, current.size, current.mtimeMs, encoding, offset, limit, JSON.stringify(spec)
+      );
+      const encoding = await tableCacheService.getEncoding(filePath, stats);
+      await httpCache.sendCached(req, res, rowsETag(stats, encoding), async signal => {
+        const { table, stats: current } = await loadTableVersion(filePath, signal);
+        const indices = tableViewService.getRowIndices(table, spec);
+        const end = Math.min(offset + limit, indices.length);
+        const rows = [];
+        for (let i = offset; i < end; i++) {
+          rows.push(table.data.rows[indices[i]]);
+        }
+        return {
+          data: {
+            offset,
+            total: indices.length,
+            rowCount: table.rowCount,
+            headers: table.data.headers,
+            rows
+          },
+          etag: rowsETag(current, table.encoding)
+        };
+      }, controller.signal);
+    } catch (err) {
+      if (err instanceof CancelledError) {
+        return;
+      }
+      if (err instanceof ViewSpecError) {
+        return responseUtils.error(res, err.message);
+      }
+      if (err instanceof MemoryBudgetError) {
+        logger.warn(`内存预算不足，暂缓读取: ${filePath}, ${err.message}`);
+        return responseUtils.serviceUnavailable(res, err.message);
+      }
+      logger.error(`读取文件行失败: ${filePath}`, err);
+      return responseUtils.serverError(res, `读取文件行失败: ${(err as Error).message}`);
+    }
+  }
+
+  /**
+   * 按视图导出文件，搜索、过滤和排序后以CSV或xlsx流式输出
+   * 输出按客户端的接收速度逐块生成，客户端断开时停止
+   * @param req Express请求对象
+   * @param res Express响应对象
+   */
+  public async exportFile(req: Request, res: Response) {
+    const filePath = decodeFileId(req.params.id);
+    if (!filePath) {
+      return responseUtils.error(res, `无效的文件ID: ${req.params.id}`);
+    }
+
+    const format = String(req.query.format || 'csv').toLowerCase() as ExportFormat;
+    if (!EXPORT_FORMATS.includes(format)) {
+      return responseUtils.error(res, `不支持的导出格式: ${format}. 支持的格式: ${EXPORT_FORMATS.join(', ')}`);
+    }
+
+    const controller = new AbortController();
+    res.on('close', () => {
+      if (!res.writableFinished) controller.abort();
+    });
+
+    let output: AsyncGenerator<Buffer>;
+    let unpin = () => {};
+    try {
+      if (!await statTableFile(res, filePath)) return;
+
+      const spec = tableViewService.parseSpec(req.query);
+      const table = await tableCacheService.getTable(filePath, controller.signal);
+      // 导出期间固定表格，内存紧张时不被淘汰，避免同一文件被重新解析出第二份
+      unpin = table.pin();
+      output = exportService.createExport(table, spec, format);
+    } catch (err) {
+      unpin();
+      if (err instanceof CancelledError) {
+        logger.info(`客户端已断开，取消导出: ${filePath}`);
+        return;
+      }
+      if (err instanceof ViewSpecError) {
+        return responseUtils.error(res, err.message);
+      }
+      if (err instanceof MemoryBudgetError) {
+        logger.warn(`内存预算不足，暂缓导出: ${filePath}, ${err.message}`);
+        return responseUtils.serviceUnavailable(res, err.message);
+      }
+      logger.error(`导出文件失败: ${filePath}`, err);
+      return responseUtils.serverError(res, `导出文件失败: ${(err as Error).message}`);
+    }
+
+    // 不设置Content-Length，以分块传输编码输出
+    res.attachment(`${path.basename(filePath, path.extname(filePath))}.${format}`);
+    res.setHeader('Content-Type', EXPORT_CONTENT_TYPES[format]);
+    res.setHeader('Cache-Control', 'no-store');
+
+    logger.info(`开始导出: ${filePath}, 格式: ${format}`);
+    try {
+      // pipeline按响应的写入背压拉取数据，连接关闭时结束生成器
+      await pipeline(Readable.from(output, { objectMode: false }), res);
+      exportsTotal.inc({ format, status: 'success' });
+      logger.info(`导出完成: ${filePath}, 格式: ${format}`);
+    } catch (err) {
+      if (controller.signal.aborted) {
+        exportsTotal.inc({ format, status: 'cancelled' });
+        logger.info(`客户端已断开，导出中止: ${filePath}`);
+      } else {
+        exportsTotal.inc({ format, status: 'error' });
+        logger.error(`导出文件失败: ${filePath}`, err);
+      }
+    } finally {
+      unpin();
+    }
+  }
+
   /**
    * 上传文件
    * @param req Express请求对象
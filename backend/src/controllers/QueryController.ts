@@ -0,0 +1,53 @@
+import { Request, Response } from 'express';
+import logger from '../utils/logger';
+import responseUtils from '../utils/responseUtils';
+import queryService, { QueryError } from '../services/QueryService';
+import { MemoryBudgetError } from '../services/MemoryGovernorService';
+import { CancelledError } from '../utils/singleFlight';
+
+/**
+ * 查询控制器，处理跨文件查询相关的API请求
+ */
+class QueryController {
+  /**
+   * 执行SQL查询
+   * @param req Express请求对象
+   * @param res Express响应对象
+   */
+  public async executeQuery(req: Request, res: Response) {
+    try {
+      const sql = req.body && req.body.sql;
+
+      if (!sql || typeof sql !== 'string') {
+        return responseUtils.error(res, '未提供查询语句');
+      }
+
+      // 客户端断开后停止加载尚未解析的文件
+      const controller = new AbortController();
+      res.on('close', () => {
+        if (!res.writableFinished) controller.abort();
+      });
+
+      logger.info(`执行查询: ${sql}`);
+      const result = await queryService.execute(sql, controller.signal);
+      return responseUtils.success(res, result);
+    } catch (err) {
+      if (err instanceof CancelledError) {
+        logger.info('客户端已断开，查询已停止');
+        return;
+      }
+      if (err instanceof QueryError) {
+        logger.error(`查询无效: ${err.message}`);
+        return responseUtils.error(res, err.message);
+      }
+      if (err instanceof MemoryBudgetError) {
+        logger.warn(`内存预算不足，查询被拒绝: ${err.message}`);
+        return responseUtils.serviceUnavailable(res, err.message);
+      }
+      logger.error('执行查询失败', err);
+      return responseUtils.serverError(res, `执行查询失败: ${(err as Error).message}`);
+    }
+  }
+}
+
+export default new QueryController();
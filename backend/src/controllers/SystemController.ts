@@ -0,0 +1,74 @@
+import { Request, Response } from 'express';
+import logger from '../utils/logger';
+import responseUtils, { StatusCode } from '../utils/responseUtils';
+import memoryGovernorService from '../services/MemoryGovernorService';
+import tableCacheService from '../services/TableCacheService';
+import warmupService from '../services/WarmupService';
+import visualizationService from '../services/VisualizationService';
+import httpCache from '../utils/httpCache';
+
+/**
+ * 系统控制器，处理运行状态相关的API请求
+ */
+class SystemController {
+  /**
+   * 获取内存使用情况
+   * @param req Express请求对象
+   * @param res Express响应对象
+   */
+  public async getMemoryUsage(req: Request, res: Response) {
+    try {
+      const usage = await memoryGovernorService.getUsage();
+      return responseUtils.success(res, {
+        ...usage,
+        tableCache: tableCacheService.getStats(),
+        httpCache: httpCache.getStats()
+      });
+    } catch (err) {
+      logger.error('获取内存使用情况失败', err);
+      return responseUtils.serverError(res, `获取内存使用情况失败: ${(err as Error).message}`);
+    }
+  }
+  
+  /**
+   * 开始预热监控目录中的文件，立即返回，预热在后台进行
+   * @param req Express请求对象
+   * @param res Express响应对象
+   */
+  public async startWarmup(req: Request, res: Response) {
+    try {
+      const status = await warmupService.start();
+      return responseUtils.success(res, status, '预热已开始', StatusCode.ACCEPTED);
+    } catch (err) {
+      logger.error('启动预热失败', err);
+      return responseUtils.serverError(res, `启动预热失败: ${(err as Error).message}`);
+    }
+  }
+  
+  /**
+   * 获取预热进度
+   * @param req Express请求对象
+   * @param res Express响应对象
+   */
+  public async getWarmupStatus(req: Request, res: Response) {
+    return responseUtils.success(res, warmupService.getStatus());
+  }
+  
+  /**
+   * 排空本实例：停止接收可视化配置的修改并写回，滚动重启时由启动器在切换前调用
+   * @param req Express请求对象
+   * @param res Express响应对象
+   */
+  public async drain(req: Request, res: Response) {
+    try {
+      await visualizationService.drain();
+      logger.info('已停止接收修改并写回数据，等待切换到新的实例');
+      return responseUtils.success(res, { state: 'drained' }, '已停止接收修改');
+    } catch (err) {
+      logger.error('排空失败', err);
+      return responseUtils.serverError(res, `排空失败: ${(err as Error).message}`);
+    }
+  }
+}
+
+export default new SystemController();
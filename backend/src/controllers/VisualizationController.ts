@@ -1,7 +1,9 @@
 import { Request, Response } from 'express';
 import logger from '../utils/logger';
 import responseUtils from '../utils/responseUtils';
+import httpCache from '../utils/httpCache';
 import visualizationService from '../services/VisualizationService';
+import { StoreReadOnlyError } from '../services/VisualizationStore';
 
 /**
  * 可视化控制器，处理可视化配置相关的API请求
@@ -20,8 +22,12 @@ class VisualizationController {
         return responseUtils.error(res, '未提供文件ID');
       }
       
-      const visualizations = await visualizationService.getVisualizations(fileId);
-      return responseUtils.success(res, visualizations);
+      // 配置未修改时返回304，否则复用同一版本已序列化的响应
+      const etag = httpCache.createETag('visualizations', fileId, visualizationService.getVersion(fileId));
+      await httpCache.sendCached(req, res, etag, async () => {
+        const { visualizations, version } = await visualizationService.getVersionedVisualizations(fileId);
+        return { data: visualizations, etag: httpCache.createETag('visualizations', fileId, version) };
+      });
     } catch (err) {
       logger.error('获取可视化配置失败', err);
       return responseUtils.serverError(res, `获取可视化配置失败: ${(err as Error).message}`);
@@ -49,6 +55,9 @@ class VisualizationController {
       const newVisualization = await visualizationService.createVisualization(fileId, config);
       return responseUtils.created(res, newVisualization, '可视化配置已创建');
     } catch (err) {
+      if (err instanceof StoreReadOnlyError) {
+        return responseUtils.serviceUnavailable(res, err.message, 1);
+      }
       logger.error('创建可视化配置失败', err);
       return responseUtils.serverError(res, `创建可视化配置失败: ${(err as Error).message}`);
     }
@@ -76,6 +85,9 @@ class VisualizationController {
       const updatedVisualization = await visualizationService.updateVisualization(fileId, visId, config);
       return responseUtils.success(res, updatedVisualization, '可视化配置已更新');
     } catch (err) {
+      if (err instanceof StoreReadOnlyError) {
+        return responseUtils.serviceUnavailable(res, err.message, 1);
+      }
       logger.error('更新可视化配置失败', err);
       
       // 如果是因为配置不存在导致的错误，返回404
@@ -104,6 +116,9 @@ class VisualizationController {
       await visualizationService.deleteVisualization(fileId, visId);
       return responseUtils.success(res, null, '可视化配置已删除');
     } catch (err) {
+      if (err instanceof StoreReadOnlyError) {
+        return responseUtils.serviceUnavailable(res, err.message, 1);
+      }
       logger.error('删除可视化配置失败', err);
       
       // 如果是因为配置不存在导致的错误，返回404
@@ -4,6 +4,7 @@ import logger from '../utils/logger';
 import fileWatcherService from '../services/FileWatcherService';
 import configService from '../services/ConfigService';
 import visualizationService from '../services/VisualizationService';
+import { socketEmitsTotal, socketEmitDuration, socketClients } from '../utils/metrics';
 
 /**
  * WebSocket控制器，处理WebSocket连接和事件
@@ -29,9 +30,11 @@ class WebSocketController {
     this.io.on('connection', (socket: Socket) => {
       const clientId = socket.id;
       logger.info(`WebSocket客户端连接: ${clientId}`);
+      socketClients.inc();
       
       // 断开连接事件
       socket.on('disconnect', () => {
+        socketClients.dec();
         logger.info(`WebSocket客户端断开连接: ${clientId}`);
       });
       
@@ -59,7 +62,7 @@ class WebSocketController {
   private setupFileChangeListener() {
     fileWatcherService.on('file-change', (data) => {
       if (this.io) {
-        this.io.emit('file-change', data);
+        this.broadcast('file-change', data);
         logger.info(`文件变化事件已广播: ${data.type}, ${data.path}`);
       }
     });
@@ -71,7 +74,7 @@ class WebSocketController {
   private setupConfigChangeListener() {
     configService.on('config-change', (data) => {
       if (this.io) {
-        this.io.emit('config-change', data);
+        this.broadcast('config-change', data);
         logger.info('配置变化事件已广播');
       }
     });
@@ -83,11 +86,33 @@ class WebSocketController {
   private setupVisualizationChangeListener() {
     visualizationService.on('visualization-change', (data) => {
       if (this.io) {
-        this.io.emit('visualization-change', data);
+        this.broadcast('visualization-change', data);
         logger.info(`可视化配置变化事件已广播: ${data.type}, 文件ID: ${data.fileId}`);
       }
     });
   }
+  
+  /**
+   * 关闭所有客户端的底层连接，不发送断开消息，客户端会按重连策略自动重连
+   * 用于服务关闭前让客户端转移到新的后端实例
+   */
+  public closeConnections() {
+    if (!this.io) return;
+    this.io.engine.close();
+  }
+  
+  /**
+   * 向所有客户端广播事件，并记录广播次数和耗时
+   * @param event 事件名称
+   * @param data 事件数据
+   */
+  private broadcast(event: string, data: any) {
+    if (!this.io) return;
+    const endTimer = socketEmitDuration.startTimer({ event });
+    this.io.emit(event, data);
+    endTimer();
+    socketEmitsTotal.inc({ event });
+  }
 }
 
 export default new WebSocketController(); 
\ No newline at end of file
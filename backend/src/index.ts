@@ -5,6 +5,7 @@ import logger from './utils/logger';
 import webSocketController from './controllers/WebSocketController';
 import fileWatcherService from './services/FileWatcherService';
 import fileUtils from './utils/fileUtils';
+import visualizationService from './services/VisualizationService';
 
 // 加载环境变量
 dotenv.config();
@@ -12,6 +13,9 @@ dotenv.config();
 // 获取端口号
 const port = process.env.PORT || 3001;
 
+// 监听地址，未设置时监听所有地址；由启动器代理时只监听本机
+const host = process.env.HOST;
+
 // 创建HTTP服务器
 const server = http.createServer(app);
 
@@ -19,8 +23,8 @@ const server = http.createServer(app);
 webSocketController.init(server);
 
 // 启动服务器
-server.listen(port, async () => {
-  logger.info(`服务器已启动，监听端口 ${port}`);
+server.listen({ port: Number(port), host }, async () => {
+  logger.info(`服务器已启动，监听端口 ${host ? `${host}:` : ''}${port}`);
   
   // 确保数据目录存在
   const dataDir = process.env.DATA_DIR || './data';
@@ -48,11 +52,51 @@ process.on('unhandledRejection', (reason, promise) => {
   // 继续运行
 });
 
+// 退出前写回可视化配置的尝试次数和重试间隔
+const SHUTDOWN_DRAIN_ATTEMPTS = 3;
+const SHUTDOWN_DRAIN_RETRY_MS = 1000;
+
+/**
+ * 排空可视化配置，写回失败时重试
+ * @returns 是否全部写回
+ */
+const drainVisualizations = async (): Promise<boolean> => {
+  for (let attempt = 1; attempt <= SHUTDOWN_DRAIN_ATTEMPTS; attempt++) {
+    try {
+      await visualizationService.drain();
+      return true;
+    } catch (err) {
+      logger.error(`保存可视化配置失败 (${attempt}/${SHUTDOWN_DRAIN_ATTEMPTS})`, err);
+      if (attempt < SHUTDOWN_DRAIN_ATTEMPTS) {
+        await new Promise(resolve => setTimeout(resolve, SHUTDOWN_DRAIN_RETRY_MS));
+      }
+    }
+  }
+  return false;
+};
+
 // 处理退出信号
-process.on('SIGTERM', () => {
-  logger.info('收到SIGTERM信号，正在优雅关闭...');
-  server.close(() => {
+let shuttingDown = false;
+const shutdown = (signal: NodeJS.Signals) => {
+  if (shuttingDown) return;
+  shuttingDown = true;
+  logger.info(`收到${signal}信号，正在优雅关闭...`);
+  
+  // 停止接收新连接，进行中的请求处理完后写回可视化配置再退出
+  // 写回放在关闭之后，排空期间完成的修改也会被保存；仍有未保存的修改时以非零状态退出
+  server.close(async () => {
+    if (!await drainVisualizations()) {
+      logger.error('可视化配置未能全部保存，异常退出');
+      process.exit(1);
+    }
     logger.info('服务器已关闭');
     process.exit(0);
   });
-}); 
\ No newline at end of file
+  
+  // WebSocket和空闲的keep-alive连接不会自行结束，主动关闭，客户端会重连到新的实例
+  webSocketController.closeConnections();
+  server.closeIdleConnections();
+};
+
+process.on('SIGTERM', shutdown);
+process.on('SIGINT', shutdown);
\ No newline at end of file
@@ -59,6 +59,19 @@ export interface SystemConfig {
       enableSearch: boolean;
     };
   };
+  // 文本文件的编码，auto或utf8时自动检测，其他值在文件不是合法UTF-8时使用
+  fileEncoding?: string;
+  memory?: {
+    budgetMB?: number;
+    maxQueuedParses?: number;
+    queueTimeout?: number;
+  };
+  warmup?: {
+    enabled?: boolean;
+    concurrency?: number;
+    order?: 'recent' | 'size';
+    maxFiles?: number;
+  };
 }
 
 // 文件模型
@@ -72,6 +85,23 @@ export interface FileInfo {
   isDirectory: boolean;
 }
 
+// 查询结果模型
+export interface QueryResult {
+  columns: string[];
+  rows: Array<Record<string, any>>;
+  stats: QueryStats;
+}
+
+export interface QueryStats {
+  filesMatched: number;
+  filesPruned: number;
+  filesScanned: number;
+  rowsScanned: number;
+  rowsReturned: number;
+  truncated: boolean;
+  elapsedMs: number;
+}
+
 // API响应模型
 export interface ApiResponse<T> {
   code: number;
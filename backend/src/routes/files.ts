@@ -10,6 +10,12 @@ router.get('/', fileController.getFiles);
 // 获取文件内容
 router.get('/:id/content', fileController.getFileContent);
 
+// 分块获取文件的行（可按视图过滤和排序）
+router.get('/:id/rows', fileController.getFileRows);
+
+// 导出文件（可按视图过滤和排序）
+router.get('/:id/export', fileController.exportFile);
+
 // 上传文件
 router.post('/upload', upload.single('file'), fileController.uploadFile);
 
@@ -1,6 +1,8 @@
 import express from 'express';
 import filesRoutes from './files';
 import configRoutes from './config';
+import queryRoutes from './query';
+import systemRoutes from './system';
 
 const router = express.Router();
 
@@ -10,4 +12,10 @@ router.use('/files', filesRoutes);
 // 配置相关路由
 router.use('/config', configRoutes);
 
+// 查询相关路由
+router.use('/query', queryRoutes);
+
+// 系统状态相关路由
+router.use('/system', systemRoutes);
+
 export default router; 
\ No newline at end of file
@@ -0,0 +1,9 @@
+import express from 'express';
+import queryController from '../controllers/QueryController';
+
+const router = express.Router();
+
+// 执行查询
+router.post('/', queryController.executeQuery);
+
+export default router;
@@ -0,0 +1,18 @@
+import express from 'express';
+import systemController from '../controllers/SystemController';
+
+const router = express.Router();
+
+// 内存使用情况
+router.get('/memory', systemController.getMemoryUsage);
+
+// 启动预热
+router.post('/warmup', systemController.startWarmup);
+
+// 预热进度
+router.get('/warmup', systemController.getWarmupStatus);
+
+// 排空，滚动重启时切换前调用
+router.post('/drain', systemController.drain);
+
+export default router;
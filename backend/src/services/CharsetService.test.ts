@@ -0,0 +1,156 @@
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+
+jest.mock('../utils/logger', () => ({
+  __esModule: true,
+  default: { info: jest.fn(), warn: jest.fn(), error: jest.fn(), debug: jest.fn() }
+}));
+
+type CharsetModule = typeof import('./CharsetService');
+type ConfigModule = typeof import('./ConfigService');
+
+// "a\n你好\n" 的GBK编码
+const GBK_TEXT = Buffer.from([0x61, 0x0a, 0xc4, 0xe3, 0xba, 0xc3, 0x0a]);
+
+describe('CharsetService', () => {
+  let tempDir: string;
+  let charsetService: CharsetModule['default'];
+  let configService: ConfigModule['default'];
+  let restoreConfig: (() => void) | null = null;
+
+  /**
+   * 写入测试文件并返回路径，每个文件使用不同的名称以免命中其他用例的检测缓存
+   */
+  const writeFile = (name: string, content: Buffer | string): string => {
+    const filePath = path.join(tempDir, name);
+    fs.writeFileSync(filePath, content);
+    return filePath;
+  };
+
+  const useEncoding = async (fileEncoding: string) => {
+    const config = { ...(await configService.getConfig()), fileEncoding };
+    const spy = jest.spyOn(configService, 'getConfig').mockResolvedValue(config);
+    restoreConfig = () => spy.mockRestore();
+  };
+
+  const readText = async (filePath: string, encoding: string): Promise<string[]> => {
+    const chunks: string[] = [];
+    for await (const chunk of charsetService.createTextStream(filePath, encoding)) {
+      chunks.push(chunk);
+    }
+    return chunks;
+  };
+
+  beforeAll(async () => {
+    tempDir = fs.mkdtempSync(path.join(os.tmpdir(), 'charset-'));
+    // 配置文件路径在模块加载时读取
+    process.env.CONFIG_PATH = path.join(tempDir, 'config.json');
+    charsetService = (await import('./CharsetService')).default;
+    configService = (await import('./ConfigService')).default;
+  });
+
+  afterEach(() => {
+    if (restoreConfig) restoreConfig();
+    restoreConfig = null;
+  });
+
+  afterAll(() => {
+    fs.rmSync(tempDir, { recursive: true, force: true });
+  });
+
+  it.each([
+    ['utf-8', Buffer.concat([Buffer.from([0xef, 0xbb, 0xbf]), Buffer.from('名称\n', 'utf8')])],
+    ['utf-16le', Buffer.concat([Buffer.from([0xff, 0xfe]), Buffer.from('名称\n', 'utf16le')])],
+    ['utf-16be', Buffer.concat([Buffer.from([0xfe, 0xff]), Buffer.from('名称\n', 'utf16le').swap16()])]
+  ])('根据BOM识别 %s', async (encoding, content) => {
+    const filePath = writeFile(`bom-${encoding}.csv`, content as Buffer);
+    expect(await charsetService.detect(filePath)).toBe(encoding);
+  });
+
+  it('根据零字节的位置识别无BOM的UTF-16', async () => {
+    const le = writeFile('plain-le.csv', Buffer.from('id,name\n1,alpha\n', 'utf16le'));
+    const be = writeFile('plain-be.csv', Buffer.from('id,name\n1,alpha\n', 'utf16le').swap16());
+
+    expect(await charsetService.detect(le)).toBe('utf-16le');
+    expect(await charsetService.detect(be)).toBe('utf-16be');
+  });
+
+  it('合法的UTF-8识别为utf-8', async () => {
+    const filePath = writeFile('utf8.csv', 'id,名称\n1,你好\n');
+    expect(await charsetService.detect(filePath)).toBe('utf-8');
+  });
+
+  it('不是UTF-8的GBK内容识别为gb18030', async () => {
+    const filePath = writeFile('gbk.csv', GBK_TEXT);
+    expect(await charsetService.detect(filePath)).toBe('gb18030');
+  });
+
+  it('无法按UTF-8和GB18030解码时按utf-8读取', async () => {
+    const filePath = writeFile('invalid.csv', Buffer.from([0x61, 0xff, 0x0a]));
+    expect(await charsetService.detect(filePath)).toBe('utf-8');
+  });
+
+  it('不是UTF-8时使用配置的编码', async () => {
+    await useEncoding('GBK');
+    const gbk = writeFile('configured-gbk.csv', GBK_TEXT);
+    const utf8 = writeFile('configured-utf8.csv', 'id,名称\n');
+
+    expect(await charsetService.detect(gbk)).toBe('gbk');
+    expect(await charsetService.detect(utf8)).toBe('utf-8');
+  });
+
+  it('配置了不支持的编码时改为自动检测', async () => {
+    await useEncoding('no-such-encoding');
+    const filePath = writeFile('unsupported.csv', GBK_TEXT);
+    expect(await charsetService.detect(filePath)).toBe('gb18030');
+  });
+
+  it('同一版本使用缓存的结果，大小或修改时间变化后重新检测', async () => {
+    // 使用整秒的修改时间，避免恢复时丢失精度
+    const filePath = writeFile('versioned.csv', 'a\n你好\n');
+    fs.utimesSync(filePath, 1700000000, 1700000000);
+    expect(await charsetService.detect(filePath)).toBe('utf-8');
+
+    // 大小和修改时间不变时不重新读取
+    fs.writeFileSync(filePath, Buffer.concat([GBK_TEXT, Buffer.from('  ')]));
+    fs.utimesSync(filePath, 1700000000, 1700000000);
+    expect(await charsetService.detect(filePath)).toBe('utf-8');
+
+    fs.writeFileSync(filePath, GBK_TEXT);
+    expect(await charsetService.detect(filePath)).toBe('gb18030');
+  });
+
+  it('forget后重新检测', async () => {
+    const filePath = writeFile('forgotten.csv', 'a\n你好\n');
+    fs.utimesSync(filePath, 1700000000, 1700000000);
+    expect(await charsetService.detect(filePath)).toBe('utf-8');
+
+    fs.writeFileSync(filePath, Buffer.concat([GBK_TEXT, Buffer.from('  ')]));
+    fs.utimesSync(filePath, 1700000000, 1700000000);
+    charsetService.forget(filePath);
+
+    expect(await charsetService.detect(filePath)).toBe('gb18030');
+  });
+
+  it('文本流正确解码跨越块边界的多字节字符', async () => {
+    // 读取块为1MB，让“你”的3个字节跨越第一个块的末尾
+    const text = `${'a'.repeat(1024 * 1024 - 1)}你好\n`;
+    const filePath = writeFile('boundary.csv', text);
+
+    const chunks = await readText(filePath, 'utf-8');
+
+    expect(chunks.length).toBeGreaterThan(1);
+    expect(chunks.join('')).toBe(text);
+  });
+
+  it('文本流去掉BOM并按检测的编码解码', async () => {
+    const utf8 = writeFile('stream-bom.csv', Buffer.concat([Buffer.from([0xef, 0xbb, 0xbf]), Buffer.from('名称\n', 'utf8')]));
+    const utf16 = writeFile('stream-utf16.csv', Buffer.concat([Buffer.from([0xff, 0xfe]), Buffer.from('名称\n', 'utf16le')]));
+    const gbk = writeFile('stream-gbk.csv', GBK_TEXT);
+
+    expect((await readText(utf8, await charsetService.detect(utf8))).join('')).toBe('名称\n');
+    expect((await readText(utf16, await charsetService.detect(utf16))).join('')).toBe('名称\n');
+    expect((await readText(gbk, await charsetService.detect(gbk))).join('')).toBe('a\n你好\n');
+  });
+});
\ No newline at end of file
@@ -0,0 +1,245 @@
+import fs from 'fs';
+import path from 'path';
+import { Readable, Transform, pipeline } from 'stream';
+import logger from '../utils/logger';
+import fileUtils from '../utils/fileUtils';
+import configService from './ConfigService';
+import { charsetDetections } from '../utils/metrics';
+
+// 检测编码时在文件开头和结尾各读取的字节数
+const SAMPLE_BYTES = parseInt(process.env.CHARSET_SAMPLE_KB || '64', 10) * 1024;
+// 解码时每块读取的大小
+const READ_CHUNK_SIZE = 1024 * 1024;
+
+// 配置中的编码名称到TextDecoder标签的映射
+const ENCODING_LABELS: Record<string, string> = {
+  utf8: 'utf-8',
+  'utf-8': 'utf-8',
+  utf16: 'utf-16le',
+  utf16le: 'utf-16le',
+  'utf-16le': 'utf-16le',
+  utf16be: 'utf-16be',
+  'utf-16be': 'utf-16be',
+  gbk: 'gbk',
+  gb2312: 'gbk',
+  gb18030: 'gb18030'
+};
+
+// 字节顺序标记
+const BOMS: Array<[number[], string]> = [
+  [[0xef, 0xbb, 0xbf], 'utf-8'],
+  [[0xff, 0xfe], 'utf-16le'],
+  [[0xfe, 0xff], 'utf-16be']
+];
+
+// 检测结果的来源
+type DetectionSource = 'bom' | 'utf8' | 'utf16' | 'configured' | 'gb18030' | 'fallback';
+
+// 已检测的文件编码
+interface DetectedCharset {
+  size: number;
+  mtimeMs: number;
+  configured: string;
+  encoding: string;
+}
+
+// 文件开头和结尾的样本，结尾样本可能从多字节字符中间开始
+interface Sample {
+  head: Buffer;
+  tail: Buffer | null;
+  // 开头样本是否截断了文件
+  truncated: boolean;
+}
+
+/**
+ * 样本能否按指定编码无错误地解码
+ * @param encoding TextDecoder标签
+ * @param bytes 样本
+ * @param partial 样本末尾是否截断，截断时允许末尾是不完整的字符
+ */
+const decodes = (encoding: string, bytes: Buffer, partial: boolean): boolean => {
+  try {
+    new TextDecoder(encoding, { fatal: true }).decode(bytes, { stream: partial });
+    return true;
+  } catch (err) {
+    return false;
+  }
+};
+
+/**
+ * 结尾样本能否按指定编码解码，依次跳过开头最多3个字节以对齐到字符边界
+ */
+const tailDecodes = (encoding: string, tail: Buffer): boolean => {
+  for (let skip = 0; skip <= 3 && skip < tail.length; skip++) {
+    if (decodes(encoding, tail.subarray(skip), false)) return true;
+  }
+  return false;
+};
+
+/**
+ * 按零字节的位置判断无BOM的UTF-16文本，ASCII字符的高位字节为零
+ * @returns 字节序，不像UTF-16文本时返回null
+ */
+const guessUtf16 = (bytes: Buffer): string | null => {
+  let even = 0;
+  let odd = 0;
+  const length = bytes.length - (bytes.length % 2);
+  for (let i = 0; i < length; i += 2) {
+    if (bytes[i] === 0) even++;
+    if (bytes[i + 1] === 0) odd++;
+  }
+  const pairs = length / 2;
+  if (pairs === 0) return null;
+  if (odd > pairs * 0.3 && even < pairs * 0.05) return 'utf-16le';
+  if (even > pairs * 0.3 && odd < pairs * 0.05) return 'utf-16be';
+  return null;
+};
+
+/**
+ * 字符集服务，检测文本文件的编码并提供流式解码
+ * 依次根据BOM、UTF-8合法性、配置的编码和GB18030合法性判断编码，
+ * 结果按文件版本（大小和修改时间）缓存，同一版本只读取一次样本
+ * 解码在读取流上逐块进行，不生成整个文件的转码副本
+ */
+class CharsetService {
+  private detected = new Map<string, DetectedCharset>();
+
+  /**
+   * 检测文件编码
+   * @param filePath 文件路径
+   * @param stats 已读取的文件状态，省略时重新读取
+   * @returns TextDecoder标签，如 utf-8、gb18030
+   */
+  public async detect(filePath: string, stats?: fs.Stats): Promise<string> {
+    const key = path.resolve(filePath);
+    const current = stats || await fileUtils.statAsync(key);
+    const configured = await this.getConfiguredEncoding();
+
+    const cached = this.detected.get(key);
+    if (cached && cached.size === current.size && cached.mtimeMs === current.mtimeMs && cached.configured === configured) {
+      charsetDetections.inc({ encoding: cached.encoding, source: 'cached' });
+      return cached.encoding;
+    }
+
+    const sample = await this.readSample(key, current.size);
+    const [encoding, source] = this.detectSample(sample, configured);
+    this.detected.set(key, { size: current.size, mtimeMs: current.mtimeMs, configured, encoding });
+    charsetDetections.inc({ encoding, source });
+
+    if (source === 'fallback') {
+      logger.warn(`无法确定文件编码，按 ${encoding} 读取: ${filePath}`);
+    } else if (encoding !== 'utf-8') {
+      logger.info(`检测到文件编码 ${encoding} (${source}): ${filePath}`);
+    }
+    return encoding;
+  }
+
+  /**
+   * 创建解码后的文本流，按块产生字符串
+   * 多字节字符跨越块边界时由解码器保留到下一块，UTF-8和UTF-16的BOM会被去掉
+   * @param filePath 文件路径
+   * @param encoding TextDecoder标签，见detect
+   * @returns 对象模式的可读流
+   */
+  public createTextStream(filePath: string, encoding: string): Readable {
+    const decoder = new TextDecoder(encoding);
+    const decode = new Transform({
+      readableObjectMode: true,
+      transform(chunk: Buffer, _encoding, callback) {
+        const text = decoder.decode(chunk, { stream: true });
+        callback(null, text || undefined);
+      },
+      flush(callback) {
+        const text = decoder.decode();
+        callback(null, text || undefined);
+      }
+    });
+    // 读取出错时传递给解码流，由使用方处理
+    return pipeline(fs.createReadStream(filePath, { highWaterMark: READ_CHUNK_SIZE }), decode, () => {});
+  }
+
+  /**
+   * 忘记文件的编码，文件删除时调用
+   * @param filePath 文件路径
+   */
+  public forget(filePath: string) {
+    this.detected.delete(path.resolve(filePath));
+  }
+
+  /**
+   * 按样本判断编码
+   * @param sample 文件样本
+   * @param configured 配置的编码，auto表示不指定
+   * @returns [TextDecoder标签, 判断依据]
+   */
+  private detectSample(sample: Sample, configured: string): [string, DetectionSource] {
+    const { head, tail, truncated } = sample;
+    for (const [bom, encoding] of BOMS) {
+      if (bom.every((byte, i) => head[i] === byte)) return [encoding, 'bom'];
+    }
+
+    // UTF-16文本含大量零字节，而零字节是合法的UTF-8，需要先判断
+    const utf16 = guessUtf16(head);
+    if (utf16) return [utf16, 'utf16'];
+
+    // 非ASCII内容恰好是合法UTF-8的概率很低，合法时即认为是UTF-8
+    if (decodes('utf-8', head, truncated) && (!tail || tailDecodes('utf-8', tail))) {
+      return ['utf-8', 'utf8'];
+    }
+
+    // 不是UTF-8时使用配置的编码
+    if (configured !== 'auto' && configured !== 'utf-8') {
+      return [configured, 'configured'];
+    }
+
+    // 中文Excel导出的CSV通常是GBK，GB18030兼容GBK
+    if (decodes('gb18030', head, truncated) && (!tail || tailDecodes('gb18030', tail))) {
+      return ['gb18030', 'gb18030'];
+    }
+
+    return ['utf-8', 'fallback'];
+  }
+
+  /**
+   * 读取文件开头的样本，文件较大时同时读取结尾的样本，
+   * 避免开头都是ASCII（如英文表头）而后面的内容是其他编码时误判
+   */
+  private async readSample(filePath: string, size: number): Promise<Sample> {
+    const handle = await fs.promises.open(filePath, 'r');
+    try {
+      const head = Buffer.alloc(Math.min(size, SAMPLE_BYTES));
+      const { bytesRead } = await handle.read(head, 0, head.length, 0);
+      let tail: Buffer | null = null;
+      if (size > SAMPLE_BYTES) {
+        const length = Math.min(SAMPLE_BYTES, size - SAMPLE_BYTES);
+        tail = Buffer.alloc(length);
+        const result = await handle.read(tail, 0, length, size - length);
+        tail = tail.subarray(0, result.bytesRead);
+      }
+      return { head: head.subarray(0, bytesRead), tail, truncated: size > SAMPLE_BYTES };
+    } finally {
+      await handle.close();
+    }
+  }
+
+  /**
+   * 获取配置的文件编码
+   * @returns TextDecoder标签，未配置或无法识别时返回auto
+   */
+  private async getConfiguredEncoding(): Promise<string> {
+    const config = await configService.getConfig();
+    const name = (config.fileEncoding || 'auto').toLowerCase();
+    if (name === 'auto') return 'auto';
+    const label = ENCODING_LABELS[name] || name;
+    try {
+      new TextDecoder(label);
+      return label;
+    } catch (err) {
+      logger.warn(`不支持的文件编码配置: ${config.fileEncoding}，改为自动检测`);
+      return 'auto';
+    }
+  }
+}
+
+// 单例模式
+export default new CharsetService();
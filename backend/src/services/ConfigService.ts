@@ -32,6 +32,18 @@ const defaultConfig: SystemConfig = {
       pageSize: 50,
       enableSearch: true
     }
+  },
+  fileEncoding: 'auto',
+  memory: {
+    budgetMB: 1024,
+    maxQueuedParses: 20,
+    queueTimeout: 60000
+  },
+  warmup: {
+    enabled: true,
+    concurrency: 2,
+    order: 'recent',
+    maxFiles: 50
   }
 };
 
@@ -0,0 +1,118 @@
+import fs from 'fs';
+import path from 'path';
+import crypto from 'crypto';
+import logger from '../utils/logger';
+import fileUtils from '../utils/fileUtils';
+import { contentHashRequests, contentHashDuration } from '../utils/metrics';
+import { SingleFlight, throwIfCancelled } from '../utils/singleFlight';
+
+// 内容哈希算法，Node内置，无需额外依赖
+const HASH_ALGORITHM = 'blake2b512';
+// 截取的十六进制长度（128位），足以区分不同内容
+const HASH_LENGTH = 32;
+// 读取文件时每块的大小
+const READ_CHUNK_SIZE = 1024 * 1024;
+
+// 已计算的文件内容标识
+interface FileIdentity {
+  size: number;
+  mtimeMs: number;
+  hash: string;
+}
+
+/**
+ * 内容哈希服务，为文件计算基于内容的标识
+ * 同一路径在大小和修改时间不变时只计算一次，内容相同的副本、重命名的文件得到相同的标识，
+ * 解析结果等派生数据按内容标识缓存即可在这些文件之间复用
+ */
+class ContentHashService {
+  private identities = new Map<string, FileIdentity>();
+  private hashes = new SingleFlight<string>('hash');
+
+  /**
+   * 获取文件的内容哈希
+   * @param filePath 文件路径
+   * @param stats 已读取的文件状态，省略时重新读取
+   * @param signal 取消信号
+   * @returns 内容哈希
+   */
+  public async getHash(filePath: string, stats?: fs.Stats, signal?: AbortSignal): Promise<string> {
+    const key = path.resolve(filePath);
+    const current = stats || await fileUtils.statAsync(key);
+
+    const identity = this.identities.get(key);
+    if (identity && identity.size === current.size && identity.mtimeMs === current.mtimeMs) {
+      contentHashRequests.inc({ result: 'hit' });
+      return identity.hash;
+    }
+
+    return this.hashes.do(
+      `${key}|${current.size}|${current.mtimeMs}`,
+      hashSignal => this.compute(key, current, hashSignal),
+      signal
+    );
+  }
+
+  /**
+   * 忘记文件的内容标识，文件变化或删除时调用
+   * @param filePath 文件路径
+   * @returns 原来的内容哈希，没有记录时返回null
+   */
+  public forget(filePath: string): string | null {
+    const key = path.resolve(filePath);
+    const identity = this.identities.get(key);
+    if (!identity) return null;
+    this.identities.delete(key);
+    return identity.hash;
+  }
+
+  /**
+   * 是否还有文件的内容为指定哈希
+   * @param hash 内容哈希
+   */
+  public isReferenced(hash: string): boolean {
+    for (const identity of this.identities.values()) {
+      if (identity.hash === hash) return true;
+    }
+    return false;
+  }
+
+  /**
+   * 已记录内容标识的文件数
+   */
+  public get size(): number {
+    return this.identities.size;
+  }
+
+  /**
+   * 流式读取文件计算哈希
+   * @param filePath 绝对路径
+   * @param stats 计算前的文件状态
+   * @param signal 中止信号
+   * @returns 内容哈希
+   */
+  private async compute(filePath: string, stats: fs.Stats, signal: AbortSignal): Promise<string> {
+    const endTimer = contentHashDuration.startTimer();
+    const hash = crypto.createHash(HASH_ALGORITHM);
+    const stream = fs.createReadStream(filePath, { highWaterMark: READ_CHUNK_SIZE });
+    for await (const chunk of stream) {
+      throwIfCancelled(signal);
+      hash.update(chunk);
+    }
+    const digest = hash.digest('hex').slice(0, HASH_LENGTH);
+    const seconds = endTimer();
+    contentHashRequests.inc({ result: 'computed' });
+
+    // 计算期间文件被修改时不记录，下次请求重新计算
+    const after = await fileUtils.statAsync(filePath);
+    if (after.size === stats.size && after.mtimeMs === stats.mtimeMs) {
+      this.identities.set(filePath, { size: stats.size, mtimeMs: stats.mtimeMs, hash: digest });
+    }
+
+    logger.debug(`计算内容哈希: ${filePath}, ${stats.size} 字节, 耗时 ${Math.round(seconds * 1000)}ms`);
+    return digest;
+  }
+}
+
+// 单例模式
+export default new ContentHashService();
@@ -0,0 +1,178 @@
+import { TableHeader } from '../models';
+import { ZipWriter } from '../utils/zipWriter';
+import { exportRowsTotal } from '../utils/metrics';
+import { CachedTable } from './TableCacheService';
+import tableViewService, { ViewSpec } from './TableViewService';
+
+// 支持的导出格式
+export type ExportFormat = 'csv' | 'xlsx';
+export const EXPORT_FORMATS: ExportFormat[] = ['csv', 'xlsx'];
+
+export const EXPORT_CONTENT_TYPES: Record<ExportFormat, string> = {
+  csv: 'text/csv; charset=utf-8',
+  xlsx: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+};
+
+// 每次输出的行数，决定单块数据的大小
+const ROWS_PER_CHUNK = parseInt(process.env.EXPORT_ROWS_PER_CHUNK || '2000', 10);
+
+// xlsx单个工作表的最大行数（含表头），超出时续写到下一个工作表
+const XLSX_MAX_SHEET_ROWS = 1048576;
+
+// UTF-8 BOM，Excel据此识别CSV编码
+const UTF8_BOM = '\ufeff';
+
+// XML中不允许出现的控制字符
+const INVALID_XML_CHARS = /[\u0000-\u0008\u000b\u000c\u000e-\u001f\ufffe\uffff]/g;
+
+const XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n';
+
+/**
+ * 转换为导出的文本，日期统一为ISO格式
+ */
+const toText = (value: any): string => {
+  if (value === null || value === undefined) return '';
+  if (value instanceof Date) return isNaN(value.getTime()) ? '' : value.toISOString();
+  return String(value);
+};
+
+const escapeCsv = (value: any): string => {
+  const text = toText(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+};
+
+const escapeXml = (text: string): string =>
+  text
+    .replace(INVALID_XML_CHARS, '')
+    .replace(/&/g, '&amp;')
+    .replace(/</g, '&lt;')
+    .replace(/>/g, '&gt;')
+    .replace(/"/g, '&quot;');
+
+/**
+ * 生成xlsx单元格，数字和布尔值保留类型，其余写为内联字符串
+ */
+const xlsxCell = (value: any): string => {
+  if (value === null || value === undefined || value === '') return '<c/>';
+  if (typeof value === 'number' && isFinite(value)) return `<c><v>${value}</v></c>`;
+  if (typeof value === 'boolean') return `<c t="b"><v>${value ? 1 : 0}</v></c>`;
+  return `<c t="inlineStr"><is><t xml:space="preserve">${escapeXml(toText(value))}</t></is></c>`;
+};
+
+const xlsxRow = (values: any[]): string => `<row>${values.map(xlsxCell).join('')}</row>`;
+
+/**
+ * 导出服务，把表格视图按行块流式输出为CSV或xlsx
+ * 只保存视图的行号，输出在生成器中逐块产生，由调用方按写入背压拉取，内存占用不随导出行数增长
+ */
+class ExportService {
+  /**
+   * 创建导出数据流
+   * @param table 缓存的表格
+   * @param spec 视图
+   * @param format 导出格式
+   * @returns 按顺序产生输出字节的生成器
+   */
+  public createExport(table: CachedTable, spec: ViewSpec, format: ExportFormat): AsyncGenerator<Buffer> {
+    // 在开始输出前计算视图，参数错误可以作为普通错误响应返回
+    const indices = tableViewService.getRowIndices(table, spec);
+    const headers = table.data.headers;
+    return format === 'xlsx'
+      ? this.writeXlsx(table, headers, indices)
+      : this.writeCsv(table, headers, indices);
+  }
+
+  /**
+   * 逐块输出CSV
+   */
+  private async *writeCsv(table: CachedTable, headers: TableHeader[], indices: Uint32Array): AsyncGenerator<Buffer> {
+    const rows = table.data.rows;
+    yield Buffer.from(UTF8_BOM + headers.map(header => escapeCsv(header.label || header.key)).join(',') + '\r\n', 'utf8');
+
+    for (let start = 0; start < indices.length; start += ROWS_PER_CHUNK) {
+      const end = Math.min(start + ROWS_PER_CHUNK, indices.length);
+      let chunk = '';
+      for (let i = start; i < end; i++) {
+        const row = rows[indices[i]];
+        chunk += headers.map(header => escapeCsv(row[header.key])).join(',') + '\r\n';
+      }
+      exportRowsTotal.inc({ format: 'csv' }, end - start);
+      yield Buffer.from(chunk, 'utf8');
+    }
+  }
+
+  /**
+   * 逐块输出xlsx，行数超过单个工作表上限时拆分为多个工作表
+   */
+  private async *writeXlsx(table: CachedTable, headers: TableHeader[], indices: Uint32Array): AsyncGenerator<Buffer> {
+    const rows = table.data.rows;
+    const rowsPerSheet = XLSX_MAX_SHEET_ROWS - 1;
+    const sheetCount = Math.max(1, Math.ceil(indices.length / rowsPerSheet));
+    const zip = new ZipWriter();
+
+    for (const [name, content] of this.xlsxParts(sheetCount)) {
+      yield zip.addEntry(name, content);
+    }
+
+    const headerRow = xlsxRow(headers.map(header => header.label || header.key));
+    for (let sheet = 0; sheet < sheetCount; sheet++) {
+      yield zip.startEntry(`xl/worksheets/sheet${sheet + 1}.xml`);
+      yield zip.write(
+        XML_HEADER +
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">' +
+        `<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>` +
+        `<sheetData>${headerRow}`
+      );
+
+      const sheetEnd = Math.min((sheet + 1) * rowsPerSheet, indices.length);
+      for (let start = sheet * rowsPerSheet; start < sheetEnd; start += ROWS_PER_CHUNK) {
+        const end = Math.min(start + ROWS_PER_CHUNK, sheetEnd);
+        let chunk = '';
+        for (let i = start; i < end; i++) {
+          const row = rows[indices[i]];
+          chunk += xlsxRow(headers.map(header => row[header.key]));
+        }
+        exportRowsTotal.inc({ format: 'xlsx' }, end - start);
+        yield zip.write(chunk);
+      }
+
+      yield zip.write('</sheetData></worksheet>');
+      yield zip.endEntry();
+    }
+
+    yield zip.finish();
+  }
+
+  /**
+   * xlsx中除工作表数据外的固定部分
+   * @param sheetCount 工作表数量
+   * @returns [条目路径, 内容]
+   */
+  private xlsxParts(sheetCount: number): Array<[string, string]> {
+    const sheets = Array.from({ length: sheetCount }, (_, i) => i + 1);
+    return [
+      ['[Content_Types].xml', XML_HEADER +
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">' +
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>' +
+        '<Default Extension="xml" ContentType="application/xml"/>' +
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>' +
+        sheets.map(n => `<Override PartName="/xl/worksheets/sheet${n}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>`).join('') +
+        '</Types>'],
+      ['_rels/.rels', XML_HEADER +
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">' +
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>' +
+        '</Relationships>'],
+      ['xl/workbook.xml', XML_HEADER +
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>' +
+        sheets.map(n => `<sheet name="Sheet${n}" sheetId="${n}" r:id="rId${n}"/>`).join('') +
+        '</sheets></workbook>'],
+      ['xl/_rels/workbook.xml.rels', XML_HEADER +
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">' +
+        sheets.map(n => `<Relationship Id="rId${n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet${n}.xml"/>`).join('') +
+        '</Relationships>']
+    ];
+  }
+}
+
+// 单例模式
+export default new ExportService();
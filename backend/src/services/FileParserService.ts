@@ -5,6 +5,15 @@ import Papa from 'papaparse';
 import { TableData, TableHeader } from '../models';
 import logger from '../utils/logger';
 import fileUtils from '../utils/fileUtils';
+import charsetService from './CharsetService';
+import { CancelledError, throwIfCancelled } from '../utils/singleFlight';
+import {
+  parsePhaseDuration,
+  parsesTotal,
+  parseBytesTotal,
+  parseRowsTotal,
+  getRequestStats
+} from '../utils/metrics';
 
 /**
  * 文件解析服务，用于解析不同格式的表格文件
@@ -13,18 +22,23 @@ class FileParserService {
   /**
    * 解析文件
    * @param filePath 文件路径
+   * @param signal 中止信号，在开始解析前检查
+   * @param encoding CSV文件的解码编码，省略时检测
    * @returns 表格数据
    */
-  public async parseFile(filePath: string): Promise<TableData> {
+  public async parseFile(filePath: string, signal?: AbortSignal, encoding?: string): Promise<TableData> {
+    const ext = fileUtils.getFileExtension(filePath);
+    const fileType = ext.replace('.', '');
+    const startedAt = process.hrtime.bigint();
     try {
-      const ext = fileUtils.getFileExtension(filePath);
       const stats = await fileUtils.statAsync(filePath);
+      throwIfCancelled(signal);
       
       // 根据文件类型解析
       let data: TableData;
       switch (ext) {
         case '.csv':
-          data = await this.parseCSV(filePath);
+          data = await this.parseCSV(filePath, stats, encoding);
           break;
         case '.xlsx':
         case '.xls':
@@ -47,34 +61,65 @@ class FileParserService {
         fileSize: stats.size
       };
       
+      // 记录解析指标，并计入当前请求的统计
+      parsesTotal.inc({ file_type: fileType, status: 'success' });
+      parseBytesTotal.inc({ file_type: fileType }, stats.size);
+      parseRowsTotal.inc({ file_type: fileType }, data.rows.length);
+      const requestStats = getRequestStats();
+      if (requestStats) {
+        requestStats.parseMs += Number(process.hrtime.bigint() - startedAt) / 1e6;
+        requestStats.bytesRead += stats.size;
+        requestStats.rowsProduced += data.rows.length;
+      }
+      
       return data;
     } catch (err) {
+      if (err instanceof CancelledError) {
+        parsesTotal.inc({ file_type: fileType, status: 'cancelled' });
+        logger.info(`解析已取消: ${filePath}`);
+        throw err;
+      }
+      parsesTotal.inc({ file_type: fileType, status: 'error' });
       logger.error(`解析文件失败: ${filePath}`, err);
       throw err;
     }
   }
   
   /**
-   * 解析CSV文件
+   * 解析CSV文件，按检测到的编码边读取边解码边解析，不保留整个文件的文本
    * @param filePath 文件路径
+   * @param stats 文件状态，用于按版本缓存检测到的编码
+   * @param presetEncoding 调用方已确定的编码，省略时检测
    * @returns 表格数据
    */
-  private async parseCSV(filePath: string): Promise<TableData> {
+  private async parseCSV(filePath: string, stats: fs.Stats, presetEncoding?: string): Promise<TableData> {
     try {
-      const fileContent = await fileUtils.readFileAsync(filePath, 'utf8');
+      // 读取与解析在流中交替进行，read阶段只包含编码检测
+      const endRead = parsePhaseDuration.startTimer({ phase: 'read', file_type: 'csv' });
+      const encoding = presetEncoding || await charsetService.detect(filePath, stats);
+      endRead();
       
-      // 使用PapaParse解析CSV
-      const result = Papa.parse(fileContent, {
-        header: true,
-        dynamicTyping: true,
-        skipEmptyLines: true
+      // 使用PapaParse流式解析CSV
+      const endParse = parsePhaseDuration.startTimer({ phase: 'parse', file_type: 'csv' });
+      const parsedData = await new Promise<Record<string, any>[]>((resolve, reject) => {
+        const rows: Record<string, any>[] = [];
+        Papa.parse<Record<string, any>>(charsetService.createTextStream(filePath, encoding), {
+          header: true,
+          dynamicTyping: true,
+          skipEmptyLines: true,
+          chunk: results => {
+            for (const row of results.data) {
+              rows.push(row);
+            }
+          },
+          complete: () => resolve(rows),
+          error: reject
+        });
       });
-      
-      // 使用类型断言处理解析结果
-      const parsedData = result.data as Record<string, any>[];
+      endParse();
       
       // 构建表头
-      const headers = this.generateHeaders(parsedData[0] as Record<string, any>);
+      const headers = this.generateHeaders(parsedData[0] as Record<string, any>, 'csv');
       
       return {
         headers,
@@ -99,9 +144,15 @@ class FileParserService {
    */
   private async parseExcel(filePath: string): Promise<TableData> {
     try {
-      // 读取Excel文件
-      const workbook = xlsx.readFile(filePath, { 
-        type: 'file',
+      // 读取Excel文件，读取与解析分开计时
+      const fileType = fileUtils.getFileExtension(filePath).replace('.', '');
+      const endRead = parsePhaseDuration.startTimer({ phase: 'read', file_type: fileType });
+      const buffer = await fs.promises.readFile(filePath);
+      endRead();
+      
+      const endParse = parsePhaseDuration.startTimer({ phase: 'parse', file_type: fileType });
+      const workbook = xlsx.read(buffer, { 
+        type: 'buffer',
         cellDates: true, // 将日期解析为实际日期对象
         cellNF: false,   // 不保留数字格式
         cellText: false  // 不生成文本
@@ -124,6 +175,7 @@ class FileParserService {
         defval: null,         // 空单元格的默认值
         blankrows: false      // 忽略空行
       });
+      endParse();
       
       if (!Array.isArray(rawData) || rawData.length === 0) {
         throw new Error('Excel数据为空或格式不正确');
@@ -133,7 +185,7 @@ class FileParserService {
       const data = rawData as Record<string, any>[];
       
       // 构建表头
-      const headers = this.generateHeaders(data[0] as Record<string, any>);
+      const headers = this.generateHeaders(data[0] as Record<string, any>, fileType);
       
       if (headers.length === 0) {
         throw new Error('无法从Excel提取表头');
@@ -162,15 +214,20 @@ class FileParserService {
    */
   private async parseJSON(filePath: string): Promise<TableData> {
     try {
+      const endRead = parsePhaseDuration.startTimer({ phase: 'read', file_type: 'json' });
       const fileContent = await fileUtils.readFileAsync(filePath, 'utf8');
+      endRead();
+      
+      const endParse = parsePhaseDuration.startTimer({ phase: 'parse', file_type: 'json' });
       const jsonData = JSON.parse(fileContent);
+      endParse();
       
       // 确保数据是数组
       const rows = Array.isArray(jsonData) ? jsonData : [jsonData];
       const typedRows = rows as Record<string, any>[];
       
       // 构建表头
-      const headers = this.generateHeaders(typedRows[0] as Record<string, any>);
+      const headers = this.generateHeaders(typedRows[0] as Record<string, any>, 'json');
       
       return {
         headers,
@@ -191,12 +248,14 @@ class FileParserService {
   /**
    * 根据数据生成表头
    * @param row 第一行数据
+   * @param fileType 文件类型，用于指标标签
    * @returns 表头数组
    */
-  private generateHeaders(row: Record<string, any>): TableHeader[] {
+  private generateHeaders(row: Record<string, any>, fileType: string): TableHeader[] {
     if (!row) return [];
     
-    return Object.keys(row).map(key => {
+    const endHeaders = parsePhaseDuration.startTimer({ phase: 'headers', file_type: fileType });
+    const headers = Object.keys(row).map(key => {
       const value = row[key];
       let type: 'string' | 'number' | 'date' | 'boolean' = 'string';
       
@@ -227,6 +286,8 @@ class FileParserService {
         filterable: true
       };
     });
+    endHeaders();
+    return headers;
   }
 }
 
@@ -0,0 +1,275 @@
+import { SystemConfig } from '../models';
+import logger from '../utils/logger';
+import { CancelledError, throwIfCancelled } from '../utils/singleFlight';
+import configService from './ConfigService';
+
+// 默认内存配置
+const DEFAULT_BUDGET_MB = 1024;
+const DEFAULT_MAX_QUEUED_PARSES = 20;
+const DEFAULT_QUEUE_TIMEOUT = 60000;
+
+// 解析后内存占用相对文件大小的估算倍数
+// xlsx为压缩格式，展开为对象后膨胀最明显
+const EXPANSION_FACTORS: Record<string, number> = {
+  '.csv': 4,
+  '.json': 4,
+  '.xlsx': 10,
+  '.xls': 10
+};
+
+/**
+ * 内存预算不足错误，表示请求应稍后重试
+ */
+export class MemoryBudgetError extends Error {
+  constructor(message: string) {
+    super(message);
+    this.name = 'MemoryBudgetError';
+  }
+}
+
+// 排队中的解析任务
+interface PendingParse {
+  bytes: number;
+  label: string;
+  resolve: (release: () => void) => void;
+  reject: (err: Error) => void;
+  timer: NodeJS.Timeout;
+}
+
+/**
+ * 内存调度服务，按配置的预算统计进行中的解析和表格缓存的估算内存，
+ * 超出预算时先淘汰缓存，仍不足时让新的解析任务排队或拒绝
+ */
+class MemoryGovernorService {
+  private inFlightBytes = 0;
+  private activeParses = 0;
+  private cachedBytes = 0;
+  private queue: PendingParse[] = [];
+  private rejected = 0;
+  private eventListeners: { [key: string]: Array<(data: any) => void> } = {};
+
+  /**
+   * 估算解析文件所需的内存
+   * @param fileSize 文件大小（字节）
+   * @param ext 文件扩展名
+   * @returns 估算字节数
+   */
+  public estimateParseBytes(fileSize: number, ext: string): number {
+    const factor = EXPANSION_FACTORS[ext] || 4;
+    return Math.max(fileSize * factor, 64 * 1024);
+  }
+
+  /**
+   * 估算已解析表格的内存占用，按前100行抽样
+   * @param rows 数据行
+   * @param columnCount 列数
+   * @returns 估算字节数
+   */
+  public estimateTableBytes(rows: Array<Record<string, any>>, columnCount: number): number {
+    if (rows.length === 0) return 0;
+
+    const sampleSize = Math.min(rows.length, 100);
+    let sampleBytes = 0;
+    for (let i = 0; i < sampleSize; i++) {
+      const row = rows[i];
+      for (const key in row) {
+        const value = row[key];
+        // 对象属性槽位约16字节，字符串按UTF-16计算
+        sampleBytes += 16 + (typeof value === 'string' ? value.length * 2 : 8);
+      }
+    }
+    // 每行对象本身的开销
+    const perRow = sampleBytes / sampleSize + 32 + columnCount * 4;
+    return Math.round(perRow * rows.length);
+  }
+
+  /**
+   * 申请解析所需的内存，预算不足时排队等待
+   * @param bytes 估算字节数
+   * @param label 任务描述，用于日志
+   * @param signal 中止信号，排队期间中止时退出队列
+   * @returns 释放函数，解析结束后必须调用
+   */
+  public async acquire(bytes: number, label: string, signal?: AbortSignal): Promise<() => void> {
+    const { budgetBytes, maxQueuedParses, queueTimeout } = await this.getSettings();
+    throwIfCancelled(signal);
+
+    if (bytes > budgetBytes) {
+      this.rejected++;
+      throw new MemoryBudgetError(`文件过大，估算需要 ${this.toMB(bytes)}MB，超出内存预算 ${this.toMB(budgetBytes)}MB`);
+    }
+
+    if (this.queue.length === 0 && this.tryReserve(bytes, budgetBytes)) {
+      return this.createRelease(bytes);
+    }
+
+    if (this.queue.length >= maxQueuedParses) {
+      this.rejected++;
+      throw new MemoryBudgetError('服务器繁忙，等待解析的任务过多，请稍后重试');
+    }
+
+    logger.info(`内存预算不足，解析任务排队: ${label}, 估算 ${this.toMB(bytes)}MB, 队列长度 ${this.queue.length + 1}`);
+
+    return new Promise<() => void>((resolve, reject) => {
+      const onAbort = () => {
+        this.queue = this.queue.filter(item => item !== pending);
+        clearTimeout(pending.timer);
+        logger.info(`解析任务已取消，退出队列: ${label}`);
+        reject(new CancelledError());
+      };
+      const pending: PendingParse = {
+        bytes,
+        label,
+        resolve: release => {
+          signal?.removeEventListener('abort', onAbort);
+          resolve(release);
+        },
+        reject,
+        timer: setTimeout(() => {
+          this.queue = this.queue.filter(item => item !== pending);
+          signal?.removeEventListener('abort', onAbort);
+          this.rejected++;
+          reject(new MemoryBudgetError('等待内存超时，请稍后重试'));
+        }, queueTimeout)
+      };
+      this.queue.push(pending);
+      signal?.addEventListener('abort', onAbort, { once: true });
+    });
+  }
+
+  /**
+   * 记录表格缓存的内存变化
+   * @param deltaBytes 变化的字节数，释放时为负数
+   */
+  public trackCache(deltaBytes: number) {
+    this.cachedBytes = Math.max(0, this.cachedBytes + deltaBytes);
+
+    if (deltaBytes > 0) {
+      this.getSettings().then(({ budgetBytes }) => {
+        const over = this.inFlightBytes + this.cachedBytes - budgetBytes;
+        if (over > 0) {
+          this.reclaim(over);
+        }
+      });
+    } else {
+      this.drain();
+    }
+  }
+
+  /**
+   * 获取当前内存使用情况
+   */
+  public async getUsage() {
+    const { budgetBytes } = await this.getSettings();
+    const memory = process.memoryUsage();
+    return {
+      budgetBytes,
+      usedBytes: this.inFlightBytes + this.cachedBytes,
+      inFlightBytes: this.inFlightBytes,
+      cachedBytes: this.cachedBytes,
+      activeParses: this.activeParses,
+      queuedParses: this.queue.length,
+      rejectedParses: this.rejected,
+      heapUsedBytes: memory.heapUsed,
+      rssBytes: memory.rss
+    };
+  }
+
+  /**
+   * 注册事件监听器
+   * @param event 事件名称
+   * @param callback 回调函数
+   */
+  public on(event: string, callback: (data: any) => void) {
+    if (!this.eventListeners[event]) {
+      this.eventListeners[event] = [];
+    }
+    this.eventListeners[event].push(callback);
+  }
+
+  /**
+   * 触发事件
+   * @param event 事件名称
+   * @param data 事件数据
+   */
+  private emit(event: string, data: any) {
+    if (this.eventListeners[event]) {
+      this.eventListeners[event].forEach(callback => callback(data));
+    }
+  }
+
+  /**
+   * 尝试占用预算，不足时先要求缓存释放内存
+   */
+  private tryReserve(bytes: number, budgetBytes: number): boolean {
+    let over = this.inFlightBytes + this.cachedBytes + bytes - budgetBytes;
+    if (over > 0) {
+      this.reclaim(over);
+      over = this.inFlightBytes + this.cachedBytes + bytes - budgetBytes;
+    }
+    if (over > 0) return false;
+
+    this.inFlightBytes += bytes;
+    this.activeParses++;
+    return true;
+  }
+
+  /**
+   * 通知缓存淘汰冷数据，监听者需同步调用trackCache，
+   * 并从事件的bytes中扣除已释放的字节数，后面的监听者只释放剩余部分
+   */
+  private reclaim(bytes: number) {
+    logger.info(`内存压力，要求释放 ${this.toMB(bytes)}MB 缓存`);
+    this.emit('memory-pressure', { bytes });
+  }
+
+  /**
+   * 生成只能调用一次的释放函数
+   */
+  private createRelease(bytes: number): () => void {
+    let released = false;
+    return () => {
+      if (released) return;
+      released = true;
+      this.inFlightBytes = Math.max(0, this.inFlightBytes - bytes);
+      this.activeParses = Math.max(0, this.activeParses - 1);
+      this.drain();
+    };
+  }
+
+  /**
+   * 按顺序唤醒排队中的任务
+   */
+  private async drain() {
+    if (this.queue.length === 0) return;
+    const { budgetBytes } = await this.getSettings();
+
+    while (this.queue.length > 0) {
+      const next = this.queue[0];
+      if (!this.tryReserve(next.bytes, budgetBytes)) break;
+      this.queue.shift();
+      clearTimeout(next.timer);
+      next.resolve(this.createRelease(next.bytes));
+    }
+  }
+
+  /**
+   * 读取内存相关配置
+   */
+  private async getSettings() {
+    const config = await configService.getConfig();
+    const memory: NonNullable<SystemConfig['memory']> = config.memory || {};
+    return {
+      budgetBytes: (memory.budgetMB || DEFAULT_BUDGET_MB) * 1024 * 1024,
+      maxQueuedParses: memory.maxQueuedParses ?? DEFAULT_MAX_QUEUED_PARSES,
+      queueTimeout: memory.queueTimeout || DEFAULT_QUEUE_TIMEOUT
+    };
+  }
+
+  private toMB(bytes: number): string {
+    return (bytes / 1024 / 1024).toFixed(1);
+  }
+}
+
+// 单例模式
+export default new MemoryGovernorService();
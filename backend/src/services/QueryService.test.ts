@@ -0,0 +1,96 @@
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+
+jest.mock('../utils/logger', () => ({
+  __esModule: true,
+  default: { info: jest.fn(), warn: jest.fn(), error: jest.fn(), debug: jest.fn() }
+}));
+jest.mock('./FileWatcherService', () => ({
+  __esModule: true,
+  default: { on: jest.fn() }
+}));
+
+type QueryModule = typeof import('./QueryService');
+type TableCacheModule = typeof import('./TableCacheService');
+
+describe('QueryService', () => {
+  let dataDir: string;
+  let queryService: QueryModule['default'];
+  let QueryError: QueryModule['QueryError'];
+  let tableCacheService: TableCacheModule['default'];
+
+  beforeAll(async () => {
+    dataDir = fs.mkdtempSync(path.join(os.tmpdir(), 'query-'));
+    fs.writeFileSync(path.join(dataDir, 'orders.csv'), 'id,value,region\n1,10,north\n2,20,south\n3,30,north\n');
+    fs.writeFileSync(path.join(dataDir, 'targets.csv'), 'id,value,owner\n1,100,alice\n3,300,carol\n');
+
+    // 数据目录在模块加载时读取
+    process.env.DATA_DIR = dataDir;
+    const queryModule = await import('./QueryService');
+    queryService = queryModule.default;
+    QueryError = queryModule.QueryError;
+    tableCacheService = (await import('./TableCacheService')).default;
+  });
+
+  afterAll(() => {
+    tableCacheService.clear();
+    fs.rmSync(dataDir, { recursive: true, force: true });
+  });
+
+  it('单个数据源时未限定的列名直接绑定', async () => {
+    const result = await queryService.execute("SELECT id, value FROM 'orders.csv' WHERE region = 'north' ORDER BY id");
+    expect(result.rows).toEqual([{ id: 1, value: 10 }, { id: 3, value: 30 }]);
+  });
+
+  it('多个数据源都有的列未限定时报错', async () => {
+    const sql = "SELECT value FROM 'orders.csv' o JOIN 'targets.csv' t ON o.id = t.id";
+    await expect(queryService.execute(sql)).rejects.toThrow(QueryError);
+    await expect(queryService.execute(sql)).rejects.toThrow('列名不明确: value');
+  });
+
+  it('_file 在连接中同样需要限定', async () => {
+    const sql = "SELECT _file FROM 'orders.csv' o JOIN 'targets.csv' t ON o.id = t.id";
+    await expect(queryService.execute(sql)).rejects.toThrow('列名不明确: _file');
+  });
+
+  it('限定后的列读取各自数据源的值', async () => {
+    const result = await queryService.execute(
+      "SELECT o.value AS ordered, t.value AS target, owner, o._file AS file " +
+      "FROM 'orders.csv' o JOIN 'targets.csv' t ON o.id = t.id ORDER BY o.id"
+    );
+    expect(result.rows).toEqual([
+      { ordered: 10, target: 100, owner: 'alice', file: 'orders.csv' },
+      { ordered: 30, target: 300, owner: 'carol', file: 'orders.csv' }
+    ]);
+  });
+
+  it('LEFT JOIN 未匹配的行右侧为 null', async () => {
+    const result = await queryService.execute(
+      "SELECT o.id, t.owner FROM 'orders.csv' o LEFT JOIN 'targets.csv' t ON o.id = t.id WHERE o.id = 2"
+    );
+    expect(result.rows).toEqual([{ id: 2, owner: null }]);
+  });
+
+  it('查询不在缓存的表格上生成列向量', async () => {
+    const table = await tableCacheService.getTable(path.join(dataDir, 'orders.csv'));
+    const bytes = table.bytes;
+    await queryService.execute("SELECT region, SUM(value) FROM 'orders.csv' WHERE id > 1 GROUP BY region ORDER BY region");
+    expect(table.bytes).toBe(bytes);
+  });
+
+  it.each([
+    [path.join(os.tmpdir(), '*.csv'), '数据源必须是相对于数据目录的路径'],
+    ['../*.csv', '数据源不能包含 ".."'],
+    ['missing/*.csv', '没有匹配的文件']
+  ])('拒绝数据目录之外或不存在的数据源: %s', async (pattern, message) => {
+    const sql = `SELECT * FROM '${pattern.replace(/'/g, "''")}'`;
+    await expect(queryService.execute(sql)).rejects.toThrow(message);
+  });
+
+  it('请求取消后不再加载文件', async () => {
+    const controller = new AbortController();
+    controller.abort();
+    await expect(queryService.execute("SELECT * FROM '*.csv'", controller.signal)).rejects.toThrow('请求已取消');
+  });
+});
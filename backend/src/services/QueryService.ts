@@ -0,0 +1,1053 @@
+import path from 'path';
+import { QueryResult } from '../models';
+import logger from '../utils/logger';
+import fileUtils from '../utils/fileUtils';
+import {
+  parseQuery,
+  AGGREGATE_FUNCTIONS,
+  Expr,
+  OrderItem,
+  Query,
+  SelectStatement,
+  TableSource
+} from '../utils/sqlParser';
+import { throwIfCancelled } from '../utils/singleFlight';
+import tableCacheService, { CachedTable } from './TableCacheService';
+import configService from './ConfigService';
+
+// 相对路径的查询基准目录
+const dataDir = process.env.DATA_DIR || path.join(__dirname, '../../data');
+
+// 查询结果的最大行数
+const maxResultRows = parseInt(process.env.QUERY_MAX_ROWS || '100000', 10);
+
+// 一个数据源最多匹配的文件数，以及 ** 最多进入的目录层数
+const maxSourceFiles = parseInt(process.env.QUERY_MAX_FILES || '1000', 10);
+const maxGlobDepth = parseInt(process.env.QUERY_MAX_DEPTH || '16', 10);
+
+// 同时加载（解析）的文件数
+const loadConcurrency = parseInt(process.env.QUERY_LOAD_CONCURRENCY || '4', 10);
+
+// 伪列: 行所在的文件名
+const FILE_COLUMN = '_file';
+
+/**
+ * 查询错误，表示查询本身有问题（区别于服务器内部错误）
+ */
+export class QueryError extends Error {
+  constructor(message: string) {
+    super(message);
+    this.name = 'QueryError';
+  }
+}
+
+// 一条扫描出的记录，直接引用缓存表格中的行，不复制列值
+interface ScanRecord {
+  file: string;
+  values: Record<string, any>;
+}
+
+// 连接后的行，每个数据源占一个位置，LEFT JOIN未匹配时为null
+type BoundRow = Array<ScanRecord | null>;
+
+// 表达式求值上下文
+interface EvalContext {
+  row: BoundRow;
+  aggs?: any[];
+  out?: any[];
+}
+
+type Compiled = (ctx: EvalContext) => any;
+
+// 数据源运行时信息
+interface SourceInfo {
+  alias: string;
+  files: string[];
+  tables: Array<{ file: string; table: CachedTable }>;
+  columns: Set<string>;
+  nullable: boolean;
+}
+
+// 查询统计
+interface ScanStats {
+  filesMatched: number;
+  filesPruned: number;
+  filesScanned: number;
+  rowsScanned: number;
+}
+
+// 聚合函数累加器
+interface AggregateSpec {
+  name: string;
+  distinct: boolean;
+  star: boolean;
+  arg?: Compiled;
+}
+
+/**
+ * 比较两个值，null 排在最后
+ */
+export const compareValues = (a: any, b: any): number => {
+  const aNull = a === null || a === undefined;
+  const bNull = b === null || b === undefined;
+  if (aNull || bNull) return aNull === bNull ? 0 : aNull ? 1 : -1;
+
+  const x = a instanceof Date ? a.getTime() : a;
+  const y = b instanceof Date ? b.getTime() : b;
+  if (typeof x === 'number' && typeof y === 'number') return x - y;
+  if (typeof x === 'number' || typeof y === 'number') {
+    const nx = Number(x);
+    const ny = Number(y);
+    if (!isNaN(nx) && !isNaN(ny)) return nx - ny;
+  }
+  const sx = String(x);
+  const sy = String(y);
+  return sx < sy ? -1 : sx > sy ? 1 : 0;
+};
+
+/**
+ * 生成用于分组、去重和连接的键
+ */
+const valueKey = (value: any): string => {
+  if (value === null || value === undefined) return 'z';
+  if (value instanceof Date) return `d${value.getTime()}`;
+  if (typeof value === 'number') return `n${value}`;
+  if (typeof value === 'boolean') return `b${value}`;
+  const text = String(value);
+  if (text.trim() !== '' && !isNaN(Number(text))) return `n${Number(text)}`;
+  return `s${text}`;
+};
+
+const rowKey = (values: any[]): string => values.map(valueKey).join('\u0001');
+
+const toNumber = (value: any): number | null => {
+  if (value === null || value === undefined || value === '') return null;
+  if (value instanceof Date) return value.getTime();
+  const n = Number(value);
+  return isNaN(n) ? null : n;
+};
+
+const isTruthy = (value: any): boolean => value !== null && value !== undefined && value !== false && value !== 0;
+
+// LIKE模式的正则缓存
+const likeCache = new Map<string, RegExp>();
+const likeToRegExp = (pattern: string): RegExp => {
+  let regex = likeCache.get(pattern);
+  if (!regex) {
+    const source = pattern
+      .replace(/[.+*?^${}()|[\]\\]/g, '\\$&')
+      .replace(/%/g, '.*')
+      .replace(/_/g, '.');
+    regex = new RegExp(`^${source}$`, 'is');
+    if (likeCache.size > 500) likeCache.clear();
+    likeCache.set(pattern, regex);
+  }
+  return regex;
+};
+
+// 标量函数
+const SCALAR_FUNCTIONS: Record<string, (...args: any[]) => any> = {
+  LOWER: (v) => (v === null ? null : String(v).toLowerCase()),
+  UPPER: (v) => (v === null ? null : String(v).toUpperCase()),
+  LENGTH: (v) => (v === null ? null : String(v).length),
+  TRIM: (v) => (v === null ? null : String(v).trim()),
+  ABS: (v) => { const n = toNumber(v); return n === null ? null : Math.abs(n); },
+  ROUND: (v, digits) => {
+    const n = toNumber(v);
+    if (n === null) return null;
+    const factor = Math.pow(10, toNumber(digits) || 0);
+    return Math.round(n * factor) / factor;
+  },
+  COALESCE: (...values) => {
+    for (const v of values) {
+      if (v !== null && v !== undefined) return v;
+    }
+    return null;
+  },
+  SUBSTR: (v, start, length) => {
+    if (v === null) return null;
+    const s = (toNumber(start) || 1) - 1;
+    return length === undefined ? String(v).substr(s) : String(v).substr(s, toNumber(length) || 0);
+  }
+};
+
+/**
+ * 遍历表达式树
+ */
+const walkExpr = (expr: Expr | undefined, visit: (node: Expr) => void) => {
+  if (!expr) return;
+  visit(expr);
+  switch (expr.kind) {
+    case 'unary':
+      walkExpr(expr.operand, visit);
+      break;
+    case 'binary':
+      walkExpr(expr.left, visit);
+      walkExpr(expr.right, visit);
+      break;
+    case 'call':
+      expr.args.forEach(arg => walkExpr(arg, visit));
+      break;
+    case 'in':
+      walkExpr(expr.operand, visit);
+      expr.list.forEach(item => walkExpr(item, visit));
+      break;
+    case 'between':
+      walkExpr(expr.operand, visit);
+      walkExpr(expr.low, visit);
+      walkExpr(expr.high, visit);
+      break;
+    case 'like':
+      walkExpr(expr.operand, visit);
+      walkExpr(expr.pattern, visit);
+      break;
+    case 'isNull':
+      walkExpr(expr.operand, visit);
+      break;
+    default:
+      break;
+  }
+};
+
+const containsAggregate = (expr: Expr | undefined): boolean => {
+  let found = false;
+  walkExpr(expr, node => {
+    if (node.kind === 'call' && AGGREGATE_FUNCTIONS.has(node.name)) found = true;
+  });
+  return found;
+};
+
+/**
+ * 将AND连接的条件拆分为独立的合取项
+ */
+const splitConjuncts = (expr: Expr | undefined): Expr[] => {
+  if (!expr) return [];
+  if (expr.kind === 'binary' && expr.op === 'AND') {
+    return [...splitConjuncts(expr.left), ...splitConjuncts(expr.right)];
+  }
+  return [expr];
+};
+
+/**
+ * 查询服务，在表格缓存之上执行SQL子集查询，支持跨文件合并
+ */
+class QueryService {
+  /**
+   * 执行查询
+   * @param sql SQL文本
+   * @param signal 取消信号，取消后停止加载尚未解析的文件
+   * @returns 查询结果
+   */
+  public async execute(sql: string, signal?: AbortSignal): Promise<QueryResult> {
+    const startTime = Date.now();
+    let query: Query;
+    try {
+      query = parseQuery(sql);
+    } catch (err) {
+      throw new QueryError((err as Error).message);
+    }
+
+    const stats: ScanStats = { filesMatched: 0, filesPruned: 0, filesScanned: 0, rowsScanned: 0 };
+
+    // 单个SELECT时ORDER BY可以引用源列，需要在扫描前完成绑定
+    const singleSelect = query.selects.length === 1;
+
+    // 依次执行每个SELECT，结果按位置对齐合并
+    let columns: string[] = [];
+    let outputs: Array<{ out: any[]; ctx: EvalContext }> = [];
+    let orderKeys: Compiled[] = [];
+
+    for (let i = 0; i < query.selects.length; i++) {
+      const result = await this.executeSelect(query.selects[i], stats, singleSelect ? query.orderBy : [], signal);
+      if (i === 0) {
+        columns = result.columns;
+        orderKeys = result.orderKeys;
+      } else if (result.columns.length !== columns.length) {
+        throw new QueryError(`UNION 两侧的列数不一致: ${columns.length} 与 ${result.columns.length}`);
+      }
+
+      outputs = outputs.concat(result.rows);
+      // UNION（不带ALL）需要对合并结果去重
+      if (i > 0 && !query.unionAll[i - 1]) {
+        outputs = this.distinct(outputs);
+      }
+    }
+
+    // 排序
+    if (query.orderBy.length > 0) {
+      const keys = query.orderBy.map((item, index) => ({
+        fn: singleSelect ? orderKeys[index] : this.compileOrderExpr(item.expr, columns, null),
+        desc: item.desc
+      }));
+      const decorated = outputs.map(entry => ({ entry, values: keys.map(key => key.fn(entry.ctx)) }));
+      decorated.sort((a, b) => {
+        for (let k = 0; k < keys.length; k++) {
+          const diff = compareValues(a.values[k], b.values[k]);
+          if (diff !== 0) return keys[k].desc ? -diff : diff;
+        }
+        return 0;
+      });
+      outputs = decorated.map(item => item.entry);
+    }
+
+    // 分页
+    const offset = query.offset || 0;
+    let end = query.limit !== undefined ? offset + query.limit : outputs.length;
+    let truncated = false;
+    if (end - offset > maxResultRows) {
+      end = offset + maxResultRows;
+      truncated = true;
+    }
+    const page = outputs.slice(offset, end);
+
+    const rows = page.map(({ out }) => {
+      const record: Record<string, any> = {};
+      columns.forEach((column, index) => {
+        record[column] = out[index];
+      });
+      return record;
+    });
+
+    const elapsedMs = Date.now() - startTime;
+    logger.info(`查询完成: ${rows.length} 行, 扫描文件 ${stats.filesScanned} 个, 扫描行 ${stats.rowsScanned}, 耗时 ${elapsedMs}ms`);
+
+    return {
+      columns,
+      rows,
+      stats: {
+        ...stats,
+        rowsReturned: rows.length,
+        truncated,
+        elapsedMs
+      }
+    };
+  }
+
+  /**
+   * 执行单个SELECT语句
+   */
+  private async executeSelect(stmt: SelectStatement, stats: ScanStats, orderBy: OrderItem[], signal?: AbortSignal) {
+    // 1. 解析数据源
+    const sourceDefs: Array<{ source: TableSource; nullable: boolean }> = [
+      { source: stmt.from, nullable: false },
+      ...stmt.joins.map(join => ({ source: join.source, nullable: join.type === 'LEFT' }))
+    ];
+    const sources: SourceInfo[] = [];
+    for (let i = 0; i < sourceDefs.length; i++) {
+      const { source, nullable } = sourceDefs[i];
+      const alias = source.alias || `t${i}`;
+      if (sources.some(s => s.alias === alias)) {
+        throw new QueryError(`重复的数据源别名: ${alias}`);
+      }
+      const files = await this.resolveFiles(source.pattern);
+      if (files.length === 0) {
+        throw new QueryError(`没有匹配的文件: ${source.pattern}`);
+      }
+      stats.filesMatched += files.length;
+      sources.push({
+        alias,
+        files,
+        tables: [],
+        columns: new Set([FILE_COLUMN]),
+        nullable
+      });
+    }
+
+    // 2. WHERE条件拆分，仅涉及文件名的条件在加载文件前求值（文件级裁剪）
+    const conjuncts = splitConjuncts(stmt.where);
+    if (conjuncts.some(c => containsAggregate(c))) {
+      throw new QueryError('WHERE 中不能使用聚合函数，请使用 HAVING');
+    }
+
+    for (let i = 0; i < sources.length; i++) {
+      const source = sources[i];
+      if (source.nullable) continue;
+      const filePredicates = conjuncts
+        .filter(c => this.referencesOnlyFileColumn(c, source, sources.length === 1))
+        .map(c => this.compileExpr(c, (table, name) => {
+          return (ctx: EvalContext) => (name === FILE_COLUMN ? ctx.row[i]?.file ?? null : null);
+        }));
+      if (filePredicates.length === 0) continue;
+
+      const row: BoundRow = sources.map(() => null);
+      source.files = source.files.filter(file => {
+        row[i] = { file: path.basename(file), values: {} };
+        const keep = filePredicates.every(fn => isTruthy(fn({ row })));
+        if (!keep) stats.filesPruned++;
+        return keep;
+      });
+    }
+
+    // 3. 加载表格（命中缓存时不再解析），确定各数据源的列
+    await this.loadTables(sources, signal);
+    for (const source of sources) {
+      for (const { table } of source.tables) {
+        table.columnNames.forEach(name => source.columns.add(name));
+      }
+    }
+
+    // 4. 列绑定，未限定的列名只能属于一个数据源
+    const resolveColumn = (table: string | undefined, name: string): number => {
+      if (table !== undefined) {
+        const index = sources.findIndex(s => s.alias === table);
+        if (index === -1) throw new QueryError(`未知的数据源别名: ${table}`);
+        return index;
+      }
+      const matches = sources.filter(s => s.columns.has(name));
+      if (matches.length === 0) throw new QueryError(`列不存在: ${name}`);
+      if (matches.length > 1) {
+        const aliases = matches.map(s => s.alias).join(', ');
+        throw new QueryError(`列名不明确: ${name} 同时存在于 ${aliases}，请使用 别名.${name}`);
+      }
+      return sources.indexOf(matches[0]);
+    };
+
+    const columnResolver = (table: string | undefined, name: string): Compiled => {
+      const index = resolveColumn(table, name);
+      return (ctx: EvalContext) => {
+        const record = ctx.row[index];
+        if (!record) return null;
+        if (name === FILE_COLUMN) return record.file;
+        const value = record.values[name];
+        return value === undefined ? null : value;
+      };
+    };
+
+    // 展开 * 为输出列
+    const columns: string[] = [];
+    const projections: Compiled[] = [];
+    const projectionExprs: Array<Expr | null> = [];
+    for (const item of stmt.items) {
+      if (item.expr.kind === 'star') {
+        const starTable = item.expr.table;
+        const targets = starTable === undefined
+          ? sources
+          : sources.filter(s => s.alias === starTable);
+        if (targets.length === 0) throw new QueryError(`未知的数据源别名: ${starTable}`);
+        for (const target of targets) {
+          for (const name of target.columns) {
+            if (name === FILE_COLUMN) continue;
+            const duplicate = sources.some(s => s !== target && s.columns.has(name));
+            columns.push(duplicate && sources.length > 1 ? `${target.alias}.${name}` : name);
+            projections.push(columnResolver(target.alias, name));
+            projectionExprs.push(null);
+          }
+        }
+        continue;
+      }
+      columns.push(item.alias || this.exprName(item.expr));
+      projectionExprs.push(item.expr);
+      projections.push(() => null);
+    }
+
+    // 5. 判断是否为聚合查询
+    const aggregates: AggregateSpec[] = [];
+    const isAggregate = stmt.groupBy.length > 0
+      || stmt.having !== undefined
+      || stmt.items.some(item => containsAggregate(item.expr))
+      || orderBy.some(item => containsAggregate(item.expr));
+
+    const compileWithAggregates = (expr: Expr): Compiled => this.compileExpr(expr, columnResolver, (call) => {
+      if (!isAggregate) throw new QueryError(`聚合函数 ${call.name} 只能用于聚合查询`);
+      const slot = aggregates.length;
+      aggregates.push({
+        name: call.name,
+        distinct: call.distinct,
+        star: call.star,
+        arg: call.args[0] ? this.compileExpr(call.args[0], columnResolver) : undefined
+      });
+      return (ctx: EvalContext) => (ctx.aggs ? ctx.aggs[slot] : null);
+    });
+
+    projectionExprs.forEach((expr, index) => {
+      if (expr) projections[index] = compileWithAggregates(expr);
+    });
+    const groupKeys = stmt.groupBy.map(expr => this.compileExpr(expr, columnResolver));
+    const having = stmt.having ? compileWithAggregates(stmt.having) : null;
+    const orderKeys = orderBy.map(item => this.compileOrderExpr(item.expr, columns, compileWithAggregates));
+
+    // 6. 谓词下推：只涉及单个数据源的条件在扫描该数据源时求值
+    const pushed: Compiled[][] = sources.map(() => []);
+    const residual: Compiled[] = [];
+    for (const conjunct of conjuncts) {
+      const referenced = this.referencedSources(conjunct, resolveColumn);
+      const compiled = this.compileExpr(conjunct, columnResolver);
+      if (referenced.size === 1) {
+        const index = referenced.values().next().value as number;
+        if (!sources[index].nullable) {
+          pushed[index].push(compiled);
+          continue;
+        }
+      }
+      residual.push(compiled);
+    }
+
+    // 连接条件
+    const joinPlans = stmt.joins.map((join, j) => this.planJoin(join.on, j + 1, resolveColumn, columnResolver));
+
+    // 7. 扫描各数据源，直接读取缓存表格中的行
+    const scanned = sources.map((source, index) => this.scanSource(source, index, sources.length, pushed[index], stats));
+
+    // 8. 连接
+    let rows: BoundRow[] = scanned[0].map(record => {
+      const row: BoundRow = sources.map(() => null);
+      row[0] = record;
+      return row;
+    });
+    for (let j = 0; j < joinPlans.length; j++) {
+      rows = this.hashJoin(rows, scanned[j + 1], j + 1, joinPlans[j], sources[j + 1].nullable);
+    }
+
+    // 9. 剩余条件
+    if (residual.length > 0) {
+      rows = rows.filter(row => residual.every(fn => isTruthy(fn({ row }))));
+    }
+
+    // 10. 分组聚合与投影
+    let outputs: Array<{ out: any[]; ctx: EvalContext }>;
+    if (isAggregate) {
+      const groups = new Map<string, { row: BoundRow; states: any[] }>();
+      for (const row of rows) {
+        const ctx = { row };
+        const key = rowKey(groupKeys.map(fn => fn(ctx)));
+        let group = groups.get(key);
+        if (!group) {
+          group = { row, states: aggregates.map(spec => this.initAggregate(spec)) };
+          groups.set(key, group);
+        }
+        for (let a = 0; a < aggregates.length; a++) {
+          this.accumulate(aggregates[a], group.states[a], ctx);
+        }
+      }
+      // 没有GROUP BY的聚合查询在无数据时也返回一行
+      if (groups.size === 0 && stmt.groupBy.length === 0) {
+        groups.set('', { row: sources.map(() => null), states: aggregates.map(spec => this.initAggregate(spec)) });
+      }
+
+      outputs = [];
+      for (const group of groups.values()) {
+        const ctx: EvalContext = {
+          row: group.row,
+          aggs: group.states.map((state, a) => this.finishAggregate(aggregates[a], state))
+        };
+        if (having && !isTruthy(having(ctx))) continue;
+        ctx.out = projections.map(fn => fn(ctx));
+        outputs.push({ out: ctx.out, ctx });
+      }
+    } else {
+      outputs = rows.map(row => {
+        const ctx: EvalContext = { row };
+        ctx.out = projections.map(fn => fn(ctx));
+        return { out: ctx.out, ctx };
+      });
+    }
+
+    if (stmt.distinct) {
+      outputs = this.distinct(outputs);
+    }
+
+    return { columns, rows: outputs, orderKeys };
+  }
+
+  /**
+   * 解析数据源模式对应的文件列表，只能匹配数据目录下的文件
+   * @param pattern 文件路径或通配符，相对于数据目录
+   */
+  private async resolveFiles(pattern: string): Promise<string[]> {
+    const normalized = pattern.replace(/\\/g, '/');
+    if (path.isAbsolute(normalized) || path.win32.isAbsolute(normalized)) {
+      throw new QueryError(`数据源必须是相对于数据目录的路径: ${pattern}`);
+    }
+    if (normalized.split('/').includes('..')) {
+      throw new QueryError(`数据源不能包含 "..": ${pattern}`);
+    }
+
+    const root = path.resolve(dataDir);
+    const config = await configService.getConfig();
+    const supportedTypes = config.fileWatching.fileTypes;
+
+    // 多找一个文件，用于判断是否超出上限
+    const files = await fileUtils.findFiles(path.join(root, normalized), {
+      maxDepth: maxGlobDepth,
+      maxFiles: maxSourceFiles + 1
+    });
+    if (files.length > maxSourceFiles) {
+      throw new QueryError(`匹配的文件超过 ${maxSourceFiles} 个: ${pattern}`);
+    }
+    return files.filter(file => {
+      const resolved = path.resolve(file);
+      return resolved.startsWith(root + path.sep) && fileUtils.isSupportedFileType(file, supportedTypes);
+    });
+  }
+
+  /**
+   * 加载各数据源的表格，最多同时加载loadConcurrency个文件
+   * 任一文件加载失败或请求取消时，不再开始新的加载，并中止等待中的解析
+   */
+  private async loadTables(sources: SourceInfo[], signal?: AbortSignal) {
+    const tasks = sources.flatMap(source => source.files.map(file => ({ source, file })));
+    const loaded: CachedTable[] = new Array(tasks.length);
+    const controller = new AbortController();
+    const onAbort = () => controller.abort();
+    if (signal) {
+      if (signal.aborted) controller.abort();
+      signal.addEventListener('abort', onAbort, { once: true });
+    }
+
+    let next = 0;
+    const worker = async () => {
+      while (next < tasks.length) {
+        throwIfCancelled(controller.signal);
+        const index = next++;
+        loaded[index] = await tableCacheService.getTable(tasks[index].file, controller.signal);
+      }
+    };
+
+    try {
+      const workers = Array.from({ length: Math.max(1, Math.min(loadConcurrency, tasks.length)) }, () =>
+        worker().catch(err => {
+          controller.abort();
+          throw err;
+        })
+      );
+      await Promise.all(workers);
+    } finally {
+      signal?.removeEventListener('abort', onAbort);
+    }
+
+    // 按文件顺序放回，结果与加载完成的先后无关
+    tasks.forEach(({ source, file }, index) => {
+      source.tables.push({ file, table: loaded[index] });
+    });
+  }
+
+  /**
+   * 扫描数据源，对每条记录应用下推的条件
+   * 条件在同一条探测记录上求值，只为满足条件的行生成记录，行数据与缓存共用
+   */
+  private scanSource(source: SourceInfo, index: number, sourceCount: number, predicates: Compiled[], stats: ScanStats): ScanRecord[] {
+    const records: ScanRecord[] = [];
+    const row: BoundRow = new Array(sourceCount).fill(null);
+    const ctx: EvalContext = { row };
+
+    for (const { file, table } of source.tables) {
+      stats.filesScanned++;
+      const fileName = path.basename(file);
+      const rows = table.data.rows;
+      stats.rowsScanned += rows.length;
+
+      const probe: ScanRecord = { file: fileName, values: {} };
+      row[index] = probe;
+      for (let r = 0; r < rows.length; r++) {
+        probe.values = rows[r];
+        let keep = true;
+        for (let p = 0; p < predicates.length; p++) {
+          if (!isTruthy(predicates[p](ctx))) {
+            keep = false;
+            break;
+          }
+        }
+        if (keep) records.push({ file: fileName, values: rows[r] });
+      }
+    }
+    return records;
+  }
+
+  /**
+   * 生成连接计划，提取等值连接键
+   */
+  private planJoin(
+    on: Expr,
+    rightIndex: number,
+    resolveColumn: (table: string | undefined, name: string) => number,
+    columnResolver: (table: string | undefined, name: string) => Compiled
+  ) {
+    const leftKeys: Compiled[] = [];
+    const rightKeys: Compiled[] = [];
+    const residual: Compiled[] = [];
+
+    for (const conjunct of splitConjuncts(on)) {
+      if (conjunct.kind === 'binary' && conjunct.op === '=') {
+        const leftRefs = this.referencedSources(conjunct.left, resolveColumn);
+        const rightRefs = this.referencedSources(conjunct.right, resolveColumn);
+        const onlyRight = (refs: Set<number>) => refs.size === 1 && refs.has(rightIndex);
+        const onlyLeft = (refs: Set<number>) => refs.size > 0 && Array.from(refs).every(i => i < rightIndex);
+        if (onlyLeft(leftRefs) && onlyRight(rightRefs)) {
+          leftKeys.push(this.compileExpr(conjunct.left, columnResolver));
+          rightKeys.push(this.compileExpr(conjunct.right, columnResolver));
+          continue;
+        }
+        if (onlyRight(leftRefs) && onlyLeft(rightRefs)) {
+          leftKeys.push(this.compileExpr(conjunct.right, columnResolver));
+          rightKeys.push(this.compileExpr(conjunct.left, columnResolver));
+          continue;
+        }
+      }
+      residual.push(this.compileExpr(conjunct, columnResolver));
+    }
+
+    return { leftKeys, rightKeys, residual };
+  }
+
+  /**
+   * 哈希连接，无等值键时退化为嵌套循环
+   */
+  private hashJoin(
+    leftRows: BoundRow[],
+    rightRecords: ScanRecord[],
+    rightIndex: number,
+    plan: { leftKeys: Compiled[]; rightKeys: Compiled[]; residual: Compiled[] },
+    isLeftJoin: boolean
+  ): BoundRow[] {
+    const probeRow: BoundRow = [];
+    const buckets = new Map<string, ScanRecord[]>();
+    const useHash = plan.leftKeys.length > 0;
+
+    if (useHash) {
+      for (const record of rightRecords) {
+        probeRow[rightIndex] = record;
+        const values = plan.rightKeys.map(fn => fn({ row: probeRow }));
+        // NULL 不参与等值匹配
+        if (values.some(v => v === null || v === undefined)) continue;
+        const key = rowKey(values);
+        const bucket = buckets.get(key);
+        if (bucket) {
+          bucket.push(record);
+        } else {
+          buckets.set(key, [record]);
+        }
+      }
+    }
+
+    const result: BoundRow[] = [];
+    for (const left of leftRows) {
+      let candidates: ScanRecord[] = rightRecords;
+      if (useHash) {
+        const values = plan.leftKeys.map(fn => fn({ row: left }));
+        candidates = values.some(v => v === null || v === undefined)
+          ? []
+          : buckets.get(rowKey(values)) || [];
+      }
+
+      let matched = false;
+      for (const record of candidates) {
+        const row = left.slice();
+        row[rightIndex] = record;
+        if (plan.residual.every(fn => isTruthy(fn({ row })))) {
+          result.push(row);
+          matched = true;
+        }
+      }
+      if (!matched && isLeftJoin) {
+        const row = left.slice();
+        row[rightIndex] = null;
+        result.push(row);
+      }
+    }
+    return result;
+  }
+
+  /**
+   * 编译ORDER BY表达式，优先匹配输出列名或列序号
+   */
+  private compileOrderExpr(expr: Expr, columns: string[], compileSource: ((expr: Expr) => Compiled) | null): Compiled {
+    if (expr.kind === 'literal' && typeof expr.value === 'number') {
+      const index = expr.value - 1;
+      if (!Number.isInteger(index) || index < 0 || index >= columns.length) {
+        throw new QueryError(`ORDER BY 列序号超出范围: ${expr.value}`);
+      }
+      return (ctx) => ctx.out![index];
+    }
+    if (expr.kind === 'column') {
+      const name = expr.table ? `${expr.table}.${expr.name}` : expr.name;
+      const index = columns.indexOf(name);
+      if (index !== -1) return (ctx) => ctx.out![index];
+    }
+    if (!compileSource) {
+      throw new QueryError('UNION 查询的 ORDER BY 只能使用输出列名或列序号');
+    }
+    return compileSource(expr);
+  }
+
+  /**
+   * 对输出结果去重
+   */
+  private distinct<T extends { out: any[] }>(outputs: T[]): T[] {
+    const seen = new Set<string>();
+    return outputs.filter(entry => {
+      const key = rowKey(entry.out);
+      if (seen.has(key)) return false;
+      seen.add(key);
+      return true;
+    });
+  }
+
+  /**
+   * 判断条件是否只引用文件名伪列
+   */
+  private referencesOnlyFileColumn(expr: Expr, source: SourceInfo, singleSource: boolean): boolean {
+    let onlyFile = true;
+    let hasFile = false;
+    walkExpr(expr, node => {
+      if (node.kind === 'column') {
+        const matchesSource = node.table === source.alias || (node.table === undefined && singleSource);
+        if (node.name === FILE_COLUMN && matchesSource) {
+          hasFile = true;
+        } else {
+          onlyFile = false;
+        }
+      } else if (node.kind === 'call' && AGGREGATE_FUNCTIONS.has(node.name)) {
+        onlyFile = false;
+      }
+    });
+    return hasFile && onlyFile;
+  }
+
+  /**
+   * 收集表达式引用的数据源下标
+   */
+  private referencedSources(expr: Expr, resolveColumn: (table: string | undefined, name: string) => number): Set<number> {
+    const referenced = new Set<number>();
+    walkExpr(expr, node => {
+      if (node.kind === 'column') referenced.add(resolveColumn(node.table, node.name));
+    });
+    return referenced;
+  }
+
+  /**
+   * 表达式的默认输出列名
+   */
+  private exprName(expr: Expr): string {
+    switch (expr.kind) {
+      case 'column':
+        return expr.name;
+      case 'call':
+        if (expr.star) return `${expr.name}(*)`;
+        return `${expr.name}(${expr.distinct ? 'DISTINCT ' : ''}${expr.args.map(arg => this.exprName(arg)).join(', ')})`;
+      case 'literal':
+        return String(expr.value);
+      case 'binary':
+        return `${this.exprName(expr.left)} ${expr.op} ${this.exprName(expr.right)}`;
+      case 'unary':
+        return `${expr.op === 'NOT' ? 'NOT ' : '-'}${this.exprName(expr.operand)}`;
+      default:
+        return 'expr';
+    }
+  }
+
+  /**
+   * 将表达式编译为求值函数
+   * @param expr 表达式
+   * @param resolveColumn 列引用的编译方式
+   * @param compileAggregate 聚合函数的编译方式，未提供时不允许使用聚合函数
+   */
+  private compileExpr(
+    expr: Expr,
+    resolveColumn: (table: string | undefined, name: string) => Compiled,
+    compileAggregate?: (call: Extract<Expr, { kind: 'call' }>) => Compiled
+  ): Compiled {
+    const compile = (node: Expr): Compiled => this.compileExpr(node, resolveColumn, compileAggregate);
+
+    switch (expr.kind) {
+      case 'literal': {
+        const value = expr.value;
+        return () => value;
+      }
+      case 'column':
+        return resolveColumn(expr.table, expr.name);
+      case 'star':
+        throw new QueryError('* 只能用于 SELECT 列表或 COUNT(*)');
+      case 'unary': {
+        const operand = compile(expr.operand);
+        if (expr.op === 'NOT') {
+          return (ctx) => {
+            const v = operand(ctx);
+            return v === null || v === undefined ? null : !isTruthy(v);
+          };
+        }
+        return (ctx) => {
+          const n = toNumber(operand(ctx));
+          return n === null ? null : -n;
+        };
+      }
+      case 'binary':
+        return this.compileBinary(expr.op, compile(expr.left), compile(expr.right));
+      case 'call': {
+        if (AGGREGATE_FUNCTIONS.has(expr.name)) {
+          if (!compileAggregate) throw new QueryError(`此处不能使用聚合函数 ${expr.name}`);
+          return compileAggregate(expr);
+        }
+        const fn = SCALAR_FUNCTIONS[expr.name];
+        if (!fn) throw new QueryError(`不支持的函数: ${expr.name}`);
+        const args = expr.args.map(compile);
+        return (ctx) => fn(...args.map(arg => {
+          const v = arg(ctx);
+          return v === undefined ? null : v;
+        }));
+      }
+      case 'in': {
+        const operand = compile(expr.operand);
+        const list = expr.list.map(compile);
+        const negated = expr.negated;
+        return (ctx) => {
+          const v = operand(ctx);
+          if (v === null || v === undefined) return null;
+          const found = list.some(item => compareValues(v, item(ctx)) === 0);
+          return negated ? !found : found;
+        };
+      }
+      case 'between': {
+        const operand = compile(expr.operand);
+        const low = compile(expr.low);
+        const high = compile(expr.high);
+        const negated = expr.negated;
+        return (ctx) => {
+          const v = operand(ctx);
+          if (v === null || v === undefined) return null;
+          const inside = compareValues(v, low(ctx)) >= 0 && compareValues(v, high(ctx)) <= 0;
+          return negated ? !inside : inside;
+        };
+      }
+      case 'like': {
+        const operand = compile(expr.operand);
+        const pattern = compile(expr.pattern);
+        const negated = expr.negated;
+        return (ctx) => {
+          const v = operand(ctx);
+          const p = pattern(ctx);
+          if (v === null || v === undefined || p === null || p === undefined) return null;
+          const matched = likeToRegExp(String(p)).test(String(v));
+          return negated ? !matched : matched;
+        };
+      }
+      case 'isNull': {
+        const operand = compile(expr.operand);
+        const negated = expr.negated;
+        return (ctx) => {
+          const v = operand(ctx);
+          const isNull = v === null || v === undefined || v === '';
+          return negated ? !isNull : isNull;
+        };
+      }
+      default:
+        throw new QueryError('不支持的表达式');
+    }
+  }
+
+  /**
+   * 编译二元运算
+   */
+  private compileBinary(op: string, left: Compiled, right: Compiled): Compiled {
+    switch (op) {
+      case 'AND':
+        return (ctx) => {
+          const l = left(ctx);
+          if (l !== null && l !== undefined && !isTruthy(l)) return false;
+          const r = right(ctx);
+          if (r !== null && r !== undefined && !isTruthy(r)) return false;
+          return l === null || l === undefined || r === null || r === undefined ? null : true;
+        };
+      case 'OR':
+        return (ctx) => {
+          const l = left(ctx);
+          if (isTruthy(l)) return true;
+          const r = right(ctx);
+          if (isTruthy(r)) return true;
+          return l === null || l === undefined || r === null || r === undefined ? null : false;
+        };
+      case '||':
+        return (ctx) => {
+          const l = left(ctx);
+          const r = right(ctx);
+          return l === null || l === undefined || r === null || r === undefined ? null : `${l}${r}`;
+        };
+      case '+':
+      case '-':
+      case '*':
+      case '/':
+      case '%':
+        return (ctx) => {
+          const l = toNumber(left(ctx));
+          const r = toNumber(right(ctx));
+          if (l === null || r === null) return null;
+          switch (op) {
+            case '+': return l + r;
+            case '-': return l - r;
+            case '*': return l * r;
+            case '/': return r === 0 ? null : l / r;
+            default: return r === 0 ? null : l % r;
+          }
+        };
+      default:
+        // 比较运算
+        return (ctx) => {
+          const l = left(ctx);
+          const r = right(ctx);
+          if (l === null || l === undefined || r === null || r === undefined) return null;
+          const diff = compareValues(l, r);
+          switch (op) {
+            case '=': return diff === 0;
+            case '<>': return diff !== 0;
+            case '<': return diff < 0;
+            case '<=': return diff <= 0;
+            case '>': return diff > 0;
+            case '>=': return diff >= 0;
+            default: throw new QueryError(`不支持的运算符: ${op}`);
+          }
+        };
+    }
+  }
+
+  // 聚合函数的状态管理
+  private initAggregate(spec: AggregateSpec): any {
+    return { count: 0, sum: 0, value: null as any, seen: spec.distinct ? new Set<string>() : null };
+  }
+
+  private accumulate(spec: AggregateSpec, state: any, ctx: EvalContext) {
+    if (spec.star) {
+      state.count++;
+      return;
+    }
+    const value = spec.arg ? spec.arg(ctx) : null;
+    if (value === null || value === undefined || value === '') return;
+    if (state.seen) {
+      const key = valueKey(value);
+      if (state.seen.has(key)) return;
+      state.seen.add(key);
+    }
+
+    state.count++;
+    switch (spec.name) {
+      case 'SUM':
+      case 'AVG': {
+        const n = toNumber(value);
+        if (n !== null) state.sum += n;
+        break;
+      }
+      case 'MIN':
+        if (state.value === null || compareValues(value, state.value) < 0) state.value = value;
+        break;
+      case 'MAX':
+        if (state.value === null || compareValues(value, state.value) > 0) state.value = value;
+        break;
+      default:
+        break;
+    }
+  }
+
+  private finishAggregate(spec: AggregateSpec, state: any): any {
+    switch (spec.name) {
+      case 'COUNT':
+        return state.count;
+      case 'SUM':
+        return state.count === 0 ? null : state.sum;
+      case 'AVG':
+        return state.count === 0 ? null : state.sum / state.count;
+      default:
+        return state.value;
+    }
+  }
+}
+
+// 单例模式
+export default new QueryService();
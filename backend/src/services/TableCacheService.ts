@@ -0,0 +1,374 @@
+import fs from 'fs';
+import path from 'path';
+import { TableData } from '../models';
+import logger from '../utils/logger';
+import fileUtils from '../utils/fileUtils';
+import fileParserService from './FileParserService';
+import fileWatcherService from './FileWatcherService';
+import memoryGovernorService from './MemoryGovernorService';
+import contentHashService from './ContentHashService';
+import charsetService from './CharsetService';
+import { tableCacheRequests, getRequestStats } from '../utils/metrics';
+import { SingleFlight } from '../utils/singleFlight';
+
+// 缓存的最大表格数量
+const maxEntries = parseInt(process.env.TABLE_CACHE_MAX_ENTRIES || '20', 10);
+
+/**
+ * 已缓存的解析结果
+ * 行数据保持解析时的格式，列向量在首次被查询引用时才按列生成并缓存
+ */
+export class CachedTable {
+  public readonly data: TableData;
+  public readonly version: string;
+  // 解码文件所用的编码，不需要解码的格式为空字符串
+  public readonly encoding: string;
+  public lastAccess = Date.now();
+  // 估算的内存占用，包括已生成的列向量和缓存的视图
+  public bytes: number;
+  // 是否仍在缓存中，被淘汰后不再计入内存统计
+  public cached = true;
+  private columns = new Map<string, any[]>();
+  // 正在使用表格的长任务数，大于0时不被淘汰
+  private pins = 0;
+
+  constructor(data: TableData, version: string, bytes: number, encoding = '') {
+    this.data = data;
+    this.version = version;
+    this.bytes = bytes;
+    this.encoding = encoding;
+  }
+
+  /**
+   * 表格行数
+   */
+  public get rowCount(): number {
+    return this.data.rows.length;
+  }
+
+  /**
+   * 固定表格，直到返回的函数被调用前不会因容量或内存压力被淘汰
+   * 用于导出等持续读取表格的长任务
+   * @returns 解除固定的函数，重复调用无效
+   */
+  public pin(): () => void {
+    this.pins++;
+    let released = false;
+    return () => {
+      if (released) return;
+      released = true;
+      this.pins--;
+    };
+  }
+
+  /**
+   * 是否被固定
+   */
+  public get pinned(): boolean {
+    return this.pins > 0;
+  }
+
+  /**
+   * 以指定文件的元数据返回表格数据
+   * 表格按内容缓存，可能由内容相同的其他文件解析得到，文件名、路径、大小和修改时间以请求的文件为准
+   * @param filePath 请求的文件路径
+   * @param stats 请求的文件状态
+   * @returns 表格数据，行和表头与缓存共用
+   */
+  public withMetadata(filePath: string, stats: fs.Stats): TableData {
+    return {
+      ...this.data,
+      metadata: {
+        ...this.data.metadata,
+        fileName: path.basename(filePath),
+        lastModified: stats.mtime,
+        filePath,
+        fileSize: stats.size
+      }
+    };
+  }
+
+  /**
+   * 表头中的列名
+   */
+  public get columnNames(): string[] {
+    return this.data.headers.map(header => header.key);
+  }
+
+  /**
+   * 获取单列数据，首次访问时生成列向量
+   * @param key 列名
+   * @returns 列向量，不存在的列返回null
+   */
+  public getColumn(key: string): any[] | null {
+    let column = this.columns.get(key);
+    if (column) return column;
+
+    if (!this.data.headers.some(header => header.key === key)) {
+      return null;
+    }
+
+    const rows = this.data.rows;
+    column = new Array(rows.length);
+    for (let i = 0; i < rows.length; i++) {
+      const value = rows[i][key];
+      column[i] = value === undefined ? null : value;
+    }
+    this.columns.set(key, column);
+
+    // 列向量每个元素约占8字节
+    this.addBytes(rows.length * 8);
+    return column;
+  }
+
+  /**
+   * 调整表格的内存占用，用于随表格缓存的派生数据（列向量、视图）
+   * 表格仍在缓存中时同步计入内存调度服务
+   * @param bytes 增加的字节数，释放时为负数
+   */
+  public addBytes(bytes: number) {
+    this.bytes += bytes;
+    if (this.cached) {
+      memoryGovernorService.trackCache(bytes);
+    }
+  }
+}
+
+/**
+ * 表格缓存服务，按文件内容缓存解析后的表格
+ * 内容相同的副本、重命名后的文件共用同一份解析结果，只修改了时间而内容不变的文件不会重新解析
+ * 解析前向内存调度服务申请预算，内存紧张时按LRU顺序淘汰
+ */
+class TableCacheService {
+  // 缓存键为扩展名和内容哈希，扩展名决定解析方式
+  private entries = new Map<string, CachedTable>();
+  // 同一内容的并发解析只执行一次
+  private parses = new SingleFlight<CachedTable>('parse');
+  private hits = 0;
+  private misses = 0;
+
+  constructor() {
+    // 文件修改时只忘记其内容标识，下次访问重新计算哈希，内容未变时仍命中原来的表格
+    // 内容已变的旧表格不再被访问，按LRU顺序淘汰
+    fileWatcherService.on('file-change', (data) => {
+      if (data.type === 'change') {
+        contentHashService.forget(data.path);
+      } else if (data.type === 'unlink') {
+        this.invalidate(data.path);
+      }
+    });
+
+    // 内存压力时淘汰最久未使用的表格，扣除已释放的字节数
+    memoryGovernorService.on('memory-pressure', (request: { bytes: number }) => {
+      request.bytes -= this.evictBytes(request.bytes);
+    });
+  }
+
+  /**
+   * 获取文件的解析结果，缓存未命中时解析文件
+   * 多个请求同时未命中同一内容时共享一次解析
+   * @param filePath 文件路径
+   * @param signal 取消信号，取消后不再等待结果，所有等待方都取消时中止解析
+   * @returns 缓存的表格
+   */
+  public async getTable(filePath: string, signal?: AbortSignal): Promise<CachedTable> {
+    const stats = await fileUtils.statAsync(filePath);
+    const version = await contentHashService.getHash(filePath, stats, signal);
+    const encoding = await this.getEncoding(filePath, stats);
+    const key = this.getKey(filePath, version, encoding);
+
+    const cached = this.entries.get(key);
+    const requestStats = getRequestStats();
+    if (cached) {
+      this.hits++;
+      tableCacheRequests.inc({ result: 'hit' });
+      if (requestStats) requestStats.cacheHits++;
+      cached.lastAccess = Date.now();
+      // 移到末尾，维持LRU顺序
+      this.entries.delete(key);
+      this.entries.set(key, cached);
+      return cached;
+    }
+
+    this.misses++;
+    tableCacheRequests.inc({ result: 'miss' });
+    if (requestStats) requestStats.cacheMisses++;
+
+    return this.parses.do(
+      key,
+      parseSignal => this.load(filePath, key, version, encoding, stats.size, parseSignal),
+      signal
+    );
+  }
+
+  /**
+   * 获取解析文件时使用的编码，同一内容按不同编码解码得到不同的表格
+   * 检测结果随配置的文件编码变化，修改配置后按新编码重新解析
+   * @param filePath 文件路径
+   * @param stats 已读取的文件状态
+   * @returns TextDecoder标签，不需要解码的格式返回空字符串
+   */
+  public async getEncoding(filePath: string, stats: fs.Stats): Promise<string> {
+    if (fileUtils.getFileExtension(filePath) !== '.csv') return '';
+    return charsetService.detect(filePath, stats);
+  }
+
+  /**
+   * 解析文件并放入缓存
+   * @param filePath 文件路径
+   * @param key 缓存键
+   * @param version 内容哈希
+   * @param encoding 解码编码，见getEncoding
+   * @param fileSize 文件大小
+   * @param signal 中止信号
+   * @returns 缓存的表格
+   */
+  private async load(
+    filePath: string,
+    key: string,
+    version: string,
+    encoding: string,
+    fileSize: number,
+    signal: AbortSignal
+  ): Promise<CachedTable> {
+    // 申请解析所需的内存，预算不足时在此排队
+    const estimate = memoryGovernorService.estimateParseBytes(fileSize, fileUtils.getFileExtension(filePath));
+    const release = await memoryGovernorService.acquire(estimate, filePath, signal);
+    let table: CachedTable;
+    try {
+      const data = await fileParserService.parseFile(filePath, signal, encoding || undefined);
+      const bytes = memoryGovernorService.estimateTableBytes(data.rows, data.headers.length);
+      table = new CachedTable(data, version, bytes, encoding);
+    } finally {
+      release();
+    }
+
+    // 已有同一内容的表格时先移除并归还其内存统计
+    this.remove(key);
+    this.entries.set(key, table);
+    memoryGovernorService.trackCache(table.bytes);
+    this.evict();
+
+    logger.info(`表格已缓存: ${filePath}, 行数: ${table.rowCount}`);
+    return table;
+  }
+
+  /**
+   * 清除指定文件的缓存，没有其他文件是同一内容时才移除表格
+   * @param filePath 文件路径
+   */
+  public invalidate(filePath: string) {
+    charsetService.forget(filePath);
+    const hash = contentHashService.forget(filePath);
+    if (!hash || contentHashService.isReferenced(hash)) return;
+    // 同一内容可能按不同编码解析过，一并移除
+    const prefix = this.getKey(filePath, hash, '');
+    let removed = false;
+    for (const key of Array.from(this.entries.keys())) {
+      if (key === prefix || key.startsWith(`${prefix}:`)) {
+        this.remove(key);
+        removed = true;
+      }
+    }
+    if (removed) {
+      logger.info(`表格缓存已失效: ${filePath}`);
+    }
+  }
+
+  /**
+   * 清空缓存
+   */
+  public clear() {
+    Array.from(this.entries.keys()).forEach(key => this.remove(key));
+  }
+
+  /**
+   * 获取缓存统计信息
+   */
+  public getStats() {
+    let bytes = 0;
+    this.entries.forEach(table => {
+      bytes += table.bytes;
+    });
+    return {
+      entries: this.entries.size,
+      maxEntries,
+      bytes,
+      hits: this.hits,
+      misses: this.misses,
+      hashedFiles: contentHashService.size
+    };
+  }
+
+  /**
+   * 超出容量时淘汰最久未使用的表格，被固定的表格不占用容量，也不被淘汰
+   */
+  private evict() {
+    let pinned = 0;
+    this.entries.forEach(table => {
+      if (table.pinned) pinned++;
+    });
+    while (this.entries.size - pinned > maxEntries) {
+      const oldestKey = this.findEvictable();
+      if (!oldestKey) break;
+      this.remove(oldestKey);
+      logger.info(`表格缓存已淘汰: ${oldestKey}`);
+    }
+  }
+
+  /**
+   * 按LRU顺序淘汰表格，直到释放指定的内存，跳过被固定的表格
+   * @param bytes 需要释放的字节数
+   * @returns 实际释放的字节数
+   */
+  private evictBytes(bytes: number): number {
+    let freed = 0;
+    while (freed < bytes) {
+      const oldestKey = this.findEvictable();
+      if (!oldestKey) break;
+      freed += this.remove(oldestKey);
+      logger.info(`内存不足，表格缓存已淘汰: ${oldestKey}`);
+    }
+    return freed;
+  }
+
+  /**
+   * 按LRU顺序找到第一个未被固定的表格
+   * @returns 缓存键，没有可淘汰的表格时返回null
+   */
+  private findEvictable(): string | null {
+    for (const [key, table] of this.entries) {
+      if (!table.pinned) return key;
+    }
+    return null;
+  }
+
+  /**
+   * 移除缓存项并归还内存统计
+   * @param key 缓存键
+   * @returns 释放的字节数
+   */
+  private remove(key: string): number {
+    const table = this.entries.get(key);
+    if (!table) return 0;
+    this.entries.delete(key);
+    table.cached = false;
+    memoryGovernorService.trackCache(-table.bytes);
+    return table.bytes;
+  }
+
+  /**
+   * 生成缓存键，由扩展名、内容哈希和解码编码组成
+   * @param filePath 文件路径
+   * @param hash 内容哈希
+   * @param encoding 解码编码，不需要解码的格式为空字符串
+   * @returns 缓存键
+   */
+  private getKey(filePath: string, hash: string, encoding: string): string {
+    const key = `${fileUtils.getFileExtension(filePath)}:${hash}`;
+    return encoding ? `${key}:${encoding}` : key;
+  }
+}
+
+// 单例模式
+export default new TableCacheService();
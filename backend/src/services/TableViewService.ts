@@ -0,0 +1,229 @@
+import { CachedTable } from './TableCacheService';
+import { compareValues } from './QueryService';
+
+// 支持的过滤操作
+export type FilterOp = 'eq' | 'ne' | 'gt' | 'gte' | 'lt' | 'lte' | 'contains' | 'empty' | 'notEmpty';
+const FILTER_OPS: FilterOp[] = ['eq', 'ne', 'gt', 'gte', 'lt', 'lte', 'contains', 'empty', 'notEmpty'];
+
+// 单列过滤条件
+export interface ViewFilter {
+  column: string;
+  op: FilterOp;
+  value?: any;
+}
+
+// 单列排序
+export interface ViewSort {
+  column: string;
+  order: 'asc' | 'desc';
+}
+
+// 表格视图：全文搜索、过滤条件（同时满足）和多列排序
+export interface ViewSpec {
+  search: string;
+  filters: ViewFilter[];
+  sort: ViewSort[];
+}
+
+/**
+ * 视图参数错误，表示请求本身有问题
+ */
+export class ViewSpecError extends Error {
+  constructor(message: string) {
+    super(message);
+    this.name = 'ViewSpecError';
+  }
+}
+
+// 每个表格缓存的视图数量，分页读取同一视图时不必重复过滤和排序
+const MAX_VIEWS_PER_TABLE = 4;
+
+const isEmpty = (value: any) => value === null || value === undefined || value === '';
+
+/**
+ * 表格视图服务，按搜索、过滤和排序条件计算视图中的行顺序
+ * 结果只是行号数组，不复制行数据，导出和分页读取都按行号从缓存的表格中取行
+ */
+class TableViewService {
+  // 按表格缓存计算好的视图，表格被回收时随之释放，占用的内存计入表格
+  private views = new WeakMap<CachedTable, Map<string, Uint32Array>>();
+
+  /**
+   * 从请求参数解析视图
+   * search: 搜索文本；filters: JSON数组 [{"column","op","value"}]；sort: 逗号分隔的 列名[:asc|desc]
+   * @param query 请求参数
+   * @returns 视图
+   */
+  public parseSpec(query: Record<string, any>): ViewSpec {
+    const search = typeof query.search === 'string' ? query.search.trim() : '';
+
+    let filters: ViewFilter[] = [];
+    if (query.filters) {
+      let parsed: any;
+      try {
+        parsed = typeof query.filters === 'string' ? JSON.parse(query.filters) : query.filters;
+      } catch (err) {
+        throw new ViewSpecError('filters 不是有效的JSON');
+      }
+      if (!Array.isArray(parsed)) {
+        throw new ViewSpecError('filters 必须是数组');
+      }
+      filters = parsed.map((item: any) => {
+        if (!item || typeof item.column !== 'string' || !FILTER_OPS.includes(item.op)) {
+          throw new ViewSpecError(`无效的过滤条件: ${JSON.stringify(item)}，op 可选 ${FILTER_OPS.join('/')}`);
+        }
+        return { column: item.column, op: item.op, value: item.value };
+      });
+    }
+
+    const sort: ViewSort[] = [];
+    if (typeof query.sort === 'string' && query.sort.trim() !== '') {
+      for (const part of query.sort.split(',')) {
+        const index = part.lastIndexOf(':');
+        const suffix = index >= 0 ? part.slice(index + 1).trim().toLowerCase() : '';
+        const hasOrder = suffix === 'asc' || suffix === 'desc';
+        const column = (hasOrder ? part.slice(0, index) : part).trim();
+        if (!column) {
+          throw new ViewSpecError(`无效的排序: ${part}`);
+        }
+        sort.push({ column, order: suffix === 'desc' ? 'desc' : 'asc' });
+      }
+    }
+
+    return { search, filters, sort };
+  }
+
+  /**
+   * 获取视图包含的行号，按排序后的顺序排列，最近使用的视图会被缓存
+   * @param table 缓存的表格
+   * @param spec 视图
+   * @returns 行号数组，不可修改
+   */
+  public getRowIndices(table: CachedTable, spec: ViewSpec): Uint32Array {
+    let views = this.views.get(table);
+    if (!views) {
+      views = new Map();
+      this.views.set(table, views);
+    }
+
+    const key = JSON.stringify(spec);
+    let indices = views.get(key);
+    if (indices) {
+      // 移到末尾，维持LRU顺序
+      views.delete(key);
+    } else {
+      indices = this.computeRowIndices(table, spec);
+      while (views.size >= MAX_VIEWS_PER_TABLE) {
+        const oldest = views.keys().next().value as string;
+        table.addBytes(-(views.get(oldest) as Uint32Array).byteLength);
+        views.delete(oldest);
+      }
+      table.addBytes(indices.byteLength);
+    }
+    views.set(key, indices);
+    return indices;
+  }
+
+  /**
+   * 计算视图包含的行号
+   * @param table 缓存的表格
+   * @param spec 视图
+   * @returns 行号数组
+   */
+  private computeRowIndices(table: CachedTable, spec: ViewSpec): Uint32Array {
+    const columns = table.columnNames;
+    for (const column of [...spec.filters.map(item => item.column), ...spec.sort.map(item => item.column)]) {
+      if (!columns.includes(column)) {
+        throw new ViewSpecError(`列不存在: ${column}`);
+      }
+    }
+
+    const rowCount = table.rowCount;
+    const tests = spec.filters.map(filter => this.compileFilter(table.getColumn(filter.column) as any[], filter));
+    const needle = spec.search.toLowerCase();
+    const rows = table.data.rows;
+
+    let indices = new Uint32Array(rowCount);
+    let count = 0;
+    for (let i = 0; i < rowCount; i++) {
+      if (tests.length > 0 && !tests.every(test => test(i))) continue;
+      if (needle && !this.rowContains(rows[i], columns, needle)) continue;
+      indices[count++] = i;
+    }
+    if (count < rowCount) {
+      indices = indices.slice(0, count);
+    }
+
+    if (spec.sort.length > 0) {
+      const keys = spec.sort.map(item => ({
+        values: table.getColumn(item.column) as any[],
+        desc: item.order === 'desc'
+      }));
+      indices.sort((a, b) => {
+        for (const key of keys) {
+          const x = key.values[a];
+          const y = key.values[b];
+          // 空值无论升序降序都排在最后
+          const xEmpty = isEmpty(x);
+          const yEmpty = isEmpty(y);
+          if (xEmpty || yEmpty) {
+            if (xEmpty !== yEmpty) return xEmpty ? 1 : -1;
+            continue;
+          }
+          const diff = compareValues(x, y);
+          if (diff !== 0) return key.desc ? -diff : diff;
+        }
+        // 相同时保持原始顺序
+        return a - b;
+      });
+    }
+
+    return indices;
+  }
+
+  /**
+   * 编译单个过滤条件
+   * @param values 列向量
+   * @param filter 过滤条件
+   * @returns 按行号判断是否满足的函数
+   */
+  private compileFilter(values: any[], filter: ViewFilter): (index: number) => boolean {
+    const target = filter.value;
+    switch (filter.op) {
+      case 'empty':
+        return i => isEmpty(values[i]);
+      case 'notEmpty':
+        return i => !isEmpty(values[i]);
+      case 'contains': {
+        const text = String(target ?? '').toLowerCase();
+        return i => !isEmpty(values[i]) && String(values[i]).toLowerCase().includes(text);
+      }
+      case 'eq':
+        return i => !isEmpty(values[i]) && compareValues(values[i], target) === 0;
+      case 'ne':
+        return i => isEmpty(values[i]) || compareValues(values[i], target) !== 0;
+      case 'gt':
+        return i => !isEmpty(values[i]) && compareValues(values[i], target) > 0;
+      case 'gte':
+        return i => !isEmpty(values[i]) && compareValues(values[i], target) >= 0;
+      case 'lt':
+        return i => !isEmpty(values[i]) && compareValues(values[i], target) < 0;
+      case 'lte':
+        return i => !isEmpty(values[i]) && compareValues(values[i], target) <= 0;
+    }
+  }
+
+  /**
+   * 行中任一列包含搜索文本（不区分大小写）
+   */
+  private rowContains(row: Record<string, any>, columns: string[], needle: string): boolean {
+    for (const column of columns) {
+      const value = row[column];
+      if (!isEmpty(value) && String(value).toLowerCase().includes(needle)) return true;
+    }
+    return false;
+  }
+}
+
+// 单例模式
+export default new TableViewService();
@@ -1,14 +1,9 @@
-import fs from 'fs';
 import path from 'path';
 import { v4 as uuidv4 } from 'uuid';
-import { promisify } from 'util';
 import { VisualizationConfig } from '../models';
 import logger from '../utils/logger';
 import fileUtils from '../utils/fileUtils';
-
-// 异步文件操作
-const readFileAsync = promisify(fs.readFile);
-const writeFileAsync = promisify(fs.writeFile);
+import visualizationStore from './VisualizationStore';
 
 // 可视化配置保存目录
 const visualizationsDir = process.env.VISUALIZATIONS_DIR || path.join(__dirname, '../../data/visualizations');
@@ -43,25 +38,33 @@ class VisualizationService {
    */
   public async getVisualizations(fileId: string): Promise<VisualizationConfig[]> {
     try {
-      const filePath = this.getVisualizationFilePath(fileId);
-      
-      // 检查文件是否存在
-      try {
-        await fileUtils.statAsync(filePath);
-      } catch (err) {
-        // 文件不存在，返回空数组
-        return [];
-      }
-      
-      // 读取文件内容
-      const data = await readFileAsync(filePath, 'utf8');
-      return JSON.parse(data);
+      // 配置常驻内存，只有首次访问时读取存储
+      return await visualizationStore.get(fileId);
     } catch (err) {
       logger.error(`获取可视化配置失败: ${fileId}`, err);
       return [];
     }
   }
   
+  /**
+   * 获取文件可视化配置的版本，用于生成ETag
+   * @param fileId 文件ID
+   * @returns 版本
+   */
+  public getVersion(fileId: string): string {
+    return visualizationStore.getVersion(fileId);
+  }
+  
+  /**
+   * 获取文件的可视化配置及其对应的版本
+   * 读取失败时抛出异常，避免把空数组作为该版本的内容缓存
+   * @param fileId 文件ID
+   * @returns 可视化配置数组和版本
+   */
+  public getVersionedVisualizations(fileId: string): Promise<{ visualizations: VisualizationConfig[]; version: string }> {
+    return visualizationStore.getVersioned(fileId);
+  }
+  
   /**
    * 创建新的可视化配置
    * @param fileId 文件ID
@@ -70,20 +73,14 @@ class VisualizationService {
    */
   public async createVisualization(fileId: string, config: VisualizationConfig): Promise<VisualizationConfig> {
     try {
-      // 获取当前配置
-      const visualizations = await this.getVisualizations(fileId);
-      
       // 添加ID
       const newConfig = {
         ...config,
         id: uuidv4()
       };
       
-      // 添加到数组
-      visualizations.push(newConfig);
-      
-      // 保存文件
-      await this.saveVisualizations(fileId, visualizations);
+      // 添加到数组，写回由存储层批量完成
+      await visualizationStore.update(fileId, visualizations => [...visualizations, newConfig]);
       
       // 触发事件
       this.emit('visualization-change', {
@@ -108,26 +105,26 @@ class VisualizationService {
    */
   public async updateVisualization(fileId: string, visId: string, config: VisualizationConfig): Promise<VisualizationConfig> {
     try {
-      // 获取当前配置
-      const visualizations = await this.getVisualizations(fileId);
-      
-      // 查找配置
-      const index = visualizations.findIndex(v => v.id === visId);
-      if (index === -1) {
-        throw new Error(`可视化配置不存在: ${visId}`);
-      }
-      
-      // 更新配置
-      const updatedConfig = {
-        ...visualizations[index],
-        ...config,
-        id: visId // 确保ID不变
-      };
-      
-      visualizations[index] = updatedConfig;
-      
-      // 保存文件
-      await this.saveVisualizations(fileId, visualizations);
+      let updatedConfig: VisualizationConfig = config;
+      
+      await visualizationStore.update(fileId, visualizations => {
+        // 查找配置
+        const index = visualizations.findIndex(v => v.id === visId);
+        if (index === -1) {
+          throw new Error(`可视化配置不存在: ${visId}`);
+        }
+        
+        // 更新配置
+        updatedConfig = {
+          ...visualizations[index],
+          ...config,
+          id: visId // 确保ID不变
+        };
+        
+        const next = visualizations.slice();
+        next[index] = updatedConfig;
+        return next;
+      });
       
       // 触发事件
       this.emit('visualization-change', {
@@ -150,19 +147,16 @@ class VisualizationService {
    */
   public async deleteVisualization(fileId: string, visId: string): Promise<void> {
     try {
-      // 获取当前配置
-      const visualizations = await this.getVisualizations(fileId);
-      
-      // 过滤掉要删除的配置
-      const filteredVisualizations = visualizations.filter(v => v.id !== visId);
-      
-      // 如果没有变化，说明要删除的配置不存在
-      if (filteredVisualizations.length === visualizations.length) {
-        throw new Error(`可视化配置不存在: ${visId}`);
-      }
-      
-      // 保存文件
-      await this.saveVisualizations(fileId, filteredVisualizations);
+      await visualizationStore.update(fileId, visualizations => {
+        // 过滤掉要删除的配置
+        const filteredVisualizations = visualizations.filter(v => v.id !== visId);
+        
+        // 如果没有变化，说明要删除的配置不存在
+        if (filteredVisualizations.length === visualizations.length) {
+          throw new Error(`可视化配置不存在: ${visId}`);
+        }
+        return filteredVisualizations;
+      });
       
       // 触发事件
       this.emit('visualization-change', {
@@ -177,38 +171,11 @@ class VisualizationService {
   }
   
   /**
-   * 保存可视化配置
-   * @param fileId 文件ID
-   * @param visualizations 可视化配置数组
-   */
-  private async saveVisualizations(fileId: string, visualizations: VisualizationConfig[]): Promise<void> {
-    try {
-      const filePath = this.getVisualizationFilePath(fileId);
-      
-      // 确保目录存在
-      await fileUtils.ensureDirectoryExists(visualizationsDir);
-      
-      // 写入文件
-      await writeFileAsync(
-        filePath,
-        JSON.stringify(visualizations, null, 2),
-        'utf8'
-      );
-      
-      logger.info(`可视化配置已保存: ${fileId}`);
-    } catch (err) {
-      logger.error(`保存可视化配置失败: ${fileId}`, err);
-      throw err;
-    }
-  }
-  
-  /**
-   * 获取可视化配置文件路径
-   * @param fileId 文件ID
-   * @returns 文件路径
+   * 停止接受修改并写回未保存的可视化配置，滚动重启时在旧实例切换前以及进程退出前调用
+   * @throws 仍有未能写回的修改时抛出异常
    */
-  private getVisualizationFilePath(fileId: string): string {
-    return path.join(visualizationsDir, `${fileId}.json`);
+  public async drain(): Promise<void> {
+    await visualizationStore.drain();
   }
   
   /**
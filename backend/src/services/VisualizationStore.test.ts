@@ -0,0 +1,131 @@
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { VisualizationConfig } from '../models';
+
+jest.mock('../utils/logger', () => ({
+  __esModule: true,
+  default: { info: jest.fn(), warn: jest.fn(), error: jest.fn(), debug: jest.fn() }
+}));
+
+type StoreModule = typeof import('./VisualizationStore');
+
+const FLUSH_DELAY_MS = 20;
+
+const config = (id: string): VisualizationConfig => ({
+  id,
+  name: id,
+  type: 'bar',
+  dataMapping: { x: 'a', y: 'b' },
+  options: {}
+} as VisualizationConfig);
+
+/**
+ * 轮询直到条件成立
+ */
+const waitFor = async (predicate: () => boolean, timeoutMs = 2000) => {
+  const deadline = Date.now() + timeoutMs;
+  while (!predicate()) {
+    if (Date.now() > deadline) throw new Error('等待超时');
+    await new Promise(resolve => setTimeout(resolve, 5));
+  }
+};
+
+describe('VisualizationStore (JSON目录后端)', () => {
+  let dir: string;
+  let store: StoreModule['default'];
+  let StoreReadOnlyError: StoreModule['StoreReadOnlyError'];
+
+  const filePath = (fileId: string) => path.join(dir, `${fileId}.json`);
+  const readSaved = (fileId: string) => JSON.parse(fs.readFileSync(filePath(fileId), 'utf8'));
+
+  beforeAll(async () => {
+    dir = fs.mkdtempSync(path.join(os.tmpdir(), 'visualizations-'));
+    // 存储目录和写回延迟在模块加载时读取
+    process.env.VISUALIZATIONS_DIR = dir;
+    process.env.VISUALIZATION_STORE = 'json';
+    process.env.VISUALIZATION_FLUSH_DELAY = String(FLUSH_DELAY_MS);
+    const storeModule = await import('./VisualizationStore');
+    store = storeModule.default;
+    StoreReadOnlyError = storeModule.StoreReadOnlyError;
+  });
+
+  afterAll(() => {
+    fs.rmSync(dir, { recursive: true, force: true });
+  });
+
+  it('首次读取时加载已有的配置，不存在时为空数组', async () => {
+    fs.writeFileSync(filePath('existing'), JSON.stringify([config('a')]));
+    expect(await store.get('existing')).toEqual([config('a')]);
+    expect(await store.get('missing')).toEqual([]);
+  });
+
+  it('修改延迟写回，写回通过临时文件原子替换且不留下临时文件', async () => {
+    await store.update('delayed', list => [...list, config('a')]);
+    expect(fs.existsSync(filePath('delayed'))).toBe(false);
+
+    await waitFor(() => fs.existsSync(filePath('delayed')));
+    expect(readSaved('delayed')).toEqual([config('a')]);
+    expect(fs.readdirSync(dir).filter(name => name.endsWith('.tmp'))).toEqual([]);
+  });
+
+  it('同一文件ID的并发修改依次执行，不丢失修改', async () => {
+    await Promise.all(Array.from({ length: 10 }, (_, i) =>
+      store.update('concurrent', list => [...list, config(String(i))])
+    ));
+    await store.flush();
+
+    const saved = readSaved('concurrent') as VisualizationConfig[];
+    expect(saved.map(item => item.id).sort()).toEqual(Array.from({ length: 10 }, (_, i) => String(i)).sort());
+  });
+
+  it('mutator抛出异常时不修改配置，也不改变版本', async () => {
+    await store.update('failing', () => [config('a')]);
+    const version = store.getVersion('failing');
+
+    await expect(store.update('failing', () => {
+      throw new Error('无效的修改');
+    })).rejects.toThrow('无效的修改');
+
+    expect(await store.get('failing')).toEqual([config('a')]);
+    expect(store.getVersion('failing')).toBe(version);
+  });
+
+  it('版本随每次修改变化，且与读取的内容对应', async () => {
+    const before = await store.getVersioned('versioned');
+    await store.update('versioned', list => [...list, config('a')]);
+    const after = await store.getVersioned('versioned');
+
+    expect(before.visualizations).toEqual([]);
+    expect(after.visualizations).toEqual([config('a')]);
+    expect(after.version).not.toBe(before.version);
+  });
+
+  it('写回失败时保留修改并稍后重试', async () => {
+    // 先读入配置，再让目标路径成为目录，使写回时重命名失败
+    await store.get('retry');
+    fs.mkdirSync(filePath('retry'));
+    await store.update('retry', () => [config('a')]);
+    await store.flush();
+    expect(fs.statSync(filePath('retry')).isDirectory()).toBe(true);
+    expect(fs.readdirSync(dir).filter(name => name.endsWith('.tmp'))).toEqual([]);
+
+    fs.rmdirSync(filePath('retry'));
+    await waitFor(() => fs.existsSync(filePath('retry')) && fs.statSync(filePath('retry')).isFile());
+    expect(readSaved('retry')).toEqual([config('a')]);
+  });
+
+  it('排空时写回失败则抛出异常，排空后拒绝新的修改', async () => {
+    await store.get('drain');
+    fs.mkdirSync(filePath('drain'));
+    await store.update('drain', () => [config('a')]);
+
+    await expect(store.drain()).rejects.toThrow('可视化配置写回失败');
+    await expect(store.update('drain', () => [])).rejects.toThrow(StoreReadOnlyError);
+
+    // 存储恢复后再次排空即可写回排空前的修改
+    fs.rmdirSync(filePath('drain'));
+    await store.drain();
+    expect(readSaved('drain')).toEqual([config('a')]);
+  });
+});
@@ -0,0 +1,416 @@
+import fs from 'fs';
+import path from 'path';
+import { VisualizationConfig } from '../models';
+import logger from '../utils/logger';
+import fileUtils from '../utils/fileUtils';
+import { visualizationIoDuration } from '../utils/metrics';
+
+// 可视化配置保存目录
+const visualizationsDir = process.env.VISUALIZATIONS_DIR || path.join(__dirname, '../../data/visualizations');
+
+// 存储后端：json为每个文件一个JSON文件，log为单文件追加日志
+const storeType = process.env.VISUALIZATION_STORE || 'json';
+
+// 写回延迟（毫秒），期间的多次修改合并为一次写盘
+const flushDelay = parseInt(process.env.VISUALIZATION_FLUSH_DELAY || '200', 10);
+
+// 追加日志的文件名，以及触发压缩的最小日志大小
+const LOG_FILE_NAME = 'visualizations.log';
+const COMPACT_MIN_BYTES = 1024 * 1024;
+
+/**
+ * 存储已停止接收修改，滚动重启时旧实例在切换前进入此状态
+ */
+export class StoreReadOnlyError extends Error {
+  constructor(message = '服务正在切换到新的实例，请稍后重试') {
+    super(message);
+    this.name = 'StoreReadOnlyError';
+  }
+}
+
+/**
+ * 存储后端接口
+ */
+interface StorageBackend {
+  /**
+   * 读取单个文件的可视化配置，不存在时返回空数组
+   */
+  load(fileId: string): Promise<VisualizationConfig[]>;
+
+  /**
+   * 批量持久化配置
+   */
+  persist(changes: Map<string, VisualizationConfig[]>): Promise<void>;
+}
+
+/**
+ * 目录存储后端，每个文件ID对应一个JSON文件，通过临时文件加重命名原子写入
+ */
+class JsonDirectoryBackend implements StorageBackend {
+  public async load(fileId: string): Promise<VisualizationConfig[]> {
+    const endTimer = visualizationIoDuration.startTimer({ op: 'read' });
+    try {
+      const data = await fs.promises.readFile(this.getFilePath(fileId), 'utf8');
+      return JSON.parse(data);
+    } catch (err) {
+      if ((err as NodeJS.ErrnoException).code === 'ENOENT') {
+        return [];
+      }
+      throw err;
+    } finally {
+      endTimer();
+    }
+  }
+
+  public async persist(changes: Map<string, VisualizationConfig[]>): Promise<void> {
+    await fileUtils.ensureDirectoryExists(visualizationsDir);
+    const endTimer = visualizationIoDuration.startTimer({ op: 'write' });
+    try {
+      await Promise.all(Array.from(changes, ([fileId, visualizations]) =>
+        fileUtils.writeFileAtomic(this.getFilePath(fileId), JSON.stringify(visualizations))
+      ));
+    } finally {
+      endTimer();
+    }
+  }
+
+  private getFilePath(fileId: string): string {
+    return path.join(visualizationsDir, `${fileId}.json`);
+  }
+}
+
+/**
+ * 追加日志存储后端，所有配置保存在一个文件中，每行记录一个文件ID的完整配置
+ * 启动时一次性读入内存，之后的写入只追加，日志膨胀到有效数据的两倍以上时压缩
+ */
+class AppendLogBackend implements StorageBackend {
+  private entries: Map<string, VisualizationConfig[]> | null = null;
+  private loading: Promise<Map<string, VisualizationConfig[]>> | null = null;
+  // 每个文件ID最新一行的字节数，用于估算压缩后的大小
+  private lineBytes = new Map<string, number>();
+  private logBytes = 0;
+
+  private get logPath(): string {
+    return path.join(visualizationsDir, LOG_FILE_NAME);
+  }
+
+  public async load(fileId: string): Promise<VisualizationConfig[]> {
+    const entries = await this.loadAll();
+    return entries.get(fileId) || [];
+  }
+
+  public async persist(changes: Map<string, VisualizationConfig[]>): Promise<void> {
+    const entries = await this.loadAll();
+
+    let chunk = '';
+    changes.forEach((visualizations, fileId) => {
+      chunk += this.applyEntry(entries, fileId, visualizations);
+    });
+
+    const endTimer = visualizationIoDuration.startTimer({ op: 'write' });
+    try {
+      const handle = await fs.promises.open(this.logPath, 'a');
+      try {
+        await handle.writeFile(chunk, 'utf8');
+        await handle.sync();
+      } finally {
+        await handle.close();
+      }
+    } finally {
+      endTimer();
+    }
+    this.logBytes += Buffer.byteLength(chunk);
+
+    let liveBytes = 0;
+    this.lineBytes.forEach(bytes => {
+      liveBytes += bytes;
+    });
+    if (this.logBytes > COMPACT_MIN_BYTES && this.logBytes > liveBytes * 2) {
+      await this.compact(entries);
+    }
+  }
+
+  /**
+   * 读入并重放整个日志，日志不存在时导入旧的JSON文件
+   */
+  private loadAll(): Promise<Map<string, VisualizationConfig[]>> {
+    if (this.entries) return Promise.resolve(this.entries);
+    if (!this.loading) {
+      this.loading = this.replay().then(entries => {
+        this.entries = entries;
+        return entries;
+      }).finally(() => {
+        this.loading = null;
+      });
+    }
+    return this.loading;
+  }
+
+  private async replay(): Promise<Map<string, VisualizationConfig[]>> {
+    await fileUtils.ensureDirectoryExists(visualizationsDir);
+    const entries = new Map<string, VisualizationConfig[]>();
+
+    const endTimer = visualizationIoDuration.startTimer({ op: 'read' });
+    let content: string;
+    try {
+      content = await fs.promises.readFile(this.logPath, 'utf8');
+    } catch (err) {
+      if ((err as NodeJS.ErrnoException).code !== 'ENOENT') throw err;
+      endTimer();
+      await this.importJsonFiles(entries);
+      return entries;
+    }
+    endTimer();
+
+    const lines = content.split('\n');
+    lines.forEach((line, index) => {
+      if (!line) return;
+      try {
+        const record = JSON.parse(line);
+        this.applyEntry(entries, record.fileId, record.visualizations);
+      } catch (err) {
+        // 最后一行可能是崩溃时未写完的记录
+        logger.warn(`跳过无法解析的可视化配置日志: 第${index + 1}行`);
+      }
+    });
+    this.logBytes = Buffer.byteLength(content);
+
+    // 末尾有未写完的记录时重写日志，避免后续追加的记录接在残缺行后面
+    if (content && !content.endsWith('\n')) {
+      await this.compact(entries);
+    }
+
+    logger.info(`可视化配置日志已加载: ${entries.size} 个文件`);
+    return entries;
+  }
+
+  /**
+   * 把目录中已有的JSON配置导入日志
+   */
+  private async importJsonFiles(entries: Map<string, VisualizationConfig[]>) {
+    const names = await fs.promises.readdir(visualizationsDir);
+    for (const name of names) {
+      if (path.extname(name) !== '.json') continue;
+      try {
+        const data = await fs.promises.readFile(path.join(visualizationsDir, name), 'utf8');
+        this.applyEntry(entries, path.basename(name, '.json'), JSON.parse(data));
+      } catch (err) {
+        logger.error(`导入可视化配置失败: ${name}`, err);
+      }
+    }
+    await this.compact(entries);
+    if (entries.size > 0) {
+      logger.info(`已将 ${entries.size} 个可视化配置文件导入日志`);
+    }
+  }
+
+  /**
+   * 以当前数据重写日志
+   */
+  private async compact(entries: Map<string, VisualizationConfig[]>) {
+    let content = '';
+    entries.forEach((visualizations, fileId) => {
+      content += JSON.stringify({ fileId, visualizations }) + '\n';
+    });
+
+    const endTimer = visualizationIoDuration.startTimer({ op: 'write' });
+    try {
+      await fileUtils.writeFileAtomic(this.logPath, content);
+    } finally {
+      endTimer();
+    }
+    this.logBytes = Buffer.byteLength(content);
+    logger.info(`可视化配置日志已压缩: ${this.logBytes} bytes`);
+  }
+
+  /**
+   * 更新内存中的记录，返回对应的日志行
+   */
+  private applyEntry(entries: Map<string, VisualizationConfig[]>, fileId: string, visualizations: VisualizationConfig[]): string {
+    const line = JSON.stringify({ fileId, visualizations }) + '\n';
+    if (visualizations.length === 0) {
+      entries.delete(fileId);
+      this.lineBytes.delete(fileId);
+    } else {
+      entries.set(fileId, visualizations);
+      this.lineBytes.set(fileId, Buffer.byteLength(line));
+    }
+    return line;
+  }
+}
+
+/**
+ * 可视化配置存储，配置读入后常驻内存，修改按文件ID串行执行，
+ * 并在短暂延迟后批量写回存储后端
+ */
+class VisualizationStore {
+  private backend: StorageBackend;
+  private cache = new Map<string, VisualizationConfig[]>();
+  private loading = new Map<string, Promise<VisualizationConfig[]>>();
+  private locks = new Map<string, Promise<void>>();
+  private dirty = new Set<string>();
+  private flushTimer: NodeJS.Timeout | null = null;
+  private flushing: Promise<void> | null = null;
+  // 每个文件ID的修改次数，与进程启动时间一起构成配置的版本
+  private revisions = new Map<string, number>();
+  private readonly epoch = Date.now().toString(36);
+  // 排空后不再接受修改
+  private readOnly = false;
+
+  constructor() {
+    this.backend = storeType === 'log' ? new AppendLogBackend() : new JsonDirectoryBackend();
+    logger.info(`可视化配置存储后端: ${storeType === 'log' ? '追加日志' : 'JSON文件'}`);
+  }
+
+  /**
+   * 获取文件的可视化配置，只在首次访问时读取存储
+   * 返回的数组不可直接修改，修改需通过update
+   * @param fileId 文件ID
+   * @returns 可视化配置数组
+   */
+  public async get(fileId: string): Promise<VisualizationConfig[]> {
+    const cached = this.cache.get(fileId);
+    if (cached) return cached;
+
+    let pending = this.loading.get(fileId);
+    if (!pending) {
+      pending = this.backend.load(fileId).then(visualizations => {
+        // 加载期间可能已有写入，以内存中的数据为准
+        if (!this.cache.has(fileId)) {
+          this.cache.set(fileId, visualizations);
+        }
+        return this.cache.get(fileId) as VisualizationConfig[];
+      }).finally(() => {
+        this.loading.delete(fileId);
+      });
+      this.loading.set(fileId, pending);
+    }
+    return pending;
+  }
+
+  /**
+   * 获取文件的可视化配置及其版本，两者来自同一时刻，读取期间的修改不会使版本与内容不一致
+   * @param fileId 文件ID
+   */
+  public async getVersioned(fileId: string): Promise<{ visualizations: VisualizationConfig[]; version: string }> {
+    await this.get(fileId);
+    return {
+      visualizations: this.cache.get(fileId) as VisualizationConfig[],
+      version: this.getVersion(fileId)
+    };
+  }
+
+  /**
+   * 修改文件的可视化配置，同一文件ID的修改按调用顺序依次执行
+   * @param fileId 文件ID
+   * @param mutator 根据当前配置返回新配置数组，抛出异常时不做修改
+   * @returns 修改后的配置数组
+   */
+  public update(
+    fileId: string,
+    mutator: (visualizations: VisualizationConfig[]) => VisualizationConfig[]
+  ): Promise<VisualizationConfig[]> {
+    if (this.readOnly) {
+      return Promise.reject(new StoreReadOnlyError());
+    }
+    return this.withLock(fileId, async () => {
+      const current = await this.get(fileId);
+      const next = mutator(current);
+      this.cache.set(fileId, next);
+      this.revisions.set(fileId, (this.revisions.get(fileId) || 0) + 1);
+      this.dirty.add(fileId);
+      this.scheduleFlush();
+      return next;
+    });
+  }
+
+  /**
+   * 获取文件可视化配置的版本，配置每次修改后变化，无需读取存储
+   * 存储只由本进程修改：滚动重启时旧实例在切换前排空（见drain），新实例接管后才开始读取，
+   * 重启后的首个版本对应接管时存储中的内容
+   * @param fileId 文件ID
+   * @returns 版本
+   */
+  public getVersion(fileId: string): string {
+    return `${this.epoch}-${this.revisions.get(fileId) || 0}`;
+  }
+
+  /**
+   * 排空存储：停止接受新的修改，等待已开始的修改完成后全部写回
+   * 滚动重启时在旧实例上调用，之后由新实例接管存储
+   */
+  public async drain(): Promise<void> {
+    this.readOnly = true;
+    await Promise.all(Array.from(this.locks.values()));
+    await this.flush();
+    if (this.dirty.size > 0) {
+      throw new Error('可视化配置写回失败');
+    }
+  }
+
+  /**
+   * 立即写回所有未保存的修改
+   */
+  public async flush(): Promise<void> {
+    if (this.flushTimer) {
+      clearTimeout(this.flushTimer);
+      this.flushTimer = null;
+    }
+    // 等待进行中的写回完成，避免同一文件并发写入
+    while (this.flushing) {
+      await this.flushing;
+    }
+    if (this.dirty.size === 0) return;
+
+    const changes = new Map<string, VisualizationConfig[]>();
+    this.dirty.forEach(fileId => {
+      changes.set(fileId, this.cache.get(fileId) || []);
+    });
+    this.dirty.clear();
+
+    this.flushing = this.backend.persist(changes).then(() => {
+      logger.info(`可视化配置已保存: ${changes.size} 个文件`);
+    }).catch(err => {
+      // 写回失败时保留修改，稍后重试
+      changes.forEach((_, fileId) => this.dirty.add(fileId));
+      logger.error('保存可视化配置失败，稍后重试', err);
+      this.scheduleFlush();
+    }).finally(() => {
+      this.flushing = null;
+    });
+    await this.flushing;
+  }
+
+  /**
+   * 安排一次延迟写回
+   */
+  private scheduleFlush() {
+    if (this.flushTimer) return;
+    this.flushTimer = setTimeout(() => {
+      this.flushTimer = null;
+      this.flush();
+    }, flushDelay);
+  }
+
+  /**
+   * 按键串行执行任务
+   * @param key 锁的键
+   * @param task 任务
+   * @returns 任务结果
+   */
+  private withLock<T>(key: string, task: () => Promise<T>): Promise<T> {
+    const previous = this.locks.get(key) || Promise.resolve();
+    const run = previous.then(task);
+    const tail = run.then(() => undefined, () => undefined);
+    this.locks.set(key, tail);
+    tail.then(() => {
+      if (this.locks.get(key) === tail) {
+        this.locks.delete(key);
+      }
+    });
+    return run;
+  }
+}
+
+// 单例模式
+export default new VisualizationStore();
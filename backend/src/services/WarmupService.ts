@@ -0,0 +1,239 @@
+import fs from 'fs';
+import path from 'path';
+import { SystemConfig } from '../models';
+import logger from '../utils/logger';
+import fileUtils from '../utils/fileUtils';
+import { httpRequestsInFlight, warmupFilesTotal } from '../utils/metrics';
+import configService from './ConfigService';
+import tableCacheService from './TableCacheService';
+import memoryGovernorService from './MemoryGovernorService';
+
+// 默认预热配置
+const DEFAULT_CONCURRENCY = 2;
+const DEFAULT_MAX_FILES = 50;
+
+// 预热占用的内存上限（占预算的比例），留出余量给实时请求
+const MEMORY_HEADROOM_RATIO = 0.8;
+
+// 有实时请求时，等待多久再检查一次（毫秒）
+const YIELD_INTERVAL = 50;
+
+// 预热任务
+interface WarmupFile {
+  path: string;
+  size: number;
+  lastUsed: number;
+}
+
+// 预热状态
+export interface WarmupStatus {
+  state: 'idle' | 'running' | 'done';
+  total: number;
+  completed: number;
+  failed: number;
+  skipped: number;
+  bytes: number;
+  current: string[];
+  startedAt: Date | null;
+  finishedAt: Date | null;
+  durationMs: number | null;
+  stopReason: string | null;
+}
+
+/**
+ * 预热服务，启动后把监控目录中的文件预先解析进表格缓存，
+ * 使重启后第一个打开文件的用户不必等待解析
+ * 预热以低优先级运行：有实时请求时暂停，缓存或内存接近上限时停止
+ */
+class WarmupService {
+  private status: WarmupStatus = this.createStatus('idle');
+  private queue: WarmupFile[] = [];
+  private stopReason: string | null = null;
+
+  /**
+   * 开始预热，已在运行时直接返回当前状态
+   * @returns 预热状态
+   */
+  public async start(): Promise<WarmupStatus> {
+    if (this.status.state === 'running') {
+      return this.getStatus();
+    }
+
+    const config = await configService.getConfig();
+    const settings: NonNullable<SystemConfig['warmup']> = config.warmup || {};
+    this.status = this.createStatus('running');
+    this.stopReason = null;
+
+    if (settings.enabled === false) {
+      this.finish('预热已在配置中关闭');
+      return this.getStatus();
+    }
+
+    const files = await this.collectFiles(config.fileWatching.directories, config.fileWatching.fileTypes);
+    this.sortFiles(files, settings.order || 'recent');
+    this.queue = files.slice(0, settings.maxFiles ?? DEFAULT_MAX_FILES);
+    this.status.total = this.queue.length;
+    logger.info(`开始预热: ${this.queue.length} 个文件 (共找到 ${files.length} 个)`);
+
+    const concurrency = Math.max(1, settings.concurrency || DEFAULT_CONCURRENCY);
+    const workers = Array.from({ length: concurrency }, () => this.runWorker());
+    Promise.all(workers).then(() => {
+      this.finish(this.stopReason);
+      logger.info(`预热完成: ${this.status.completed} 个文件, 失败 ${this.status.failed}, ` +
+        `跳过 ${this.status.skipped}, 耗时 ${this.status.durationMs}ms`);
+    });
+
+    return this.getStatus();
+  }
+
+  /**
+   * 获取预热状态
+   */
+  public getStatus(): WarmupStatus {
+    return { ...this.status, current: [...this.status.current] };
+  }
+
+  /**
+   * 依次从队列取出文件解析
+   */
+  private async runWorker() {
+    while (this.queue.length > 0 && !this.stopReason) {
+      await this.waitForIdle();
+
+      const reason = await this.checkCapacity();
+      if (reason) {
+        this.stopReason = reason;
+        break;
+      }
+
+      const file = this.queue.shift();
+      if (!file) break;
+
+      this.status.current.push(file.path);
+      try {
+        await tableCacheService.getTable(file.path);
+        this.status.completed++;
+        this.status.bytes += file.size;
+        warmupFilesTotal.inc({ result: 'success' });
+      } catch (err) {
+        this.status.failed++;
+        warmupFilesTotal.inc({ result: 'error' });
+        logger.warn(`预热文件失败: ${file.path}, ${(err as Error).message}`);
+      } finally {
+        this.status.current = this.status.current.filter(item => item !== file.path);
+      }
+    }
+  }
+
+  /**
+   * 等待没有实时请求时再继续，使预热让位于用户请求
+   */
+  private async waitForIdle() {
+    while (httpRequestsInFlight.get() > 0) {
+      await new Promise(resolve => setTimeout(resolve, YIELD_INTERVAL));
+    }
+    // 让出一次事件循环，已到达的I/O回调先执行
+    await new Promise(resolve => setImmediate(resolve));
+  }
+
+  /**
+   * 检查缓存和内存是否还有余量，继续预热会挤出已缓存的表格时停止
+   * @returns 停止原因，可以继续时返回null
+   */
+  private async checkCapacity(): Promise<string | null> {
+    const cache = tableCacheService.getStats();
+    if (cache.entries + this.status.current.length >= cache.maxEntries) {
+      return `表格缓存已满 (${cache.maxEntries})`;
+    }
+    const usage = await memoryGovernorService.getUsage();
+    if (usage.usedBytes >= usage.budgetBytes * MEMORY_HEADROOM_RATIO) {
+      return '内存使用接近预算';
+    }
+    return null;
+  }
+
+  /**
+   * 遍历监控目录，收集支持的文件
+   * @param directories 监控目录
+   * @param fileTypes 支持的扩展名
+   * @returns 文件列表
+   */
+  private async collectFiles(directories: string[], fileTypes: string[]): Promise<WarmupFile[]> {
+    const files: WarmupFile[] = [];
+    const seen = new Set<string>();
+
+    const walk = async (dir: string) => {
+      let entries: fs.Dirent[];
+      try {
+        entries = await fs.promises.readdir(dir, { withFileTypes: true });
+      } catch (err) {
+        return;
+      }
+      for (const entry of entries) {
+        const fullPath = path.join(dir, entry.name);
+        if (entry.isDirectory()) {
+          await walk(fullPath);
+        } else if (entry.isFile() && fileTypes.includes(fileUtils.getFileExtension(entry.name))) {
+          if (seen.has(fullPath)) continue;
+          seen.add(fullPath);
+          try {
+            const stats = await fileUtils.statAsync(fullPath);
+            files.push({
+              path: fullPath,
+              size: stats.size,
+              lastUsed: Math.max(stats.atimeMs, stats.mtimeMs)
+            });
+          } catch (err) {
+            // 文件在遍历期间被删除
+          }
+        }
+      }
+    };
+
+    for (const dir of directories) {
+      await walk(path.resolve(dir));
+    }
+    return files;
+  }
+
+  /**
+   * 按预热顺序排序
+   * recent: 最近访问或修改的文件优先；size: 小文件优先，尽快让更多文件可用
+   */
+  private sortFiles(files: WarmupFile[], order: 'recent' | 'size') {
+    if (order === 'size') {
+      files.sort((a, b) => a.size - b.size);
+    } else {
+      files.sort((a, b) => b.lastUsed - a.lastUsed);
+    }
+  }
+
+  private finish(reason: string | null) {
+    const finishedAt = new Date();
+    this.status.state = 'done';
+    this.status.finishedAt = finishedAt;
+    this.status.durationMs = this.status.startedAt ? finishedAt.getTime() - this.status.startedAt.getTime() : 0;
+    this.status.skipped = this.status.total - this.status.completed - this.status.failed;
+    this.status.stopReason = reason;
+    this.queue = [];
+  }
+
+  private createStatus(state: WarmupStatus['state']): WarmupStatus {
+    return {
+      state,
+      total: 0,
+      completed: 0,
+      failed: 0,
+      skipped: 0,
+      bytes: 0,
+      current: [],
+      startedAt: state === 'running' ? new Date() : null,
+      finishedAt: null,
+      durationMs: null,
+      stopReason: null
+    };
+  }
+}
+
+// 单例模式
+export default new WarmupService();
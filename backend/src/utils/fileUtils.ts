@@ -3,6 +3,7 @@ import path from 'path';
 import { v4 as uuidv4 } from 'uuid';
 import { promisify } from 'util';
 import logger from './logger';
+import { directoryReadDuration, directoryEntriesTotal } from './metrics';
 
 // 文件系统操作的异步版本
 const readFileAsync = promisify(fs.readFile);
@@ -114,6 +115,7 @@ export const readDirectory = async (
   dirPath: string,
   includeSubdirectories = true
 ) => {
+  const endTimer = directoryReadDuration.startTimer();
   try {
     // 规范化路径
     const normalizedPath = path.normalize(dirPath);
@@ -159,13 +161,137 @@ export const readDirectory = async (
     const validFileInfos = fileInfos.filter(info => info !== null);
     
     logger.info(`成功获取 ${validFileInfos.length} 个有效文件/文件夹信息`);
+    directoryEntriesTotal.inc(undefined, validFileInfos.length);
+    endTimer({ status: 'success' });
     return validFileInfos;
   } catch (err) {
+    endTimer({ status: 'error' });
     logger.error(`读取目录失败: ${dirPath}`, err);
     throw err;
   }
 };
 
+/**
+ * 将通配符模式转换为正则表达式
+ * 支持 * (不跨目录)、** (跨目录) 和 ?
+ * @param pattern 使用正斜杠的通配符模式
+ * @returns 正则表达式
+ */
+export const globToRegExp = (pattern: string): RegExp => {
+  let source = '';
+  for (let i = 0; i < pattern.length; i++) {
+    const ch = pattern[i];
+    if (ch === '*') {
+      if (pattern[i + 1] === '*') {
+        // "**/" 可以匹配零个或多个目录
+        if (pattern[i + 2] === '/') {
+          source += '(?:.*/)?';
+          i += 2;
+        } else {
+          source += '.*';
+          i += 1;
+        }
+      } else {
+        source += '[^/]*';
+      }
+    } else if (ch === '?') {
+      source += '[^/]';
+    } else {
+      source += ch.replace(/[.+^${}()|[\]\\]/g, '\\$&');
+    }
+  }
+  return new RegExp(`^${source}$`, process.platform === 'win32' ? 'i' : '');
+};
+
+/**
+ * 判断路径是否包含通配符
+ * @param filePath 文件路径
+ * @returns 是否包含通配符
+ */
+export const hasGlobPattern = (filePath: string): boolean => {
+  return /[*?]/.test(filePath);
+};
+
+/**
+ * 按通配符模式查找文件
+ * @param pattern 绝对路径形式的通配符模式
+ * @param limits maxDepth: 从第一个通配符层级起最多进入的目录层数；maxFiles: 找到这么多文件后停止遍历
+ * @returns 匹配的文件路径数组，按路径排序
+ */
+export const findFiles = async (
+  pattern: string,
+  limits: { maxDepth?: number; maxFiles?: number } = {}
+): Promise<string[]> => {
+  const normalizedPattern = path.normalize(pattern).replace(/\\/g, '/');
+
+  if (!hasGlobPattern(normalizedPattern)) {
+    try {
+      const stats = await statAsync(normalizedPattern);
+      return stats.isFile() ? [path.normalize(normalizedPattern)] : [];
+    } catch (err) {
+      return [];
+    }
+  }
+
+  // 从第一个含通配符的目录层级开始遍历
+  const segments = normalizedPattern.split('/');
+  const firstGlob = segments.findIndex(segment => hasGlobPattern(segment));
+  const baseDir = segments.slice(0, firstGlob).join('/') || '/';
+  const recursive = normalizedPattern.includes('**');
+  const patternDepth = segments.length - firstGlob;
+  const maxDepth = recursive ? Math.max(patternDepth, limits.maxDepth ?? Infinity) : patternDepth;
+  const maxFiles = limits.maxFiles ?? Infinity;
+  const regex = globToRegExp(normalizedPattern);
+
+  const matches: string[] = [];
+  const walk = async (dir: string, depth: number) => {
+    if (matches.length >= maxFiles) return;
+    let entries: fs.Dirent[];
+    try {
+      entries = await readdirAsync(dir, { withFileTypes: true });
+    } catch (err) {
+      return;
+    }
+    for (const entry of entries) {
+      const fullPath = path.join(dir, entry.name);
+      if (entry.isDirectory()) {
+        if (depth < maxDepth) {
+          await walk(fullPath, depth + 1);
+        }
+      } else if (entry.isFile() && regex.test(fullPath.replace(/\\/g, '/'))) {
+        matches.push(fullPath);
+      }
+      if (matches.length >= maxFiles) return;
+    }
+  };
+  await walk(baseDir, 1);
+
+  return matches.sort();
+};
+
+/**
+ * 原子写入文件：先写入同目录的临时文件并刷盘，再重命名覆盖目标文件
+ * 写入过程中崩溃只会留下临时文件，目标文件保持旧内容或新内容之一
+ * @param filePath 目标文件路径
+ * @param content 文件内容
+ */
+export const writeFileAtomic = async (filePath: string, content: string | Buffer): Promise<void> => {
+  const tempPath = `${filePath}.${process.pid}.${uuidv4()}.tmp`;
+  try {
+    const handle = await fs.promises.open(tempPath, 'w');
+    try {
+      await handle.writeFile(content, typeof content === 'string' ? 'utf8' : undefined);
+      await handle.sync();
+    } finally {
+      await handle.close();
+    }
+    await fs.promises.rename(tempPath, filePath);
+  } catch (err) {
+    await fs.promises.unlink(tempPath).catch(() => undefined);
+    throw err;
+  }
+};
+
 export default {
   ensureDirectoryExists,
   getFileExtension,
@@ -173,6 +299,10 @@ export default {
   isSupportedFileType,
   getFileInfo,
   readDirectory,
+  globToRegExp,
+  hasGlobPattern,
+  findFiles,
+  writeFileAtomic,
   readFileAsync,
   writeFileAsync,
   statAsync
@@ -0,0 +1,123 @@
+import fs from 'fs';
+import path from 'path';
+import { Request, Response, NextFunction } from 'express';
+import logger from './logger';
+
+// 由后端处理的路径前缀，不会回退到前端页面
+const BACKEND_PREFIXES = ['/api', '/socket.io', '/metrics', '/health', '/static'];
+
+// Vite构建产物中文件名带内容哈希的目录，内容变化时文件名随之变化，可永久缓存
+const HASHED_ASSETS_PREFIX = '/assets/';
+const IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable';
+
+// 预压缩文件的扩展名，按优先级排列
+const ENCODINGS: Array<{ name: string; ext: string }> = [
+  { name: 'br', ext: '.br' },
+  { name: 'gzip', ext: '.gz' }
+];
+
+/**
+ * 列出目录下的所有文件，返回以/开头的相对路径，跳过隐藏文件
+ * @param root 根目录
+ * @returns 相对路径集合
+ */
+const listFiles = (root: string): Set<string> => {
+  const files = new Set<string>();
+  const walk = (dir: string, prefix: string) => {
+    for (const entry of fs.readdirSync(dir, { withFileTypes: true })) {
+      if (entry.name.startsWith('.')) continue;
+      const relativePath = `${prefix}/${entry.name}`;
+      if (entry.isDirectory()) {
+        walk(path.join(dir, entry.name), relativePath);
+      } else if (entry.isFile()) {
+        files.add(relativePath);
+      }
+    }
+  };
+  walk(root, '');
+  return files;
+};
+
+/**
+ * 创建托管前端构建产物的中间件
+ * 优先返回预压缩的br/gz文件，带哈希的资源永久缓存，其余页面路径回退到index.html
+ * 构建产物在服务运行期间视为不变，文件列表只在启动时扫描一次
+ * @param distDir 前端构建目录
+ * @returns Express中间件
+ */
+export const serveFrontend = (distDir: string) => {
+  const root = path.resolve(distDir);
+  let files: Set<string>;
+  try {
+    files = listFiles(root);
+  } catch (err) {
+    logger.error(`读取前端构建目录失败: ${root}`, err);
+    files = new Set();
+  }
+
+  if (!files.has('/index.html')) {
+    logger.warn(`前端构建目录中没有index.html，不提供前端页面: ${root}`);
+    return (req: Request, res: Response, next: NextFunction) => next();
+  }
+  logger.info(`托管前端构建产物: ${root}, 文件数: ${files.size}`);
+
+  /**
+   * 发送文件，客户端支持时发送预压缩版本
+   */
+  const sendAsset = (req: Request, res: Response, next: NextFunction, relativePath: string) => {
+    const available = ENCODINGS.filter(encoding => files.has(relativePath + encoding.ext));
+    let filePath = relativePath;
+
+    if (available.length > 0) {
+      res.vary('Accept-Encoding');
+      const accepted = req.acceptsEncodings(available.map(encoding => encoding.name));
+      const encoding = available.find(item => item.name === accepted);
+      if (encoding) {
+        filePath = relativePath + encoding.ext;
+        res.setHeader('Content-Encoding', encoding.name);
+      }
+    }
+
+    // 按原始文件的扩展名设置类型，避免.br/.gz被识别为二进制文件
+    res.type(path.extname(relativePath));
+    res.setHeader(
+      'Cache-Control',
+      relativePath.startsWith(HASHED_ASSETS_PREFIX) ? IMMUTABLE_CACHE_CONTROL : 'no-cache'
+    );
+
+    res.sendFile(path.join(root, filePath), { cacheControl: false }, err => {
+      if (err && !res.headersSent) next(err);
+    });
+  };
+
+  return (req: Request, res: Response, next: NextFunction) => {
+    if (req.method !== 'GET' && req.method !== 'HEAD') return next();
+    if (BACKEND_PREFIXES.some(prefix => req.path === prefix || req.path.startsWith(`${prefix}/`))) {
+      return next();
+    }
+
+    let relativePath: string;
+    try {
+      relativePath = path.posix.normalize(decodeURIComponent(req.path));
+    } catch (err) {
+      return next();
+    }
+
+    if (relativePath === '/') {
+      return sendAsset(req, res, next, '/index.html');
+    }
+    if (files.has(relativePath)) {
+      return sendAsset(req, res, next, relativePath);
+    }
+
+    // 前端路由的页面路径回退到index.html，缺失的静态资源仍返回404
+    if (!path.posix.extname(relativePath) && req.accepts('html')) {
+      return sendAsset(req, res, next, '/index.html');
+    }
+    next();
+  };
+};
+
+export default {
+  serveFrontend
+};
@@ -0,0 +1,198 @@
+import zlib from 'zlib';
+import { Request, Response } from 'express';
+import { createETag, getStats, sendCached, BuildResult } from './httpCache';
+import memoryGovernorService from '../services/MemoryGovernorService';
+
+jest.mock('./logger', () => ({
+  __esModule: true,
+  default: { info: jest.fn(), warn: jest.fn(), error: jest.fn(), debug: jest.fn() }
+}));
+
+// 记录发送结果的响应对象
+interface MockResponse {
+  statusCode: number;
+  headers: Record<string, any>;
+  body?: Buffer;
+}
+
+/**
+ * 构造请求对象，只实现sendCached用到的部分
+ * Range只解析单个bytes范围，起点超出内容时视为无法满足
+ */
+const createRequest = (headers: Record<string, string> = {}): Request => ({
+  headers,
+  acceptsEncodings: (...encodings: string[]) =>
+    encodings.find(encoding => (headers['accept-encoding'] || '').includes(encoding)) || 'identity',
+  range: (size: number) => {
+    const match = /^bytes=(\d+)-(\d*)$/.exec(headers.range || '');
+    if (!match) return -2;
+    const start = Number(match[1]);
+    if (start >= size) return -1;
+    const end = match[2] ? Math.min(Number(match[2]), size - 1) : size - 1;
+    return Object.assign([{ start, end }], { type: 'bytes' });
+  }
+} as unknown as Request);
+
+const createResponse = (): { res: Response; sent: MockResponse } => {
+  const sent: MockResponse = { statusCode: 0, headers: {} };
+  const res = {
+    setHeader: (name: string, value: any) => { sent.headers[name.toLowerCase()] = value; },
+    vary: () => res,
+    type: (type: string) => { sent.headers['content-type'] = type; return res; },
+    status: (code: number) => { sent.statusCode = code; return res; },
+    end: (body?: Buffer) => { sent.body = body; return res; }
+  };
+  return { res: res as unknown as Response, sent };
+};
+
+/**
+ * 返回计数的build函数，rows决定序列化后的大小
+ */
+const counting = (etag: string, rows: number) => {
+  const calls = { count: 0 };
+  const build = async (): Promise<BuildResult> => {
+    calls.count++;
+    return { data: Array.from({ length: rows }, (_, i) => ({ id: i, name: `row-${i}` })), etag };
+  };
+  return { build, calls };
+};
+
+const send = async (headers: Record<string, string>, etag: string, build: () => Promise<BuildResult>) => {
+  const { res, sent } = createResponse();
+  await sendCached(createRequest(headers), res, etag, build);
+  return sent;
+};
+
+describe('httpCache', () => {
+  it('相同版本生成相同的强ETag，版本不同时ETag不同', () => {
+    const etag = createETag('content', '/a.csv', 10, 123);
+    expect(etag).toMatch(/^"[^"]+"$/);
+    expect(createETag('content', '/a.csv', 10, 123)).toBe(etag);
+    expect(createETag('content', '/a.csv', 10, 124)).not.toBe(etag);
+  });
+
+  it('返回与responseUtils.success一致的JSON并只build一次', async () => {
+    const etag = createETag('format');
+    const { build, calls } = counting(etag, 3);
+
+    const first = await send({}, etag, build);
+    const second = await send({}, etag, build);
+
+    expect(first.statusCode).toBe(200);
+    expect(first.headers['etag']).toBe(etag);
+    expect(first.headers['cache-control']).toBe('no-cache');
+    expect(first.headers['content-length']).toBe(first.body!.length);
+    const parsed = JSON.parse(first.body!.toString('utf8'));
+    expect(parsed.code).toBe(200);
+    expect(parsed.data).toHaveLength(3);
+    expect(second.body!.equals(first.body!)).toBe(true);
+    expect(calls.count).toBe(1);
+  });
+
+  it('If-None-Match匹配任一编码的ETag时返回304且不调用build', async () => {
+    const etag = createETag('not-modified');
+    const { build, calls } = counting(etag, 2000);
+    const compressed = await send({ 'accept-encoding': 'gzip' }, etag, build);
+    const gzipTag = compressed.headers['etag'];
+    expect(gzipTag).toBe(`${etag.slice(0, -1)}-gzip"`);
+
+    for (const header of [etag, gzipTag, `W/${etag}`, `"other", ${gzipTag}`, '*']) {
+      const sent = await send({ 'if-none-match': header }, etag, build);
+      expect(sent.statusCode).toBe(304);
+      expect(sent.body).toBeUndefined();
+    }
+    expect(calls.count).toBe(1);
+
+    const stale = await send({ 'if-none-match': createETag('stale') }, etag, build);
+    expect(stale.statusCode).toBe(200);
+  });
+
+  it('按Accept-Encoding压缩，各编码使用不同的ETag', async () => {
+    const etag = createETag('encoding');
+    const { build } = counting(etag, 2000);
+
+    const gzip = await send({ 'accept-encoding': 'gzip' }, etag, build);
+    const br = await send({ 'accept-encoding': 'br' }, etag, build);
+    const identity = await send({}, etag, build);
+
+    expect(gzip.headers['content-encoding']).toBe('gzip');
+    expect(br.headers['content-encoding']).toBe('br');
+    expect(identity.headers['content-encoding']).toBeUndefined();
+    expect(new Set([gzip.headers['etag'], br.headers['etag'], identity.headers['etag']]).size).toBe(3);
+    expect(zlib.gunzipSync(gzip.body!).equals(identity.body!)).toBe(true);
+    expect(zlib.brotliDecompressSync(br.body!).equals(identity.body!)).toBe(true);
+    expect(gzip.body!.length).toBeLessThan(identity.body!.length);
+  });
+
+  it('小于1KB的响应不压缩', async () => {
+    const etag = createETag('small');
+    const { build } = counting(etag, 1);
+
+    const sent = await send({ 'accept-encoding': 'gzip, br' }, etag, build);
+
+    expect(sent.body!.length).toBeLessThan(1024);
+    expect(sent.headers['content-encoding']).toBeUndefined();
+    expect(sent.headers['etag']).toBe(etag);
+  });
+
+  it('Range请求返回206和对应的字节范围', async () => {
+    const etag = createETag('range');
+    const { build } = counting(etag, 2000);
+    const full = await send({}, etag, build);
+
+    const sent = await send({ range: 'bytes=10-19', 'accept-encoding': 'gzip' }, etag, build);
+
+    expect(sent.statusCode).toBe(206);
+    expect(sent.headers['content-range']).toBe(`bytes 10-19/${full.body!.length}`);
+    expect(sent.headers['content-length']).toBe(10);
+    expect(sent.headers['content-encoding']).toBeUndefined();
+    expect(sent.body!.equals(full.body!.subarray(10, 20))).toBe(true);
+  });
+
+  it('无法满足的Range返回416', async () => {
+    const etag = createETag('unsatisfiable');
+    const { build } = counting(etag, 3);
+    const full = await send({}, etag, build);
+
+    const sent = await send({ range: 'bytes=999999-' }, etag, build);
+
+    expect(sent.statusCode).toBe(416);
+    expect(sent.headers['content-range']).toBe(`bytes */${full.body!.length}`);
+  });
+
+  it('If-Range与当前版本不一致时返回完整内容', async () => {
+    const etag = createETag('if-range');
+    const { build } = counting(etag, 3);
+
+    const matched = await send({ range: 'bytes=0-4', 'if-range': etag }, etag, build);
+    const mismatched = await send({ range: 'bytes=0-4', 'if-range': createETag('old') }, etag, build);
+
+    expect(matched.statusCode).toBe(206);
+    expect(mismatched.statusCode).toBe(200);
+    expect(mismatched.headers['content-range']).toBeUndefined();
+  });
+
+  it('build返回的版本与请求的ETag不同时使用build的ETag', async () => {
+    const requested = createETag('requested');
+    const actual = createETag('actual');
+    const { build } = counting(actual, 3);
+
+    const sent = await send({}, requested, build);
+
+    expect(sent.statusCode).toBe(200);
+    expect(sent.headers['etag']).toBe(actual);
+  });
+
+  it('内存压力时按LRU顺序释放缓存', async () => {
+    const etag = createETag('pressure');
+    const { build, calls } = counting(etag, 3);
+    await send({}, etag, build);
+    expect(getStats().entries).toBeGreaterThan(0);
+
+    (memoryGovernorService as any).emit('memory-pressure', { bytes: Number.MAX_SAFE_INTEGER });
+
+    expect(getStats()).toMatchObject({ entries: 0, bytes: 0 });
+    await send({}, etag, build);
+    expect(calls.count).toBe(2);
+  });
+});
\ No newline at end of file
@@ -0,0 +1,254 @@
+import zlib from 'zlib';
+import crypto from 'crypto';
+import { promisify } from 'util';
+import { Request, Response } from 'express';
+import logger from './logger';
+import { httpCacheRequests } from './metrics';
+import { SingleFlight } from './singleFlight';
+import memoryGovernorService from '../services/MemoryGovernorService';
+
+const gzipAsync = promisify(zlib.gzip);
+const brotliCompressAsync = promisify(zlib.brotliCompress);
+
+// 已序列化响应的缓存上限
+const maxCacheBytes = parseInt(process.env.HTTP_CACHE_MAX_MB || '64', 10) * 1024 * 1024;
+
+// 小于此大小的响应不压缩
+const COMPRESS_MIN_BYTES = 1024;
+
+// brotli压缩等级，结果按版本缓存，兼顾首次压缩的耗时和压缩率
+const BROTLI_QUALITY = 5;
+
+type Encoding = 'identity' | 'br' | 'gzip';
+
+// build的结果：响应数据，以及数据实际对应的版本的ETag
+export interface BuildResult {
+  data: any;
+  etag: string;
+}
+
+// 某个版本的响应，压缩版本在首次被请求时生成
+interface Representation {
+  etag: string;
+  body: Buffer;
+  encoded: Map<Encoding, Buffer>;
+  bytes: number;
+}
+
+const cache = new Map<string, Representation>();
+let cachedBytes = 0;
+const builds = new SingleFlight<Representation>('http-cache');
+const compressions = new SingleFlight<Buffer>('http-compress');
+
+/**
+ * 根据资源版本生成强ETag
+ * @param parts 决定响应内容的版本信息，如路径、大小、修改时间
+ * @returns 带引号的ETag
+ */
+export const createETag = (...parts: Array<string | number>): string => {
+  const digest = crypto.createHash('sha1').update(parts.join('|')).digest('base64url');
+  return `"${digest.slice(0, 27)}"`;
+};
+
+/**
+ * 不同内容编码是不同的表示，各自使用不同的强ETag
+ */
+const encodingTag = (etag: string, encoding: Encoding): string =>
+  encoding === 'identity' ? etag : `${etag.slice(0, -1)}-${encoding}"`;
+
+/**
+ * 检查If-None-Match，匹配任一编码的ETag都视为未修改
+ * @returns 匹配到的ETag，未匹配时返回null
+ */
+const matchIfNoneMatch = (header: string | undefined, etag: string): string | null => {
+  if (!header) return null;
+  if (header.trim() === '*') return etag;
+  const candidates = (['identity', 'br', 'gzip'] as Encoding[]).map(encoding => encodingTag(etag, encoding));
+  for (const item of header.split(',')) {
+    const tag = item.trim().replace(/^W\//, '');
+    if (candidates.includes(tag)) return tag;
+  }
+  return null;
+};
+
+/**
+ * 取出缓存的响应，移到LRU末尾
+ */
+const lookup = (etag: string): Representation | undefined => {
+  const representation = cache.get(etag);
+  if (representation) {
+    cache.delete(etag);
+    cache.set(etag, representation);
+  }
+  return representation;
+};
+
+/**
+ * 放入缓存并按LRU顺序淘汰，超过缓存上限的响应不缓存
+ * 缓存的字节数计入内存调度服务的预算
+ */
+const store = (representation: Representation) => {
+  if (representation.bytes > maxCacheBytes) return;
+  remove(representation.etag);
+  cache.set(representation.etag, representation);
+  addBytes(representation.bytes);
+  evict();
+};
+
+const remove = (etag: string): number => {
+  const representation = cache.get(etag);
+  if (!representation) return 0;
+  cache.delete(etag);
+  addBytes(-representation.bytes);
+  return representation.bytes;
+};
+
+const addBytes = (bytes: number) => {
+  cachedBytes += bytes;
+  memoryGovernorService.trackCache(bytes);
+};
+
+const evict = () => {
+  while (cachedBytes > maxCacheBytes && cache.size > 0) {
+    remove(cache.keys().next().value as string);
+  }
+};
+
+// 内存压力时按LRU顺序释放，扣除已释放的字节数，其余由后面的监听者释放
+memoryGovernorService.on('memory-pressure', (request: { bytes: number }) => {
+  while (request.bytes > 0 && cache.size > 0) {
+    request.bytes -= remove(cache.keys().next().value as string);
+  }
+});
+
+/**
+ * 获取压缩后的表示，同一版本只压缩一次
+ */
+const getEncoded = async (representation: Representation, encoding: Encoding): Promise<Buffer> => {
+  const cached = representation.encoded.get(encoding);
+  if (cached) return cached;
+
+  const etag = representation.etag;
+  return compressions.do(`${etag}|${encoding}`, async () => {
+    const encoded = encoding === 'br'
+      ? await brotliCompressAsync(representation.body, {
+        params: {
+          [zlib.constants.BROTLI_PARAM_QUALITY]: BROTLI_QUALITY,
+          [zlib.constants.BROTLI_PARAM_SIZE_HINT]: representation.body.length
+        }
+      })
+      : await gzipAsync(representation.body);
+    representation.encoded.set(encoding, encoded);
+    // 仍在缓存中时计入压缩版本的大小
+    if (cache.get(etag) === representation) {
+      representation.bytes += encoded.length;
+      addBytes(encoded.length);
+      evict();
+    }
+    return encoded;
+  });
+};
+
+/**
+ * 按版本发送JSON响应，格式与responseUtils.success一致
+ * 请求的If-None-Match与版本一致时直接返回304，不调用build；
+ * 否则复用缓存的序列化结果和压缩版本，并支持单个字节范围的Range请求（按未压缩的序列化内容计算）
+ * 资源可能在计算ETag之后、build读取之前发生变化，响应和缓存使用build返回的ETag，与实际发送的内容一致
+ * @param req Express请求对象
+ * @param res Express响应对象
+ * @param etag 请求时资源版本的ETag，见createETag
+ * @param build 生成响应数据并返回其版本的ETag，只在缓存未命中时调用，接收所有请求都取消后才中止的信号
+ * @param signal 当前请求的取消信号
+ */
+export const sendCached = async (
+  req: Request,
+  res: Response,
+  etag: string,
+  build: (signal: AbortSignal) => Promise<BuildResult>,
+  signal?: AbortSignal
+) => {
+  res.setHeader('Cache-Control', 'no-cache');
+  res.vary('Accept-Encoding');
+
+  const matched = matchIfNoneMatch(req.headers['if-none-match'], etag);
+  if (matched) {
+    httpCacheRequests.inc({ result: 'not_modified' });
+    res.setHeader('ETag', matched);
+    res.status(304).end();
+    return;
+  }
+
+  let representation = lookup(etag);
+  httpCacheRequests.inc({ result: representation ? 'hit' : 'miss' });
+  if (!representation) {
+    representation = await builds.do(etag, async buildSignal => {
+      const built = await build(buildSignal);
+      const body = Buffer.from(JSON.stringify({ code: 200, message: '操作成功', data: built.data }), 'utf8');
+      const created: Representation = { etag: built.etag, body, encoded: new Map(), bytes: body.length };
+      store(created);
+      return created;
+    }, signal);
+  }
+
+  const body = representation.body;
+  const currentTag = representation.etag;
+  res.setHeader('Accept-Ranges', 'bytes');
+  res.type('application/json; charset=utf-8');
+
+  // Range请求按未压缩的内容处理，If-Range与当前版本不一致时返回完整内容
+  const ifRange = req.headers['if-range'];
+  if (req.headers.range && (!ifRange || ifRange === currentTag)) {
+    const ranges = req.range(body.length, { combine: true });
+    if (ranges === -1) {
+      res.setHeader('ETag', currentTag);
+      res.setHeader('Content-Range', `bytes */${body.length}`);
+      res.status(416).end();
+      return;
+    }
+    // 只支持单个范围，多个范围或无法解析时返回完整内容
+    if (Array.isArray(ranges) && ranges.type === 'bytes' && ranges.length === 1) {
+      const { start, end } = ranges[0];
+      res.setHeader('ETag', currentTag);
+      res.setHeader('Content-Range', `bytes ${start}-${end}/${body.length}`);
+      res.setHeader('Content-Length', end - start + 1);
+      res.status(206).end(body.subarray(start, end + 1));
+      return;
+    }
+  }
+
+  let encoding: Encoding = 'identity';
+  if (body.length >= COMPRESS_MIN_BYTES) {
+    const accepted = req.acceptsEncodings('br', 'gzip', 'identity');
+    if (accepted === 'br' || accepted === 'gzip') encoding = accepted;
+  }
+
+  let payload = body;
+  if (encoding !== 'identity') {
+    try {
+      payload = await getEncoded(representation, encoding);
+      res.setHeader('Content-Encoding', encoding);
+    } catch (err) {
+      logger.warn(`压缩响应失败，发送未压缩内容: ${(err as Error).message}`);
+      encoding = 'identity';
+    }
+  }
+
+  res.setHeader('ETag', encodingTag(currentTag, encoding));
+  res.setHeader('Content-Length', payload.length);
+  res.status(200).end(payload);
+};
+
+/**
+ * 获取响应缓存的统计信息
+ */
+export const getStats = () => ({
+  entries: cache.size,
+  bytes: cachedBytes,
+  maxBytes: maxCacheBytes
+});
+
+export default {
+  createETag,
+  sendCached,
+  getStats
+};
@@ -0,0 +1,253 @@
+import { AsyncLocalStorage } from 'async_hooks';
+import { monitorEventLoopDelay } from 'perf_hooks';
+
+// 标签集合
+export type Labels = Record<string, string | number>;
+
+// 默认的耗时分桶（秒）
+const DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30];
+
+/**
+ * 将标签序列化为Prometheus格式，同时作为内部的键
+ */
+const formatLabels = (labels: Labels = {}): string => {
+  const keys = Object.keys(labels).sort();
+  if (keys.length === 0) return '';
+  const parts = keys.map(key => {
+    const value = String(labels[key]).replace(/\\/g, '\\\\').replace(/\n/g, '\\n').replace(/"/g, '\\"');
+    return `${key}="${value}"`;
+  });
+  return `{${parts.join(',')}}`;
+};
+
+/**
+ * 在已有标签后追加标签
+ */
+const appendLabel = (formatted: string, key: string, value: string): string => {
+  const extra = `${key}="${value}"`;
+  return formatted ? `${formatted.slice(0, -1)},${extra}}` : `{${extra}}`;
+};
+
+/**
+ * 计数器，只增不减
+ */
+export class Counter {
+  public readonly name: string;
+  public readonly help: string;
+  private values = new Map<string, number>();
+
+  constructor(name: string, help: string) {
+    this.name = name;
+    this.help = help;
+  }
+
+  public inc(labels?: Labels, value = 1) {
+    const key = formatLabels(labels);
+    this.values.set(key, (this.values.get(key) || 0) + value);
+  }
+
+  public render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+    this.values.forEach((value, key) => lines.push(`${this.name}${key} ${value}`));
+    return lines;
+  }
+}
+
+/**
+ * 仪表，记录当前值
+ */
+export class Gauge {
+  public readonly name: string;
+  public readonly help: string;
+  private values = new Map<string, number>();
+
+  constructor(name: string, help: string) {
+    this.name = name;
+    this.help = help;
+  }
+
+  public set(value: number, labels?: Labels) {
+    this.values.set(formatLabels(labels), value);
+  }
+
+  public inc(labels?: Labels, value = 1) {
+    const key = formatLabels(labels);
+    this.values.set(key, (this.values.get(key) || 0) + value);
+  }
+
+  public dec(labels?: Labels, value = 1) {
+    this.inc(labels, -value);
+  }
+
+  public get(labels?: Labels): number {
+    return this.values.get(formatLabels(labels)) || 0;
+  }
+
+  public render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} gauge`];
+    this.values.forEach((value, key) => lines.push(`${this.name}${key} ${value}`));
+    return lines;
+  }
+}
+
+/**
+ * 直方图，按分桶统计观测值的分布
+ */
+export class Histogram {
+  public readonly name: string;
+  public readonly help: string;
+  private buckets: number[];
+  private series = new Map<string, { counts: number[]; sum: number; count: number }>();
+
+  constructor(name: string, help: string, buckets = DEFAULT_BUCKETS) {
+    this.name = name;
+    this.help = help;
+    this.buckets = buckets;
+  }
+
+  public observe(value: number, labels?: Labels) {
+    const key = formatLabels(labels);
+    let entry = this.series.get(key);
+    if (!entry) {
+      entry = { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+      this.series.set(key, entry);
+    }
+    for (let i = 0; i < this.buckets.length; i++) {
+      if (value <= this.buckets[i]) entry.counts[i]++;
+    }
+    entry.sum += value;
+    entry.count++;
+  }
+
+  /**
+   * 开始计时
+   * @param labels 标签
+   * @returns 结束计时的函数，返回耗时（秒）
+   */
+  public startTimer(labels?: Labels): (extraLabels?: Labels) => number {
+    const start = process.hrtime.bigint();
+    return (extraLabels?: Labels) => {
+      const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+      this.observe(seconds, { ...labels, ...extraLabels });
+      return seconds;
+    };
+  }
+
+  public render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+    this.series.forEach((entry, key) => {
+      this.buckets.forEach((bucket, i) => {
+        lines.push(`${this.name}_bucket${appendLabel(key, 'le', String(bucket))} ${entry.counts[i]}`);
+      });
+      lines.push(`${this.name}_bucket${appendLabel(key, 'le', '+Inf')} ${entry.count}`);
+      lines.push(`${this.name}_sum${key} ${entry.sum}`);
+      lines.push(`${this.name}_count${key} ${entry.count}`);
+    });
+    return lines;
+  }
+}
+
+// 已注册的指标
+const registry: Array<Counter | Gauge | Histogram> = [];
+
+const register = <T extends Counter | Gauge | Histogram>(metric: T): T => {
+  registry.push(metric);
+  return metric;
+};
+
+export const counter = (name: string, help: string) => register(new Counter(name, help));
+export const gauge = (name: string, help: string) => register(new Gauge(name, help));
+export const histogram = (name: string, help: string, buckets?: number[]) => register(new Histogram(name, help, buckets));
+
+// 事件循环延迟与进程内存
+const eventLoopDelay = monitorEventLoopDelay({ resolution: 20 });
+eventLoopDelay.enable();
+const eventLoopLag = gauge('nodejs_eventloop_lag_seconds', '自上次采集以来的事件循环延迟');
+const heapBytes = gauge('nodejs_heap_bytes', 'V8堆内存');
+const residentBytes = gauge('process_resident_memory_bytes', '进程常驻内存');
+
+/**
+ * 采集进程级指标，事件循环延迟在每次采集后重置
+ */
+const collectProcessMetrics = () => {
+  if (eventLoopDelay.count > 0) {
+    eventLoopLag.set(eventLoopDelay.percentile(50) / 1e9, { quantile: '0.5' });
+    eventLoopLag.set(eventLoopDelay.percentile(99) / 1e9, { quantile: '0.99' });
+    eventLoopLag.set(eventLoopDelay.max / 1e9, { quantile: '1' });
+  }
+  eventLoopDelay.reset();
+
+  const memory = process.memoryUsage();
+  heapBytes.set(memory.heapUsed, { type: 'used' });
+  heapBytes.set(memory.heapTotal, { type: 'total' });
+  residentBytes.set(memory.rss);
+};
+
+/**
+ * 以Prometheus文本格式输出所有指标
+ */
+export const renderMetrics = (): string => {
+  collectProcessMetrics();
+  const lines: string[] = [];
+  registry.forEach(metric => lines.push(...metric.render()));
+  return `${lines.join('\n')}\n`;
+};
+
+// 单个请求的资源消耗，跨异步调用传递
+export interface RequestStats {
+  parseMs: number;
+  bytesRead: number;
+  rowsProduced: number;
+  cacheHits: number;
+  cacheMisses: number;
+}
+
+const requestStorage = new AsyncLocalStorage<RequestStats>();
+
+/**
+ * 在请求上下文中执行回调
+ * @param callback 回调函数
+ * @returns 本次请求的统计对象
+ */
+export const runWithRequestStats = (callback: () => void): RequestStats => {
+  const stats: RequestStats = { parseMs: 0, bytesRead: 0, rowsProduced: 0, cacheHits: 0, cacheMisses: 0 };
+  requestStorage.run(stats, callback);
+  return stats;
+};
+
+/**
+ * 获取当前请求的统计对象，不在请求上下文中时返回undefined
+ */
+export const getRequestStats = (): RequestStats | undefined => requestStorage.getStore();
+
+// 各模块共用的指标
+export const httpRequestDuration = histogram('http_request_duration_seconds', 'HTTP请求耗时');
+export const httpRequestsInFlight = gauge('http_requests_in_flight', '正在处理的HTTP请求数');
+export const parsePhaseDuration = histogram('file_parse_phase_duration_seconds', '文件解析各阶段耗时 (read/parse/headers)');
+export const parsesTotal = counter('file_parses_total', '文件解析次数');
+export const parseBytesTotal = counter('file_parse_bytes_read_total', '解析时读取的字节数');
+export const parseRowsTotal = counter('file_parse_rows_total', '解析产生的行数');
+export const tableCacheRequests = counter('table_cache_requests_total', '表格缓存访问次数');
+export const contentHashRequests = counter('content_hash_requests_total', '文件内容哈希请求次数 (hit: 复用已计算的哈希, computed: 读取文件计算)');
+export const contentHashDuration = histogram('content_hash_duration_seconds', '计算文件内容哈希耗时');
+export const charsetDetections = counter('charset_detections_total', '文本文件编码检测次数 (source: bom/utf8/utf16/configured/gb18030/fallback/cached)');
+export const httpCacheRequests = counter('http_cache_requests_total', '按版本缓存的响应请求次数 (not_modified: 304, hit: 复用序列化结果, miss: 重新生成)');
+export const singleFlightRequests = counter('singleflight_requests_total', '合并并发请求的次数 (leader: 实际执行, coalesced: 共享结果, cancelled: 取消等待)');
+export const exportsTotal = counter('exports_total', '导出次数 (status: success/cancelled/error)');
+export const exportRowsTotal = counter('export_rows_total', '导出的行数');
+export const warmupFilesTotal = counter('warmup_files_total', '启动预热处理的文件数');
+export const directoryReadDuration = histogram('directory_read_duration_seconds', '读取目录耗时');
+export const directoryEntriesTotal = counter('directory_entries_total', '读取目录返回的条目数');
+export const visualizationIoDuration = histogram('visualization_io_duration_seconds', '可视化配置读写耗时');
+export const socketEmitsTotal = counter('socket_emits_total', 'WebSocket广播次数');
+export const socketEmitDuration = histogram('socket_emit_duration_seconds', 'WebSocket广播耗时', [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05]);
+export const socketClients = gauge('socket_connected_clients', '当前WebSocket连接数');
+
+export default {
+  counter,
+  gauge,
+  histogram,
+  renderMetrics,
+  runWithRequestStats,
+  getRequestStats
+};
@@ -4,11 +4,13 @@ import { Response } from 'express';
 export enum StatusCode {
   SUCCESS = 200,
   CREATED = 201,
+  ACCEPTED = 202,
   BAD_REQUEST = 400,
   UNAUTHORIZED = 401,
   FORBIDDEN = 403,
   NOT_FOUND = 404,
-  INTERNAL_ERROR = 500
+  INTERNAL_ERROR = 500,
+  SERVICE_UNAVAILABLE = 503
 }
 
 /**
@@ -87,11 +89,27 @@ export const serverError = (
   return error(res, message, StatusCode.INTERNAL_ERROR);
 };
 
+/**
+ * 服务暂不可用响应，客户端可稍后重试
+ * @param res Express响应对象
+ * @param message 错误消息
+ * @param retryAfter 建议的重试间隔（秒）
+ */
+export const serviceUnavailable = (
+  res: Response,
+  message = '服务器繁忙，请稍后重试',
+  retryAfter = 5
+) => {
+  res.setHeader('Retry-After', String(retryAfter));
+  return error(res, message, StatusCode.SERVICE_UNAVAILABLE);
+};
+
 export default {
   success,
   created,
   error,
   notFound,
   serverError,
+  serviceUnavailable,
   StatusCode
 }; 
\ No newline at end of file
@@ -0,0 +1,203 @@
+import { SingleFlight, CancelledError, throwIfCancelled } from './singleFlight';
+
+// 可以从外部完成的任务
+interface Deferred<T> {
+  promise: Promise<T>;
+  resolve: (value: T) => void;
+  reject: (err: Error) => void;
+}
+
+const defer = <T>(): Deferred<T> => {
+  let resolve!: (value: T) => void;
+  let reject!: (err: Error) => void;
+  const promise = new Promise<T>((res, rej) => {
+    resolve = res;
+    reject = rej;
+  });
+  return { promise, resolve, reject };
+};
+
+// 等待已排队的微任务执行完
+const settle = () => new Promise(resolve => setImmediate(resolve));
+
+describe('SingleFlight', () => {
+  let flights: SingleFlight<string>;
+
+  beforeEach(() => {
+    flights = new SingleFlight<string>('test');
+  });
+
+  it('相同键的并发调用只执行一次任务', async () => {
+    const deferred = defer<string>();
+    const task = jest.fn(() => deferred.promise);
+
+    const first = flights.do('k', task);
+    const second = flights.do('k', task);
+    await settle();
+    expect(task).toHaveBeenCalledTimes(1);
+    expect(flights.size).toBe(1);
+
+    deferred.resolve('value');
+    await expect(Promise.all([first, second])).resolves.toEqual(['value', 'value']);
+    expect(flights.size).toBe(0);
+  });
+
+  it('不同的键分别执行', async () => {
+    const task = jest.fn(async () => 'value');
+    await Promise.all([flights.do('a', task), flights.do('b', task)]);
+    expect(task).toHaveBeenCalledTimes(2);
+  });
+
+  it('任务结束后再次调用会重新执行', async () => {
+    const task = jest.fn(async () => 'value');
+    await flights.do('k', task);
+    await flights.do('k', task);
+    expect(task).toHaveBeenCalledTimes(2);
+  });
+
+  it('任务失败时所有调用方都收到错误，并释放键', async () => {
+    const deferred = defer<string>();
+    const first = flights.do('k', () => deferred.promise);
+    const second = flights.do('k', () => deferred.promise);
+
+    deferred.reject(new Error('解析失败'));
+    await expect(first).rejects.toThrow('解析失败');
+    await expect(second).rejects.toThrow('解析失败');
+    expect(flights.size).toBe(0);
+  });
+
+  it('任务同步抛出的异常也作为拒绝返回', async () => {
+    await expect(flights.do('k', () => {
+      throw new Error('同步错误');
+    })).rejects.toThrow('同步错误');
+    expect(flights.size).toBe(0);
+  });
+
+  it('信号已取消时直接拒绝，不执行任务', async () => {
+    const controller = new AbortController();
+    controller.abort();
+    const task = jest.fn(async () => 'value');
+
+    await expect(flights.do('k', task, controller.signal)).rejects.toThrow(CancelledError);
+    await settle();
+    expect(task).toHaveBeenCalledTimes(0);
+  });
+
+  it('单个调用方取消时只退出自己的等待，任务继续执行', async () => {
+    const deferred = defer<string>();
+    let taskSignal: AbortSignal | undefined;
+    const task = (signal: AbortSignal) => {
+      taskSignal = signal;
+      return deferred.promise;
+    };
+    const cancelling = new AbortController();
+
+    const cancelled = flights.do('k', task, cancelling.signal);
+    const waiting = flights.do('k', task, new AbortController().signal);
+    await settle();
+
+    cancelling.abort();
+    await expect(cancelled).rejects.toThrow(CancelledError);
+    expect(taskSignal?.aborted).toBe(false);
+
+    deferred.resolve('value');
+    await expect(waiting).resolves.toBe('value');
+  });
+
+  it('所有调用方都取消后中止任务', async () => {
+    const deferred = defer<string>();
+    let taskSignal: AbortSignal | undefined;
+    const task = (signal: AbortSignal) => {
+      taskSignal = signal;
+      return deferred.promise;
+    };
+    const first = new AbortController();
+    const second = new AbortController();
+
+    const results = [flights.do('k', task, first.signal), flights.do('k', task, second.signal)];
+    await settle();
+
+    first.abort();
+    expect(taskSignal?.aborted).toBe(false);
+    second.abort();
+    expect(taskSignal?.aborted).toBe(true);
+    await expect(results[0]).rejects.toThrow(CancelledError);
+    await expect(results[1]).rejects.toThrow(CancelledError);
+  });
+
+  it('没有信号的调用方使任务不会被中止', async () => {
+    const deferred = defer<string>();
+    let taskSignal: AbortSignal | undefined;
+    const task = (signal: AbortSignal) => {
+      taskSignal = signal;
+      return deferred.promise;
+    };
+    const controller = new AbortController();
+
+    const cancelled = flights.do('k', task, controller.signal);
+    const waiting = flights.do('k', task);
+    await settle();
+
+    controller.abort();
+    await expect(cancelled).rejects.toThrow(CancelledError);
+    expect(taskSignal?.aborted).toBe(false);
+
+    deferred.resolve('value');
+    await expect(waiting).resolves.toBe('value');
+  });
+
+  it('中止后仍在执行的任务结束前，新的调用不会同时执行第二份', async () => {
+    const deferreds = [defer<string>(), defer<string>()];
+    let running = 0;
+    let maxRunning = 0;
+    let calls = 0;
+    const task = async (signal: AbortSignal) => {
+      const deferred = deferreds[calls++];
+      running++;
+      maxRunning = Math.max(maxRunning, running);
+      try {
+        const value = await deferred.promise;
+        throwIfCancelled(signal);
+        return value;
+      } finally {
+        running--;
+      }
+    };
+
+    const controller = new AbortController();
+    const abandoned = flights.do('k', task, controller.signal);
+    await settle();
+    controller.abort();
+    await expect(abandoned).rejects.toThrow(CancelledError);
+
+    // 中止的任务仍在执行，新的调用等待它结束
+    const retried = flights.do('k', task);
+    await settle();
+    expect(calls).toBe(1);
+    expect(flights.size).toBe(1);
+
+    // 中止的任务因取消而失败后，新的调用重新执行任务
+    deferreds[0].resolve('stale');
+    await settle();
+    expect(calls).toBe(2);
+    deferreds[1].resolve('fresh');
+    await expect(retried).resolves.toBe('fresh');
+    expect(maxRunning).toBe(1);
+  });
+
+  it('中止后的任务仍然成功完成时，新的调用复用其结果', async () => {
+    const deferred = defer<string>();
+    const task = jest.fn(() => deferred.promise);
+
+    const controller = new AbortController();
+    const abandoned = flights.do('k', task, controller.signal);
+    await settle();
+    controller.abort();
+    await expect(abandoned).rejects.toThrow(CancelledError);
+
+    const reused = flights.do('k', task);
+    deferred.resolve('value');
+    await expect(reused).resolves.toBe('value');
+    expect(task).toHaveBeenCalledTimes(1);
+  });
+});
@@ -0,0 +1,127 @@
+import { singleFlightRequests } from './metrics';
+
+/**
+ * 调用方已取消等待
+ */
+export class CancelledError extends Error {
+  constructor(message = '请求已取消') {
+    super(message);
+    this.name = 'CancelledError';
+  }
+}
+
+/**
+ * 信号已中止时抛出CancelledError，供长任务在阶段之间检查
+ * @param signal 中止信号
+ */
+export const throwIfCancelled = (signal?: AbortSignal) => {
+  if (signal && signal.aborted) {
+    throw new CancelledError();
+  }
+};
+
+// 执行中的任务
+interface Flight<T> {
+  promise: Promise<T>;
+  controller: AbortController;
+  // 仍在等待结果的调用方数量
+  waiters: number;
+}
+
+/**
+ * 合并相同键的并发调用：键相同的任务执行期间，后续调用共享同一个Promise，结果分发给所有调用方
+ * 每个调用方可以通过自己的信号单独取消等待，所有调用方都取消后中止任务
+ * 任务在结束前一直保留，中止后仍在执行的任务也会被后续调用复用，不会同时执行两份
+ */
+export class SingleFlight<T> {
+  private flights = new Map<string, Flight<T>>();
+
+  /**
+   * @param name 名称，用作指标标签
+   */
+  constructor(private readonly name: string) {}
+
+  /**
+   * 执行任务，已有相同键的任务在执行时直接等待其结果
+   * @param key 任务键
+   * @param task 任务函数，接收所有调用方都取消后才中止的信号
+   * @param signal 当前调用方的取消信号
+   * @returns 任务结果
+   */
+  public do(key: string, task: (signal: AbortSignal) => Promise<T>, signal?: AbortSignal): Promise<T> {
+    if (signal && signal.aborted) {
+      return Promise.reject(new CancelledError());
+    }
+
+    let flight = this.flights.get(key);
+    if (flight && flight.controller.signal.aborted) {
+      // 已中止但尚未结束的任务：等待其结束，完成时复用结果，因中止而失败时重新执行
+      flight.waiters++;
+      singleFlightRequests.inc({ name: this.name, result: 'coalesced' });
+      return this.wait(flight, signal).catch(err => {
+        if (err instanceof CancelledError && !(signal && signal.aborted)) {
+          return this.do(key, task, signal);
+        }
+        throw err;
+      });
+    }
+    if (flight) {
+      singleFlightRequests.inc({ name: this.name, result: 'coalesced' });
+    } else {
+      const controller = new AbortController();
+      const created: Flight<T> = {
+        promise: Promise.resolve().then(() => task(controller.signal)).finally(() => {
+          if (this.flights.get(key) === created) {
+            this.flights.delete(key);
+          }
+        }),
+        controller,
+        waiters: 0
+      };
+      flight = created;
+      this.flights.set(key, flight);
+      singleFlightRequests.inc({ name: this.name, result: 'leader' });
+    }
+
+    flight.waiters++;
+    return this.wait(flight, signal);
+  }
+
+  /**
+   * 当前执行中的任务数
+   */
+  public get size(): number {
+    return this.flights.size;
+  }
+
+  /**
+   * 等待任务结果，调用方取消时单独退出
+   */
+  private wait(flight: Flight<T>, signal?: AbortSignal): Promise<T> {
+    if (!signal) {
+      return flight.promise;
+    }
+
+    return new Promise<T>((resolve, reject) => {
+      const onAbort = () => {
+        flight.waiters--;
+        singleFlightRequests.inc({ name: this.name, result: 'cancelled' });
+        reject(new CancelledError());
+
+        // 没有调用方等待结果时中止任务，任务结束前仍保留在map中
+        if (flight.waiters === 0) {
+          flight.controller.abort();
+        }
+      };
+      signal.addEventListener('abort', onAbort, { once: true });
+
+      flight.promise.then(value => {
+        signal.removeEventListener('abort', onAbort);
+        resolve(value);
+      }, err => {
+        signal.removeEventListener('abort', onAbort);
+        reject(err);
+      });
+    });
+  }
+}
@@ -0,0 +1,156 @@
+import { parseQuery, SqlSyntaxError, Expr } from './sqlParser';
+
+describe('parseQuery', () => {
+  it('解析完整的SELECT语句', () => {
+    const query = parseQuery(
+      "SELECT DISTINCT region, SUM(amount) AS total FROM 'sales/*.csv' s " +
+      "WHERE amount > 10 GROUP BY region HAVING COUNT(*) > 1 ORDER BY total DESC, region LIMIT 10 OFFSET 5"
+    );
+
+    expect(query.selects).toHaveLength(1);
+    const stmt = query.selects[0];
+    expect(stmt.distinct).toBe(true);
+    expect(stmt.from).toEqual({ pattern: 'sales/*.csv', alias: 's' });
+    expect(stmt.items[0]).toEqual({ expr: { kind: 'column', name: 'region' }, alias: undefined });
+    expect(stmt.items[1]).toEqual({
+      expr: { kind: 'call', name: 'SUM', args: [{ kind: 'column', name: 'amount' }], distinct: false, star: false },
+      alias: 'total'
+    });
+    expect(stmt.where).toEqual({
+      kind: 'binary',
+      op: '>',
+      left: { kind: 'column', name: 'amount' },
+      right: { kind: 'literal', value: 10 }
+    });
+    expect(stmt.groupBy).toEqual([{ kind: 'column', name: 'region' }]);
+    expect(stmt.having).toMatchObject({ kind: 'binary', op: '>', left: { kind: 'call', name: 'COUNT', star: true } });
+    expect(query.orderBy.map(item => item.desc)).toEqual([true, false]);
+    expect(query.limit).toBe(10);
+    expect(query.offset).toBe(5);
+  });
+
+  it('支持MySQL风格的 LIMIT offset, count', () => {
+    const query = parseQuery("SELECT * FROM 'a.csv' LIMIT 20, 10");
+    expect(query.offset).toBe(20);
+    expect(query.limit).toBe(10);
+  });
+
+  it('AND 的优先级高于 OR，NOT 作用于整个比较', () => {
+    const where = parseQuery("SELECT * FROM 'a.csv' WHERE NOT a = 1 OR b = 2 AND c = 3").selects[0].where as Expr;
+    expect(where).toMatchObject({
+      kind: 'binary',
+      op: 'OR',
+      left: { kind: 'unary', op: 'NOT', operand: { kind: 'binary', op: '=' } },
+      right: { kind: 'binary', op: 'AND' }
+    });
+  });
+
+  it('乘除的优先级高于加减，一元负号作用于最近的操作数', () => {
+    const item = parseQuery("SELECT 1 + 2 * -x FROM 'a.csv'").selects[0].items[0].expr;
+    expect(item).toEqual({
+      kind: 'binary',
+      op: '+',
+      left: { kind: 'literal', value: 1 },
+      right: {
+        kind: 'binary',
+        op: '*',
+        left: { kind: 'literal', value: 2 },
+        right: { kind: 'unary', op: '-', operand: { kind: 'column', name: 'x' } }
+      }
+    });
+  });
+
+  it('解析 IN、BETWEEN、LIKE、IS NULL 及其否定形式', () => {
+    const where = parseQuery(
+      "SELECT * FROM 'a.csv' WHERE a NOT IN (1, 2) AND b BETWEEN 1 AND 5 AND c NOT LIKE 'x%' AND d IS NOT NULL"
+    ).selects[0].where as Expr;
+    const conjuncts: Expr[] = [];
+    const collect = (expr: Expr) => {
+      if (expr.kind === 'binary' && expr.op === 'AND') {
+        collect(expr.left);
+        collect(expr.right);
+      } else {
+        conjuncts.push(expr);
+      }
+    };
+    collect(where);
+
+    expect(conjuncts.map(expr => expr.kind)).toEqual(['in', 'between', 'like', 'isNull']);
+    expect(conjuncts[0]).toMatchObject({ negated: true, list: [{ value: 1 }, { value: 2 }] });
+    expect(conjuncts[1]).toMatchObject({ negated: false, low: { value: 1 }, high: { value: 5 } });
+    expect(conjuncts[2]).toMatchObject({ negated: true, pattern: { value: 'x%' } });
+    expect(conjuncts[3]).toMatchObject({ negated: true });
+  });
+
+  it('!= 统一为 <>', () => {
+    const where = parseQuery("SELECT * FROM 'a.csv' WHERE a != 1").selects[0].where;
+    expect(where).toMatchObject({ kind: 'binary', op: '<>' });
+  });
+
+  it('解析 JOIN 及其类型', () => {
+    const stmt = parseQuery(
+      "SELECT s.*, p.category FROM 'sales.csv' s LEFT OUTER JOIN 'products.csv' p ON s.id = p.id JOIN 'c.csv' AS c ON c.id = s.id"
+    ).selects[0];
+
+    expect(stmt.items[0].expr).toEqual({ kind: 'star', table: 's' });
+    expect(stmt.items[1].expr).toEqual({ kind: 'column', table: 'p', name: 'category' });
+    expect(stmt.joins.map(join => [join.type, join.source.alias])).toEqual([['LEFT', 'p'], ['INNER', 'c']]);
+    expect(stmt.joins[0].on).toEqual({
+      kind: 'binary',
+      op: '=',
+      left: { kind: 'column', table: 's', name: 'id' },
+      right: { kind: 'column', table: 'p', name: 'id' }
+    });
+  });
+
+  it('记录每个 UNION 是否为 UNION ALL', () => {
+    const query = parseQuery("SELECT a FROM 'x.csv' UNION SELECT a FROM 'y.csv' UNION ALL SELECT a FROM 'z.csv' ORDER BY a");
+    expect(query.selects).toHaveLength(3);
+    expect(query.unionAll).toEqual([false, true]);
+    expect(query.orderBy).toHaveLength(1);
+  });
+
+  it('支持带引号的标识符、中文列名、转义的单引号和注释', () => {
+    const stmt = parseQuery(
+      "SELECT \"销售 额\", `地区`, [备注], 名称 FROM 'a.csv' -- 注释\nWHERE 名称 = 'O''Brien'"
+    ).selects[0];
+
+    expect(stmt.items.map(item => (item.expr as { name: string }).name)).toEqual(['销售 额', '地区', '备注', '名称']);
+    expect(stmt.where).toMatchObject({ right: { kind: 'literal', value: "O'Brien" } });
+  });
+
+  it('函数名转为大写，解析 COUNT(DISTINCT x) 和字面量', () => {
+    const items = parseQuery("SELECT count(DISTINCT a), coalesce(b, NULL, TRUE, 1.5e2) FROM 'a.csv'").selects[0].items;
+    expect(items[0].expr).toMatchObject({ kind: 'call', name: 'COUNT', distinct: true });
+    expect(items[1].expr).toMatchObject({
+      kind: 'call',
+      name: 'COALESCE',
+      args: [{ kind: 'column' }, { value: null }, { value: true }, { value: 150 }]
+    });
+  });
+
+  it('选择列可以省略 AS 指定别名', () => {
+    const items = parseQuery("SELECT a total, b AS 'B' FROM 'a.csv'").selects[0].items;
+    expect(items.map(item => item.alias)).toEqual(['total', 'B']);
+  });
+
+  it.each([
+    ["SELECT FROM 'a.csv'", '意外的 "FROM"'],
+    ["SELECT a FROM 'a.csv' WHERE", '意外的 "结尾"'],
+    ["SELECT a FROM 'a.csv", '字符串未闭合'],
+    ["SELECT \"a FROM 'a.csv'", '标识符未闭合'],
+    ["SELECT a FROM 'a.csv' LIMIT -1", '需要非负整数'],
+    ["SELECT a FROM 'a.csv' LIMIT 1.5", '需要非负整数'],
+    ["SELECT a FROM 'a.csv' WHERE a NOT = 1", 'NOT 后需要 LIKE、IN 或 BETWEEN'],
+    ["SELECT a FROM 'a.csv' extra tokens", '多余的内容 "tokens"'],
+    ["SELECT a FROM 1", 'FROM/JOIN 后需要文件路径'],
+    ["SELECT a # b FROM 'a.csv'", '无法识别的字符 "#"']
+  ])('语法错误: %s', (sql, message) => {
+    expect(() => parseQuery(sql)).toThrow(SqlSyntaxError);
+    expect(() => parseQuery(sql)).toThrow(message);
+  });
+
+  it('错误信息包含出错位置', () => {
+    expect(() => parseQuery("SELECT a FROM 'a.csv' WHERE a NOT = 1")).toThrow('位置 34');
+  });
+});
@@ -0,0 +1,573 @@
+/**
+ * SQL子集解析器
+ * 支持: SELECT [DISTINCT] ... FROM '文件或通配符' [别名]
+ *       [[INNER|LEFT] JOIN '文件' 别名 ON ...] [WHERE ...] [GROUP BY ...] [HAVING ...]
+ *       [UNION [ALL] SELECT ...] [ORDER BY ...] [LIMIT n [OFFSET m]]
+ */
+
+// 表达式节点
+export type Expr =
+  | { kind: 'literal'; value: any }
+  | { kind: 'column'; table?: string; name: string }
+  | { kind: 'star'; table?: string }
+  | { kind: 'unary'; op: 'NOT' | '-'; operand: Expr }
+  | { kind: 'binary'; op: string; left: Expr; right: Expr }
+  | { kind: 'call'; name: string; args: Expr[]; distinct: boolean; star: boolean }
+  | { kind: 'in'; operand: Expr; list: Expr[]; negated: boolean }
+  | { kind: 'between'; operand: Expr; low: Expr; high: Expr; negated: boolean }
+  | { kind: 'like'; operand: Expr; pattern: Expr; negated: boolean }
+  | { kind: 'isNull'; operand: Expr; negated: boolean };
+
+export interface SelectItem {
+  expr: Expr;
+  alias?: string;
+}
+
+export interface TableSource {
+  pattern: string;
+  alias?: string;
+}
+
+export interface JoinClause {
+  type: 'INNER' | 'LEFT';
+  source: TableSource;
+  on: Expr;
+}
+
+export interface SelectStatement {
+  distinct: boolean;
+  items: SelectItem[];
+  from: TableSource;
+  joins: JoinClause[];
+  where?: Expr;
+  groupBy: Expr[];
+  having?: Expr;
+}
+
+export interface OrderItem {
+  expr: Expr;
+  desc: boolean;
+}
+
+export interface Query {
+  selects: SelectStatement[];
+  // unionAll[i] 表示 selects[i] 与 selects[i + 1] 之间是否为 UNION ALL
+  unionAll: boolean[];
+  orderBy: OrderItem[];
+  limit?: number;
+  offset?: number;
+}
+
+// 聚合函数
+export const AGGREGATE_FUNCTIONS = new Set(['COUNT', 'SUM', 'AVG', 'MIN', 'MAX']);
+
+const KEYWORDS = new Set([
+  'SELECT', 'DISTINCT', 'FROM', 'WHERE', 'GROUP', 'BY', 'HAVING', 'ORDER', 'ASC', 'DESC',
+  'LIMIT', 'OFFSET', 'UNION', 'ALL', 'JOIN', 'INNER', 'LEFT', 'OUTER', 'ON', 'AS',
+  'AND', 'OR', 'NOT', 'IN', 'IS', 'NULL', 'LIKE', 'BETWEEN', 'TRUE', 'FALSE'
+]);
+
+type TokenType = 'keyword' | 'ident' | 'string' | 'number' | 'op' | 'eof';
+
+interface Token {
+  type: TokenType;
+  value: string;
+  pos: number;
+}
+
+/**
+ * SQL语法错误
+ */
+export class SqlSyntaxError extends Error {
+  constructor(message: string, pos: number) {
+    super(`SQL语法错误(位置 ${pos}): ${message}`);
+    this.name = 'SqlSyntaxError';
+  }
+}
+
+/**
+ * 词法分析
+ * @param sql SQL文本
+ * @returns 词法单元数组
+ */
+const tokenize = (sql: string): Token[] => {
+  const tokens: Token[] = [];
+  let i = 0;
+
+  while (i < sql.length) {
+    const ch = sql[i];
+
+    if (/\s/.test(ch)) {
+      i++;
+      continue;
+    }
+
+    // 行注释
+    if (ch === '-' && sql[i + 1] === '-') {
+      while (i < sql.length && sql[i] !== '\n') i++;
+      continue;
+    }
+
+    const start = i;
+
+    // 字符串字面量，'' 表示转义的单引号
+    if (ch === '\'') {
+      let value = '';
+      i++;
+      while (true) {
+        if (i >= sql.length) throw new SqlSyntaxError('字符串未闭合', start);
+        if (sql[i] === '\'') {
+          if (sql[i + 1] === '\'') {
+            value += '\'';
+            i += 2;
+            continue;
+          }
+          i++;
+          break;
+        }
+        value += sql[i++];
+      }
+      tokens.push({ type: 'string', value, pos: start });
+      continue;
+    }
+
+    // 带引号的标识符，支持 "列名"、`列名` 和 [列名]
+    if (ch === '"' || ch === '`' || ch === '[') {
+      const close = ch === '[' ? ']' : ch;
+      const end = sql.indexOf(close, i + 1);
+      if (end === -1) throw new SqlSyntaxError('标识符未闭合', start);
+      tokens.push({ type: 'ident', value: sql.slice(i + 1, end), pos: start });
+      i = end + 1;
+      continue;
+    }
+
+    // 数字
+    if (/[0-9]/.test(ch) || (ch === '.' && /[0-9]/.test(sql[i + 1] || ''))) {
+      const match = /^(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?/.exec(sql.slice(i));
+      const text = match ? match[0] : ch;
+      tokens.push({ type: 'number', value: text, pos: start });
+      i += text.length;
+      continue;
+    }
+
+    // 标识符或关键字，允许中文等Unicode字符
+    if (/[\p{L}_$]/u.test(ch)) {
+      const match = /^[\p{L}\p{N}_$]+/u.exec(sql.slice(i));
+      const text = match ? match[0] : ch;
+      const upper = text.toUpperCase();
+      if (KEYWORDS.has(upper)) {
+        tokens.push({ type: 'keyword', value: upper, pos: start });
+      } else {
+        tokens.push({ type: 'ident', value: text, pos: start });
+      }
+      i += text.length;
+      continue;
+    }
+
+    // 运算符
+    const two = sql.slice(i, i + 2);
+    if (['<=', '>=', '<>', '!=', '||'].includes(two)) {
+      tokens.push({ type: 'op', value: two, pos: start });
+      i += 2;
+      continue;
+    }
+    if ('=<>+-*/%(),.;'.includes(ch)) {
+      tokens.push({ type: 'op', value: ch, pos: start });
+      i++;
+      continue;
+    }
+
+    throw new SqlSyntaxError(`无法识别的字符 "${ch}"`, start);
+  }
+
+  tokens.push({ type: 'eof', value: '', pos: sql.length });
+  return tokens;
+};
+
+/**
+ * 递归下降语法分析器
+ */
+class Parser {
+  private tokens: Token[];
+  private index = 0;
+
+  constructor(sql: string) {
+    this.tokens = tokenize(sql);
+  }
+
+  /**
+   * 解析完整查询
+   */
+  public parseQuery(): Query {
+    const selects: SelectStatement[] = [this.parseSelect()];
+    const unionAll: boolean[] = [];
+
+    while (this.acceptKeyword('UNION')) {
+      unionAll.push(this.acceptKeyword('ALL'));
+      selects.push(this.parseSelect());
+    }
+
+    const orderBy: OrderItem[] = [];
+    if (this.acceptKeyword('ORDER')) {
+      this.expectKeyword('BY');
+      do {
+        const expr = this.parseExpr();
+        let desc = false;
+        if (this.acceptKeyword('DESC')) {
+          desc = true;
+        } else {
+          this.acceptKeyword('ASC');
+        }
+        orderBy.push({ expr, desc });
+      } while (this.acceptOp(','));
+    }
+
+    let limit: number | undefined;
+    let offset: number | undefined;
+    if (this.acceptKeyword('LIMIT')) {
+      limit = this.parseNonNegativeInteger();
+      if (this.acceptKeyword('OFFSET')) {
+        offset = this.parseNonNegativeInteger();
+      } else if (this.acceptOp(',')) {
+        // MySQL风格: LIMIT offset, count
+        offset = limit;
+        limit = this.parseNonNegativeInteger();
+      }
+    }
+
+    this.acceptOp(';');
+    if (this.peek().type !== 'eof') {
+      throw new SqlSyntaxError(`多余的内容 "${this.peek().value}"`, this.peek().pos);
+    }
+
+    return { selects, unionAll, orderBy, limit, offset };
+  }
+
+  /**
+   * 解析单个SELECT语句
+   */
+  private parseSelect(): SelectStatement {
+    this.expectKeyword('SELECT');
+    const distinct = this.acceptKeyword('DISTINCT');
+    if (!distinct) this.acceptKeyword('ALL');
+
+    const items: SelectItem[] = [];
+    do {
+      items.push(this.parseSelectItem());
+    } while (this.acceptOp(','));
+
+    this.expectKeyword('FROM');
+    const from = this.parseTableSource();
+
+    const joins: JoinClause[] = [];
+    while (true) {
+      let type: 'INNER' | 'LEFT' | null = null;
+      if (this.acceptKeyword('LEFT')) {
+        this.acceptKeyword('OUTER');
+        this.expectKeyword('JOIN');
+        type = 'LEFT';
+      } else if (this.acceptKeyword('INNER')) {
+        this.expectKeyword('JOIN');
+        type = 'INNER';
+      } else if (this.acceptKeyword('JOIN')) {
+        type = 'INNER';
+      }
+      if (!type) break;
+
+      const source = this.parseTableSource();
+      this.expectKeyword('ON');
+      joins.push({ type, source, on: this.parseExpr() });
+    }
+
+    const where = this.acceptKeyword('WHERE') ? this.parseExpr() : undefined;
+
+    const groupBy: Expr[] = [];
+    if (this.acceptKeyword('GROUP')) {
+      this.expectKeyword('BY');
+      do {
+        groupBy.push(this.parseExpr());
+      } while (this.acceptOp(','));
+    }
+
+    const having = this.acceptKeyword('HAVING') ? this.parseExpr() : undefined;
+
+    return { distinct, items, from, joins, where, groupBy, having };
+  }
+
+  /**
+   * 解析选择列
+   */
+  private parseSelectItem(): SelectItem {
+    // * 或 别名.*
+    if (this.peekOp('*')) {
+      this.next();
+      return { expr: { kind: 'star' } };
+    }
+    const token = this.peek();
+    const after = this.tokens[this.index + 1];
+    const afterNext = this.tokens[this.index + 2];
+    if (token.type === 'ident' && after.type === 'op' && after.value === '.'
+      && afterNext.type === 'op' && afterNext.value === '*') {
+      this.index += 3;
+      return { expr: { kind: 'star', table: token.value } };
+    }
+
+    const expr = this.parseExpr();
+    let alias: string | undefined;
+    if (this.acceptKeyword('AS')) {
+      alias = this.expectIdentOrString();
+    } else if (this.peek().type === 'ident') {
+      alias = this.next().value;
+    }
+    return { expr, alias };
+  }
+
+  /**
+   * 解析数据源，文件路径或通配符使用字符串表示
+   */
+  private parseTableSource(): TableSource {
+    const token = this.next();
+    if (token.type !== 'string' && token.type !== 'ident') {
+      throw new SqlSyntaxError('FROM/JOIN 后需要文件路径，例如 \'sales/*.csv\'', token.pos);
+    }
+
+    let alias: string | undefined;
+    if (this.acceptKeyword('AS')) {
+      alias = this.expectIdent();
+    } else if (this.peek().type === 'ident') {
+      alias = this.next().value;
+    }
+    return { pattern: token.value, alias };
+  }
+
+  // 表达式，按优先级从低到高解析
+  private parseExpr(): Expr {
+    return this.parseOr();
+  }
+
+  private parseOr(): Expr {
+    let left = this.parseAnd();
+    while (this.acceptKeyword('OR')) {
+      left = { kind: 'binary', op: 'OR', left, right: this.parseAnd() };
+    }
+    return left;
+  }
+
+  private parseAnd(): Expr {
+    let left = this.parseNot();
+    while (this.acceptKeyword('AND')) {
+      left = { kind: 'binary', op: 'AND', left, right: this.parseNot() };
+    }
+    return left;
+  }
+
+  private parseNot(): Expr {
+    if (this.acceptKeyword('NOT')) {
+      return { kind: 'unary', op: 'NOT', operand: this.parseNot() };
+    }
+    return this.parseComparison();
+  }
+
+  private parseComparison(): Expr {
+    const left = this.parseAdditive();
+
+    const token = this.peek();
+    if (token.type === 'op' && ['=', '<>', '!=', '<', '<=', '>', '>='].includes(token.value)) {
+      this.next();
+      const op = token.value === '!=' ? '<>' : token.value;
+      return { kind: 'binary', op, left, right: this.parseAdditive() };
+    }
+
+    if (this.acceptKeyword('IS')) {
+      const negated = this.acceptKeyword('NOT');
+      this.expectKeyword('NULL');
+      return { kind: 'isNull', operand: left, negated };
+    }
+
+    const negated = this.acceptKeyword('NOT');
+    if (this.acceptKeyword('LIKE')) {
+      return { kind: 'like', operand: left, pattern: this.parseAdditive(), negated };
+    }
+    if (this.acceptKeyword('IN')) {
+      this.expectOp('(');
+      const list: Expr[] = [];
+      do {
+        list.push(this.parseExpr());
+      } while (this.acceptOp(','));
+      this.expectOp(')');
+      return { kind: 'in', operand: left, list, negated };
+    }
+    if (this.acceptKeyword('BETWEEN')) {
+      const low = this.parseAdditive();
+      this.expectKeyword('AND');
+      const high = this.parseAdditive();
+      return { kind: 'between', operand: left, low, high, negated };
+    }
+    if (negated) {
+      throw new SqlSyntaxError('NOT 后需要 LIKE、IN 或 BETWEEN', this.peek().pos);
+    }
+
+    return left;
+  }
+
+  private parseAdditive(): Expr {
+    let left = this.parseMultiplicative();
+    while (this.peekOp('+') || this.peekOp('-') || this.peekOp('||')) {
+      const op = this.next().value;
+      left = { kind: 'binary', op, left, right: this.parseMultiplicative() };
+    }
+    return left;
+  }
+
+  private parseMultiplicative(): Expr {
+    let left = this.parseUnary();
+    while (this.peekOp('*') || this.peekOp('/') || this.peekOp('%')) {
+      const op = this.next().value;
+      left = { kind: 'binary', op, left, right: this.parseUnary() };
+    }
+    return left;
+  }
+
+  private parseUnary(): Expr {
+    if (this.acceptOp('-')) {
+      return { kind: 'unary', op: '-', operand: this.parseUnary() };
+    }
+    this.acceptOp('+');
+    return this.parsePrimary();
+  }
+
+  private parsePrimary(): Expr {
+    const token = this.next();
+
+    switch (token.type) {
+      case 'number':
+        return { kind: 'literal', value: Number(token.value) };
+      case 'string':
+        return { kind: 'literal', value: token.value };
+      case 'keyword':
+        if (token.value === 'NULL') return { kind: 'literal', value: null };
+        if (token.value === 'TRUE') return { kind: 'literal', value: true };
+        if (token.value === 'FALSE') return { kind: 'literal', value: false };
+        break;
+      case 'op':
+        if (token.value === '(') {
+          const expr = this.parseExpr();
+          this.expectOp(')');
+          return expr;
+        }
+        break;
+      case 'ident': {
+        // 函数调用
+        if (this.acceptOp('(')) {
+          const name = token.value.toUpperCase();
+          if (this.acceptOp('*')) {
+            this.expectOp(')');
+            return { kind: 'call', name, args: [], distinct: false, star: true };
+          }
+          const distinct = this.acceptKeyword('DISTINCT');
+          const args: Expr[] = [];
+          if (!this.peekOp(')')) {
+            do {
+              args.push(this.parseExpr());
+            } while (this.acceptOp(','));
+          }
+          this.expectOp(')');
+          return { kind: 'call', name, args, distinct, star: false };
+        }
+        // 别名.列名
+        if (this.acceptOp('.')) {
+          return { kind: 'column', table: token.value, name: this.expectIdentOrString() };
+        }
+        return { kind: 'column', name: token.value };
+      }
+      default:
+        break;
+    }
+
+    throw new SqlSyntaxError(`意外的 "${token.value || '结尾'}"`, token.pos);
+  }
+
+  private parseNonNegativeInteger(): number {
+    const token = this.next();
+    const value = Number(token.value);
+    if (token.type !== 'number' || !Number.isInteger(value) || value < 0) {
+      throw new SqlSyntaxError('需要非负整数', token.pos);
+    }
+    return value;
+  }
+
+  // 词法单元辅助方法
+  private peek(): Token {
+    return this.tokens[this.index];
+  }
+
+  private next(): Token {
+    const token = this.tokens[this.index];
+    if (token.type !== 'eof') this.index++;
+    return token;
+  }
+
+  private peekOp(op: string): boolean {
+    const token = this.peek();
+    return token.type === 'op' && token.value === op;
+  }
+
+  private acceptOp(op: string): boolean {
+    if (this.peekOp(op)) {
+      this.index++;
+      return true;
+    }
+    return false;
+  }
+
+  private expectOp(op: string) {
+    if (!this.acceptOp(op)) {
+      throw new SqlSyntaxError(`需要 "${op}"`, this.peek().pos);
+    }
+  }
+
+  private acceptKeyword(keyword: string): boolean {
+    const token = this.peek();
+    if (token.type === 'keyword' && token.value === keyword) {
+      this.index++;
+      return true;
+    }
+    return false;
+  }
+
+  private expectKeyword(keyword: string) {
+    if (!this.acceptKeyword(keyword)) {
+      throw new SqlSyntaxError(`需要 ${keyword}`, this.peek().pos);
+    }
+  }
+
+  private expectIdent(): string {
+    const token = this.next();
+    if (token.type !== 'ident') {
+      throw new SqlSyntaxError('需要标识符', token.pos);
+    }
+    return token.value;
+  }
+
+  private expectIdentOrString(): string {
+    const token = this.next();
+    if (token.type !== 'ident' && token.type !== 'string') {
+      throw new SqlSyntaxError('需要标识符', token.pos);
+    }
+    return token.value;
+  }
+}
+
+/**
+ * 解析SQL查询
+ * @param sql SQL文本
+ * @returns 查询语法树
+ */
+export const parseQuery = (sql: string): Query => {
+  return new Parser(sql).parseQuery();
+};
+
+export default {
+  parseQuery,
+  AGGREGATE_FUNCTIONS
+};
@@ -0,0 +1,129 @@
+import zlib from 'zlib';
+import { ZipWriter } from './zipWriter';
+
+// 从ZIP文件中读出的条目
+interface ReadEntry {
+  name: string;
+  flags: number;
+  crc: number;
+  size: number;
+  compressedSize: number;
+  dosTime: number;
+  dosDate: number;
+  data: Buffer;
+  descriptor: { crc: number; compressedSize: number; size: number };
+}
+
+/**
+ * 按中央目录读取ZIP文件，同时校验本地文件头和数据描述符
+ */
+const readZip = (zip: Buffer): ReadEntry[] => {
+  const endOffset = zip.length - 22;
+  expect(zip.readUInt32LE(endOffset)).toBe(0x06054b50);
+  const count = zip.readUInt16LE(endOffset + 10);
+  const directorySize = zip.readUInt32LE(endOffset + 12);
+  let offset = zip.readUInt32LE(endOffset + 16);
+  expect(offset + directorySize).toBe(endOffset);
+
+  const entries: ReadEntry[] = [];
+  for (let i = 0; i < count; i++) {
+    expect(zip.readUInt32LE(offset)).toBe(0x02014b50);
+    const nameLength = zip.readUInt16LE(offset + 28);
+    const compressedSize = zip.readUInt32LE(offset + 20);
+    const localOffset = zip.readUInt32LE(offset + 42);
+    const name = zip.subarray(offset + 46, offset + 46 + nameLength).toString('utf8');
+
+    expect(zip.readUInt32LE(localOffset)).toBe(0x04034b50);
+    const localNameLength = zip.readUInt16LE(localOffset + 26);
+    expect(zip.subarray(localOffset + 30, localOffset + 30 + localNameLength).toString('utf8')).toBe(name);
+    const dataStart = localOffset + 30 + localNameLength;
+    const compressed = zip.subarray(dataStart, dataStart + compressedSize);
+    const descriptorOffset = dataStart + compressedSize;
+    expect(zip.readUInt32LE(descriptorOffset)).toBe(0x08074b50);
+
+    entries.push({
+      name,
+      flags: zip.readUInt16LE(offset + 8),
+      crc: zip.readUInt32LE(offset + 16),
+      size: zip.readUInt32LE(offset + 24),
+      compressedSize,
+      dosTime: zip.readUInt16LE(offset + 12),
+      dosDate: zip.readUInt16LE(offset + 14),
+      data: zlib.inflateRawSync(compressed),
+      descriptor: {
+        crc: zip.readUInt32LE(descriptorOffset + 4),
+        compressedSize: zip.readUInt32LE(descriptorOffset + 8),
+        size: zip.readUInt32LE(descriptorOffset + 12)
+      }
+    });
+    offset += 46 + nameLength;
+  }
+  return entries;
+};
+
+describe('ZipWriter', () => {
+  it('分块写入的条目解压后与原始内容一致', () => {
+    const writer = new ZipWriter();
+    const chunks = ['id,name\n', '1,张三\n', Buffer.from('2,李四\n'), ''];
+    const parts = [writer.startEntry('data.csv')];
+    chunks.forEach(chunk => parts.push(writer.write(chunk)));
+    parts.push(writer.endEntry(), writer.finish());
+
+    const [entry] = readZip(Buffer.concat(parts));
+    expect(entry.name).toBe('data.csv');
+    expect(entry.data.toString('utf8')).toBe('id,name\n1,张三\n2,李四\n');
+    expect(entry.size).toBe(entry.data.length);
+    expect(entry.descriptor).toEqual({ crc: entry.crc, compressedSize: entry.compressedSize, size: entry.size });
+  });
+
+  it('CRC32与标准校验值一致', () => {
+    const writer = new ZipWriter();
+    const zip = Buffer.concat([writer.addEntry('check.txt', '123456789'), writer.finish()]);
+    expect(readZip(zip)[0].crc).toBe(0xcbf43926);
+  });
+
+  it('多个条目的偏移和中央目录正确，文件名按UTF-8标记', () => {
+    const writer = new ZipWriter();
+    const large = 'x'.repeat(200000);
+    const zip = Buffer.concat([
+      writer.addEntry('xl/worksheets/sheet1.xml', large),
+      writer.addEntry('目录/说明.txt', '内容'),
+      writer.addEntry('empty.txt', ''),
+      writer.finish()
+    ]);
+
+    const entries = readZip(zip);
+    expect(entries.map(entry => entry.name)).toEqual(['xl/worksheets/sheet1.xml', '目录/说明.txt', 'empty.txt']);
+    expect(entries[0].data.toString()).toBe(large);
+    expect(entries[0].compressedSize).toBeLessThan(large.length);
+    expect(entries[1].data.toString('utf8')).toBe('内容');
+    expect(entries[2].data.length).toBe(0);
+    entries.forEach(entry => {
+      expect(entry.flags & 0x0800).toBe(0x0800);
+      expect(entry.flags & 0x0008).toBe(0x0008);
+    });
+  });
+
+  it('没有条目时只输出目录结束记录', () => {
+    const zip = new ZipWriter().finish();
+    expect(zip.length).toBe(22);
+    expect(readZip(zip)).toEqual([]);
+  });
+
+  it('按DOS格式记录修改时间', () => {
+    const writer = new ZipWriter(new Date(2024, 2, 15, 13, 45, 31));
+    const [entry] = readZip(Buffer.concat([writer.addEntry('a.txt', 'a'), writer.finish()]));
+    expect(entry.dosDate).toBe(((2024 - 1980) << 9) | (3 << 5) | 15);
+    expect(entry.dosTime).toBe((13 << 11) | (45 << 5) | 15);
+  });
+
+  it('条目未按顺序开始和结束时抛出异常', () => {
+    const writer = new ZipWriter();
+    expect(() => writer.write('a')).toThrow('没有正在写入的条目');
+    expect(() => writer.endEntry()).toThrow('没有正在写入的条目');
+
+    writer.startEntry('a.txt');
+    expect(() => writer.startEntry('b.txt')).toThrow('上一个条目尚未结束: a.txt');
+    expect(() => writer.finish()).toThrow('条目尚未结束: a.txt');
+  });
+});
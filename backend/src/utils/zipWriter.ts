@@ -0,0 +1,183 @@
+import zlib from 'zlib';
+
+// ZIP格式中32位字段的上限，本实现不写ZIP64扩展
+const MAX_ZIP32 = 0xffffffff;
+
+// 通用标志：第3位表示大小和CRC写在数据之后，第11位表示文件名为UTF-8
+const FLAG_DATA_DESCRIPTOR = 0x0008;
+const FLAG_UTF8 = 0x0800;
+const METHOD_DEFLATE = 8;
+const VERSION = 20;
+
+// CRC32查表
+const CRC_TABLE = (() => {
+  const table = new Uint32Array(256);
+  for (let n = 0; n < 256; n++) {
+    let c = n;
+    for (let k = 0; k < 8; k++) {
+      c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+    }
+    table[n] = c >>> 0;
+  }
+  return table;
+})();
+
+const updateCrc = (crc: number, data: Buffer): number => {
+  let c = crc ^ 0xffffffff;
+  for (let i = 0; i < data.length; i++) {
+    c = CRC_TABLE[(c ^ data[i]) & 0xff] ^ (c >>> 8);
+  }
+  return (c ^ 0xffffffff) >>> 0;
+};
+
+// 已写完的条目，用于生成中央目录
+interface ZipEntry {
+  name: Buffer;
+  crc: number;
+  compressedSize: number;
+  size: number;
+  offset: number;
+}
+
+/**
+ * 流式ZIP写入器，边写边输出，不在内存中保留条目内容
+ * 每块数据单独压缩并以同步刷新结尾，多块压缩结果直接拼接即为一个合法的deflate流；
+ * 大小和CRC在条目结束后以数据描述符写出，因此无需事先知道条目大小
+ * 每个方法返回需要按顺序写出的字节
+ */
+export class ZipWriter {
+  private entries: ZipEntry[] = [];
+  private offset = 0;
+  private current: ZipEntry | null = null;
+  // DOS格式的修改时间和日期
+  private readonly dosTime: number;
+  private readonly dosDate: number;
+
+  constructor(date = new Date()) {
+    this.dosTime = (date.getHours() << 11) | (date.getMinutes() << 5) | Math.floor(date.getSeconds() / 2);
+    this.dosDate = ((date.getFullYear() - 1980) << 9) | ((date.getMonth() + 1) << 5) | date.getDate();
+  }
+
+  /**
+   * 开始一个新条目
+   * @param name 条目路径
+   * @returns 本地文件头
+   */
+  public startEntry(name: string): Buffer {
+    if (this.current) {
+      throw new Error(`上一个条目尚未结束: ${this.current.name.toString()}`);
+    }
+    const nameBytes = Buffer.from(name, 'utf8');
+    this.current = { name: nameBytes, crc: 0, compressedSize: 0, size: 0, offset: this.offset };
+
+    const header = Buffer.alloc(30);
+    header.writeUInt32LE(0x04034b50, 0);
+    header.writeUInt16LE(VERSION, 4);
+    header.writeUInt16LE(FLAG_DATA_DESCRIPTOR | FLAG_UTF8, 6);
+    header.writeUInt16LE(METHOD_DEFLATE, 8);
+    header.writeUInt16LE(this.dosTime, 10);
+    header.writeUInt16LE(this.dosDate, 12);
+    // CRC和大小留空，写在数据描述符中
+    header.writeUInt16LE(nameBytes.length, 26);
+    return this.emit(Buffer.concat([header, nameBytes]));
+  }
+
+  /**
+   * 写入当前条目的数据
+   * @param data 未压缩的数据
+   * @returns 压缩后的数据
+   */
+  public write(data: Buffer | string): Buffer {
+    const entry = this.requireEntry();
+    const bytes = typeof data === 'string' ? Buffer.from(data, 'utf8') : data;
+    if (bytes.length === 0) return Buffer.alloc(0);
+
+    entry.crc = updateCrc(entry.crc, bytes);
+    entry.size += bytes.length;
+    const compressed = zlib.deflateRawSync(bytes, { finishFlush: zlib.constants.Z_SYNC_FLUSH });
+    entry.compressedSize += compressed.length;
+    if (entry.size > MAX_ZIP32 || this.offset + compressed.length > MAX_ZIP32) {
+      throw new Error('导出内容超出ZIP文件4GB上限');
+    }
+    return this.emit(compressed);
+  }
+
+  /**
+   * 结束当前条目
+   * @returns 结束压缩流的空块和数据描述符
+   */
+  public endEntry(): Buffer {
+    const entry = this.requireEntry();
+    // 空的最终块，结束deflate流
+    const tail = zlib.deflateRawSync(Buffer.alloc(0));
+    entry.compressedSize += tail.length;
+
+    const descriptor = Buffer.alloc(16);
+    descriptor.writeUInt32LE(0x08074b50, 0);
+    descriptor.writeUInt32LE(entry.crc, 4);
+    descriptor.writeUInt32LE(entry.compressedSize, 8);
+    descriptor.writeUInt32LE(entry.size, 12);
+
+    this.entries.push(entry);
+    this.current = null;
+    return this.emit(Buffer.concat([tail, descriptor]));
+  }
+
+  /**
+   * 写入一个完整的小条目
+   * @param name 条目路径
+   * @param data 数据
+   * @returns 条目的全部字节
+   */
+  public addEntry(name: string, data: Buffer | string): Buffer {
+    return Buffer.concat([this.startEntry(name), this.write(data), this.endEntry()]);
+  }
+
+  /**
+   * 结束ZIP文件
+   * @returns 中央目录和目录结束记录
+   */
+  public finish(): Buffer {
+    if (this.current) {
+      throw new Error(`条目尚未结束: ${this.current.name.toString()}`);
+    }
+    const start = this.offset;
+    const records = this.entries.map(entry => {
+      const record = Buffer.alloc(46);
+      record.writeUInt32LE(0x02014b50, 0);
+      record.writeUInt16LE(VERSION, 4);
+      record.writeUInt16LE(VERSION, 6);
+      record.writeUInt16LE(FLAG_DATA_DESCRIPTOR | FLAG_UTF8, 8);
+      record.writeUInt16LE(METHOD_DEFLATE, 10);
+      record.writeUInt16LE(this.dosTime, 12);
+      record.writeUInt16LE(this.dosDate, 14);
+      record.writeUInt32LE(entry.crc, 16);
+      record.writeUInt32LE(entry.compressedSize, 20);
+      record.writeUInt32LE(entry.size, 24);
+      record.writeUInt16LE(entry.name.length, 28);
+      record.writeUInt32LE(entry.offset, 42);
+      return Buffer.concat([record, entry.name]);
+    });
+    const directory = Buffer.concat(records);
+
+    const end = Buffer.alloc(22);
+    end.writeUInt32LE(0x06054b50, 0);
+    end.writeUInt16LE(this.entries.length, 8);
+    end.writeUInt16LE(this.entries.length, 10);
+    end.writeUInt32LE(directory.length, 12);
+    end.writeUInt32LE(start, 16);
+    return this.emit(Buffer.concat([directory, end]));
+  }
+
+  private requireEntry(): ZipEntry {
+    if (!this.current) {
+      throw new Error('没有正在写入的条目');
+    }
+    return this.current;
+  }
+
+  private emit(bytes: Buffer): Buffer {
+    this.offset += bytes.length;
+    return bytes;
+  }
+}
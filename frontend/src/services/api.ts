@@ -1,5 +1,5 @@
 import axios, { AxiosInstance, AxiosRequestConfig, AxiosResponse } from 'axios';
-import type { ApiResponse, FileInfo, TableData, VisualizationConfig, SystemConfig } from '@/types';
+import type { ApiResponse, FileInfo, TableData, RowBlock, TableViewQuery, VisualizationConfig, SystemConfig } from '@/types';
 
 // 创建axios实例
 const api: AxiosInstance = axios.create({
@@ -57,6 +57,25 @@ class ApiService {
     return response.data;
   }
 
+  // 分块获取文件的行
+  async getFileRows(
+    id: string,
+    params: TableViewQuery & { offset: number; limit: number },
+    signal?: AbortSignal
+  ): Promise<ApiResponse<RowBlock>> {
+    const response = await api.get<ApiResponse<RowBlock>>(`/files/${id}/rows`, { params, signal });
+    return response.data;
+  }
+
+  // 获取导出文件的地址
+  getExportUrl(id: string, format: 'csv' | 'xlsx', query: TableViewQuery = {}): string {
+    const params = new URLSearchParams({ format });
+    Object.entries(query).forEach(([key, value]) => {
+      if (value) params.set(key, value);
+    });
+    return `/api/files/${id}/export?${params.toString()}`;
+  }
+
   // 上传文件
   async uploadFile(file: File): Promise<ApiResponse<FileInfo>> {
     const formData = new FormData();
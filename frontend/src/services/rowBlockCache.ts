@@ -0,0 +1,212 @@
+import apiService from '@/services/api';
+import type { TableHeader, TableViewQuery } from '@/types';
+
+// 每块的行数
+export const BLOCK_SIZE = 200;
+
+// 已加载行的默认内存上限（估算值）
+const DEFAULT_MAX_BYTES = 32 * 1024 * 1024;
+
+// 沿滚动方向预取的块数
+const PREFETCH_BLOCKS = 2;
+
+// 已加载的块
+interface CachedBlock {
+  rows: Record<string, any>[];
+  bytes: number;
+}
+
+// 估算一块行数据在浏览器中占用的内存
+const estimateBytes = (rows: Record<string, any>[]): number => {
+  let bytes = 0;
+  for (const row of rows) {
+    bytes += 64;
+    for (const key in row) {
+      const value = row[key];
+      bytes += 16 + (typeof value === 'string' ? value.length * 2 : 8);
+    }
+  }
+  return bytes;
+};
+
+// 请求是否是被主动取消的
+const isCanceled = (err: any): boolean =>
+  err && (err.name === 'CanceledError' || err.name === 'AbortError' || err.code === 'ERR_CANCELED');
+
+/**
+ * 表格行的分块缓存，按需请求固定大小的行块
+ * 已加载的块按LRU顺序保留在内存上限内，沿滚动方向预取后续的块，
+ * 不再需要的进行中请求会被取消，浏览器内存不随文件大小增长
+ * 缓存不放入Pinia，避免行数据被转换为响应式对象
+ */
+export class RowBlockCache {
+  public headers: TableHeader[] = [];
+  // 视图中的总行数，首块加载前为null
+  public total: number | null = null;
+  // 文件的总行数
+  public rowCount: number | null = null;
+  public error: string | null = null;
+
+  private blocks = new Map<number, CachedBlock>();
+  private pending = new Map<number, AbortController>();
+  // 当前可见和预取的块，淘汰时跳过
+  private wanted = new Set<number>();
+  private bytes = 0;
+  // 每次重置后递增，丢弃重置前发出的请求的结果
+  private generation = 0;
+
+  /**
+   * @param fileId 文件ID
+   * @param query 视图条件
+   * @param onUpdate 有块加载完成或出错时调用
+   * @param maxBytes 内存上限
+   */
+  constructor(
+    private fileId: string,
+    private query: TableViewQuery,
+    private onUpdate: () => void,
+    private maxBytes = DEFAULT_MAX_BYTES
+  ) {}
+
+  /**
+   * 获取一行，所在的块尚未加载时返回undefined
+   * @param index 视图中的行号
+   */
+  getRow(index: number): Record<string, any> | undefined {
+    const block = this.blocks.get(Math.floor(index / BLOCK_SIZE));
+    return block ? block.rows[index % BLOCK_SIZE] : undefined;
+  }
+
+  /**
+   * 确保可见范围内的块已加载，并沿滚动方向预取
+   * @param firstRow 第一个可见行
+   * @param lastRow 最后一个可见行
+   * @param direction 滚动方向，1向下，-1向上
+   */
+  ensure(firstRow: number, lastRow: number, direction: 1 | -1 = 1) {
+    const lastBlock = this.total === null ? Infinity : Math.max(0, Math.ceil(this.total / BLOCK_SIZE) - 1);
+    const first = Math.min(Math.floor(Math.max(0, firstRow) / BLOCK_SIZE), lastBlock);
+    const last = Math.min(Math.floor(Math.max(0, lastRow) / BLOCK_SIZE), lastBlock);
+
+    const visible: number[] = [];
+    for (let block = first; block <= last; block++) visible.push(block);
+    const prefetch: number[] = [];
+    for (let i = 1; i <= PREFETCH_BLOCKS; i++) {
+      const block = direction > 0 ? last + i : first - i;
+      if (block >= 0 && block <= lastBlock) prefetch.push(block);
+    }
+
+    this.wanted = new Set([...visible, ...prefetch]);
+
+    // 滚动后不再需要的请求直接取消
+    this.pending.forEach((controller, block) => {
+      if (!this.wanted.has(block)) {
+        controller.abort();
+        this.pending.delete(block);
+      }
+    });
+
+    for (const block of [...visible, ...prefetch]) {
+      const cached = this.blocks.get(block);
+      if (cached) {
+        // 移到末尾，维持LRU顺序
+        this.blocks.delete(block);
+        this.blocks.set(block, cached);
+      } else if (!this.pending.has(block)) {
+        this.load(block);
+      }
+    }
+  }
+
+  /**
+   * 清空缓存，视图条件变化或文件更新后调用
+   * @param query 新的视图条件，省略时保持不变
+   */
+  reset(query?: TableViewQuery) {
+    this.generation++;
+    this.pending.forEach(controller => controller.abort());
+    this.pending.clear();
+    this.blocks.clear();
+    this.wanted.clear();
+    this.bytes = 0;
+    this.error = null;
+    if (query) {
+      this.query = query;
+      this.total = null;
+    }
+  }
+
+  /**
+   * 取消所有请求，组件卸载时调用
+   */
+  dispose() {
+    this.reset();
+  }
+
+  /**
+   * 缓存统计
+   */
+  get stats() {
+    return {
+      blocks: this.blocks.size,
+      pending: this.pending.size,
+      bytes: this.bytes,
+      maxBytes: this.maxBytes,
+    };
+  }
+
+  /**
+   * 请求一块
+   * @param block 块序号
+   */
+  private async load(block: number) {
+    const controller = new AbortController();
+    const generation = this.generation;
+    this.pending.set(block, controller);
+
+    try {
+      const response = await apiService.getFileRows(
+        this.fileId,
+        { ...this.query, offset: block * BLOCK_SIZE, limit: BLOCK_SIZE },
+        controller.signal
+      );
+      if (generation !== this.generation) return;
+
+      if (response.code !== 200) {
+        this.error = response.message;
+      } else {
+        const data = response.data;
+        this.headers = data.headers;
+        this.total = data.total;
+        this.rowCount = data.rowCount;
+        this.error = null;
+        const bytes = estimateBytes(data.rows);
+        this.blocks.set(block, { rows: data.rows, bytes });
+        this.bytes += bytes;
+        this.evict();
+      }
+      this.onUpdate();
+    } catch (err: any) {
+      if (isCanceled(err) || generation !== this.generation) return;
+      this.error = err?.response?.data?.message || (err instanceof Error ? err.message : '加载数据失败');
+      console.error('加载行数据错误:', err);
+      this.onUpdate();
+    } finally {
+      if (this.pending.get(block) === controller) {
+        this.pending.delete(block);
+      }
+    }
+  }
+
+  /**
+   * 超出内存上限时按LRU顺序淘汰不在可见范围内的块
+   */
+  private evict() {
+    for (const [block, cached] of this.blocks) {
+      if (this.bytes <= this.maxBytes) break;
+      if (this.wanted.has(block)) continue;
+      this.blocks.delete(block);
+      this.bytes -= cached.bytes;
+    }
+  }
+}
@@ -43,6 +43,22 @@ export interface TableData {
   metadata: TableMetadata;
 }
 
+// 表格视图条件，与后端的搜索、过滤和排序参数一致
+export interface TableViewQuery {
+  search?: string;
+  filters?: string; // JSON数组 [{"column","op","value"}]
+  sort?: string; // 逗号分隔的 列名[:asc|desc]
+}
+
+// 分块读取的行
+export interface RowBlock {
+  offset: number;
+  total: number; // 视图中的总行数
+  rowCount: number; // 文件的总行数
+  headers: TableHeader[];
+  rows: Record<string, any>[];
+}
+
 // 可视化配置
 export interface VisualizationConfig {
   id?: string;
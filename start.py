@@ -28,14 +28,15 @@ import re
 import argparse
 import logging
 from datetime import datetime
-import requests
-import zipfile
-import tarfile
-import io
+from collections import deque
 import json
 from pathlib import Path
-import urllib.request
-import tempfile
+import threading
+import functools
+
+# 启动器开始运行的时间，用于统计到第一个服务进程启动的耗时
+LAUNCHER_STARTED_AT = time.perf_counter()
+first_spawn_reported = False
 
 # 检查是否为Windows系统
 IS_WINDOWS = platform.system() == "Windows"
@@ -47,10 +48,140 @@ NPM_EXE = None
 # 存储子进程
 processes = []
 
+# 受控服务: 名称 -> 服务状态(进程、启动时间、重启次数、日志缓冲区等)，供控制接口使用
+services = {}
+services_lock = threading.RLock()
+
+# 控制接口上次查询到的后端指标，用于计算两次查询之间的增量
+metrics_snapshot = {}
+
+# 滚动重启模式下的后端代理，未启用时为None
+backend_proxy = None
+# 滚动重启时是否先预热新实例
+rolling_warmup = True
+rolling_restart_lock = threading.Lock()
+
+# cgroup v2的准备状态和启动器创建的服务cgroup
+cgroup_state = {"checked": False, "base": None, "created": set()}
+
 # 项目路径
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FRONTEND_DIR = os.path.join(BASE_DIR, "frontend")
 BACKEND_DIR = os.path.join(BASE_DIR, "backend")
+BACKEND_CONFIG_FILE = os.path.join(BACKEND_DIR, "config", "config.json")
+
+# 环境探测结果缓存，Node.js和npm未变化时跳过版本检测的子进程
+ENV_PROBE_CACHE_FILE = os.path.join(BASE_DIR, ".launcher_cache.json")
+
+# 后端内存预算的默认值(MB)，与后端ConfigService保持一致
+DEFAULT_MEMORY_BUDGET_MB = 1024
+
+# 后端服务地址，端口与后端的PORT环境变量保持一致
+BACKEND_PORT = int(os.environ.get("PORT", "3001"))
+BACKEND_URL = f"http://127.0.0.1:{BACKEND_PORT}"
+
+# 性能指标摘要的默认输出间隔(秒)
+DEFAULT_METRICS_INTERVAL = 60
+
+# 查询预热进度的间隔(秒)
+WARMUP_POLL_INTERVAL = 1
+
+# 启动器控制接口，只监听本机，端口和访问令牌写入状态文件供 start.py ctl 使用
+CONTROL_HOST = "127.0.0.1"
+CONTROL_PORT = int(os.environ.get("LAUNCHER_CONTROL_PORT", "3099"))
+CONTROL_STATE_FILE = os.path.join(BASE_DIR, ".launcher_control.json")
+
+# 每个服务在内存中保留的最近输出行数
+LOG_RING_SIZE = 2000
+
+# 重启或排空服务时等待进程优雅退出的默认时间(秒)
+DEFAULT_DRAIN_TIMEOUT = 30
+
+# 滚动重启模式: 后端实例轮流使用的内部端口，对外端口由启动器代理
+BACKEND_DIST_DIR = os.path.join(BACKEND_DIR, "dist")
+ROLLING_INSTANCE_PORTS = (BACKEND_PORT + 10, BACKEND_PORT + 11)
+# 检查后端构建产物指纹的间隔(秒)
+ROLLING_WATCH_INTERVAL = 2
+# 新实例通过健康检查和完成预热的最长等待时间(秒)
+ROLLING_READY_TIMEOUT = 60
+ROLLING_WARMUP_TIMEOUT = 60
+# 切换前旧实例停止接收修改并写回数据的最长等待时间(秒)
+ROLLING_HANDOFF_TIMEOUT = 10
+
+# 各服务的资源限制，值为None表示不限制，可通过环境变量 LAUNCHER_<服务>_<项> 覆盖
+# memory_mb/cpu_percent: 通过cgroup v2的memory.max/cpu.max限制(cpu_percent为100表示一个核)，cgroup不可用时只用于告警
+# nofile: 打开文件数上限；nice: 调度优先级增量；ionice: IO优先级(best-effort 0-7，越大优先级越低)
+SERVICE_LIMITS = {
+    # 内存上限未设置时按后端内存预算计算
+    "backend": {"memory_mb": None, "cpu_percent": None, "nofile": 65536, "nice": None, "ionice": None},
+    # 开发服务器的优先级低于后端，避免与文件解析争抢CPU和磁盘
+    "frontend": {"memory_mb": 2048, "cpu_percent": None, "nofile": None, "nice": 5, "ionice": 7},
+}
+CGROUP_ROOT = "/sys/fs/cgroup"
+CGROUP_CPU_PERIOD = 100000
+# 各架构的ioprio_set系统调用号
+IOPRIO_SET_SYSCALLS = {"x86_64": 251, "aarch64": 30, "i386": 289, "i686": 289}
+
+# 服务资源采样的默认间隔(秒)、趋势输出间隔(秒)和保留的采样数
+DEFAULT_RESOURCE_INTERVAL = 10
+RESOURCE_REPORT_INTERVAL = 60
+RESOURCE_HISTORY_SIZE = 60
+# 资源占用达到上限的该比例时告警，CPU需连续多次采样超过阈值
+RESOURCE_ALERT_RATIO = 0.9
+RESOURCE_CPU_ALERT_SAMPLES = 3
+
+# 生产模式下的前端构建目录，以及记录源码指纹的文件
+FRONTEND_DIST_DIR = os.path.join(FRONTEND_DIR, "dist")
+FRONTEND_FINGERPRINT_FILE = os.path.join(FRONTEND_DIST_DIR, ".build-fingerprint")
+# 计算源码指纹时跳过的目录
+FRONTEND_FINGERPRINT_EXCLUDES = {"node_modules", "dist"}
+
+# 预压缩前端资源的Node.js脚本，使用内置zlib生成brotli和gzip版本，压缩收益不足10%的文件不生成
+PRECOMPRESS_SCRIPT = """
+const fs = require('fs'), path = require('path'), zlib = require('zlib');
+const exts = new Set(['.js', '.mjs', '.css', '.html', '.svg', '.json', '.txt', '.xml', '.wasm', '.ico', '.map']);
+let files = 0, before = 0, after = 0;
+const walk = dir => {
+  for (const entry of fs.readdirSync(dir, { withFileTypes: true })) {
+    const file = path.join(dir, entry.name);
+    if (entry.isDirectory()) { walk(file); continue; }
+    if (!exts.has(path.extname(entry.name))) continue;
+    const data = fs.readFileSync(file);
+    if (data.length < 1024) continue;
+    const variants = [
+      ['.br', zlib.brotliCompressSync(data, { params: {
+        [zlib.constants.BROTLI_PARAM_QUALITY]: 11,
+        [zlib.constants.BROTLI_PARAM_SIZE_HINT]: data.length } })],
+      ['.gz', zlib.gzipSync(data, { level: 9 })]
+    ];
+    let smallest = data.length;
+    for (const [ext, output] of variants) {
+      if (output.length < data.length * 0.9) {
+        fs.writeFileSync(file + ext, output);
+        smallest = Math.min(smallest, output.length);
+      }
+    }
+    files++; before += data.length; after += smallest;
+  }
+};
+walk(process.argv[1]);
+console.log(JSON.stringify({ files, before, after }));
+"""
+
+# 基准测试配置
+BENCH_DIR = os.path.join(BASE_DIR, "bench")
+BENCH_BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+BENCH_PORT = 3101
+BENCH_SEED = 20240101
+BENCH_WIDE_COLUMNS = 50
+# xlsx单个工作表的最大行数(含表头)
+BENCH_XLSX_MAX_ROWS = 1048576
+# 吞吐下降或延迟上升超过该百分比视为退化
+BENCH_REGRESSION_PERCENT = 10
+# 列表场景前预先写入的可视化配置数，列表响应大小与机器速度无关
+BENCH_VISUALIZATION_COUNT = 50
+# 创建场景使用的独立文件ID，不影响列表场景的数据
+BENCH_CREATE_FILE_NAME = "bench-create.csv"
 
 # 配置日志
 LOG_DIR = os.path.join(BASE_DIR, "logs")
@@ -119,6 +250,388 @@ def create_npm_command(npm_exe, node_exe, *args):
         "env": env
     }
 
+def read_backend_config():
+    """
+    读取后端配置文件
+
+    返回:
+        dict: 配置内容，读取失败时返回空字典
+    """
+    try:
+        with open(BACKEND_CONFIG_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取后端配置失败: {str(e)}")
+        return {}
+
+def get_backend_heap_limit_mb():
+    """
+    根据后端配置的内存预算计算Node.js堆上限
+
+    内存预算只统计解析中的文件和表格缓存，堆上限需要在预算之外
+    为请求处理和序列化留出余量，使内存压力表现为排队变慢而不是进程崩溃
+
+    返回:
+        tuple: (内存预算MB, 堆上限MB)
+    """
+    memory = read_backend_config().get("memory") or {}
+    try:
+        budget_mb = int(memory.get("budgetMB") or DEFAULT_MEMORY_BUDGET_MB)
+    except (TypeError, ValueError):
+        budget_mb = DEFAULT_MEMORY_BUDGET_MB
+    heap_limit_mb = budget_mb + max(512, budget_mb // 2)
+    return budget_mb, heap_limit_mb
+
+def fetch_backend_metrics(timeout=5, base_url=BACKEND_URL):
+    """
+    获取后端的Prometheus格式指标并解析
+
+    参数:
+        timeout: 请求超时时间(秒)
+        base_url: 后端地址
+
+    返回:
+        dict: 指标名到[(标签字典, 数值)]列表的映射，获取失败时返回None
+    """
+    import urllib.request
+
+    try:
+        with urllib.request.urlopen(f"{base_url}/metrics", timeout=timeout) as response:
+            text = response.read().decode("utf-8", errors="replace")
+    except Exception as e:
+        logger.debug(f"获取后端指标失败: {str(e)}")
+        return None
+
+    metrics = {}
+    pattern = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)$')
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = pattern.match(line)
+        if not match:
+            continue
+        name, label_text, value = match.groups()
+        labels = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', label_text or ""))
+        try:
+            metrics.setdefault(name, []).append((labels, float(value)))
+        except ValueError:
+            continue
+    return metrics
+
+def sum_metric(metrics, name, **match):
+    """
+    对标签匹配的指标求和
+
+    参数:
+        metrics: fetch_backend_metrics的返回值
+        name: 指标名
+        **match: 需要匹配的标签
+
+    返回:
+        float: 求和结果
+    """
+    return sum(
+        value for labels, value in metrics.get(name, [])
+        if all(labels.get(k) == v for k, v in match.items())
+    )
+
+def histogram_quantile(current, previous, name, quantile):
+    """
+    根据两次采集之间的分桶增量估算直方图分位数
+
+    参数:
+        current: 本次采集的指标
+        previous: 上次采集的指标，首次采集时为空字典
+        name: 直方图指标名(不含_bucket后缀)
+        quantile: 分位数，例如0.95
+
+    返回:
+        float或None: 估算值(秒)，区间内无观测时返回None
+    """
+    def buckets(metrics):
+        result = {}
+        for labels, value in metrics.get(f"{name}_bucket", []):
+            le = labels.get("le")
+            result[le] = result.get(le, 0) + value
+        return result
+
+    now = buckets(current)
+    before = buckets(previous)
+    deltas = sorted(
+        (float("inf") if le == "+Inf" else float(le), count - before.get(le, 0))
+        for le, count in now.items()
+    )
+    if not deltas or deltas[-1][1] <= 0:
+        return None
+
+    target = deltas[-1][1] * quantile
+    lower_bound, lower_count = 0.0, 0
+    for upper_bound, count in deltas:
+        if count >= target:
+            if upper_bound == float("inf"):
+                return lower_bound
+            # 在分桶内线性插值
+            if count == lower_count:
+                return upper_bound
+            return lower_bound + (upper_bound - lower_bound) * (target - lower_count) / (count - lower_count)
+        lower_bound, lower_count = upper_bound, count
+    return lower_bound
+
+def format_metrics_summary(current, previous, interval):
+    """
+    生成一行性能摘要
+
+    参数:
+        current: 本次采集的指标
+        previous: 上次采集的指标
+        interval: 采集间隔(秒)
+
+    返回:
+        str: 摘要文本
+    """
+    def delta(name, **match):
+        value = sum_metric(current, name, **match)
+        before = sum_metric(previous, name, **match)
+        # 后端重启后计数器从0开始，此时以当前值为增量
+        return value - before if value >= before else value
+
+    requests_count = delta("http_request_duration_seconds_count")
+    p95 = histogram_quantile(current, previous, "http_request_duration_seconds", 0.95)
+    parses = delta("file_parses_total")
+    parse_seconds = delta("file_parse_phase_duration_seconds_sum")
+    bytes_read = delta("file_parse_bytes_read_total")
+    hits = delta("table_cache_requests_total", result="hit")
+    misses = delta("table_cache_requests_total", result="miss")
+    lag_p99 = sum_metric(current, "nodejs_eventloop_lag_seconds", quantile="0.99")
+    heap_used = sum_metric(current, "nodejs_heap_bytes", type="used")
+    rss = sum_metric(current, "process_resident_memory_bytes")
+
+    parts = [
+        f"请求 {int(requests_count)} ({requests_count / interval:.1f}/s)",
+        f"p95 {p95 * 1000:.0f}ms" if p95 is not None else "p95 -",
+        f"解析 {int(parses)} 次/{parse_seconds * 1000:.0f}ms/{bytes_read / 1024 / 1024:.1f}MB",
+        f"缓存命中率 {hits / (hits + misses) * 100:.0f}%" if hits + misses > 0 else "缓存命中率 -",
+        f"事件循环延迟p99 {lag_p99 * 1000:.0f}ms",
+        f"堆 {heap_used / 1024 / 1024:.0f}MB",
+        f"RSS {rss / 1024 / 1024:.0f}MB",
+    ]
+    return ", ".join(parts)
+
+def start_metrics_reporter(interval):
+    """
+    启动后台线程，定期输出后端性能摘要
+
+    参数:
+        interval: 输出间隔(秒)
+    """
+    def report():
+        previous = {}
+        while processes:
+            time.sleep(interval)
+            current = fetch_backend_metrics()
+            if current is None:
+                continue
+            summary = format_metrics_summary(current, previous, interval)
+            logger.info(f"后端性能摘要: {summary}")
+            print(f"{Colors.HEADER}[指标] {summary}{Colors.ENDC}")
+            previous = current
+
+    thread = threading.Thread(target=report, name="metrics-reporter", daemon=True)
+    thread.start()
+    logger.info(f"性能摘要每 {interval} 秒输出一次")
+
+def call_backend_api(method, path, timeout=5, base_url=BACKEND_URL):
+    """
+    调用后端API并返回响应中的data字段
+
+    参数:
+        method: 请求方法
+        path: 以/api开头的路径
+        timeout: 超时时间(秒)
+        base_url: 后端地址
+
+    返回:
+        任意类型或None: 响应数据，请求失败时返回None
+    """
+    import urllib.request
+
+    request = urllib.request.Request(f"{base_url}{path}", data=b"" if method == "POST" else None, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8")).get("data")
+    except Exception as e:
+        logger.debug(f"调用后端API失败: {method} {path}: {str(e)}")
+        return None
+
+def start_warmup_reporter(spawned_at):
+    """
+    启动后台线程：等待后端通过就绪检查后触发预热，并输出预热进度和达到全部预热的耗时
+
+    参数:
+        spawned_at: 后端进程的启动时间戳
+    """
+    def run():
+        if not wait_for_backend(BACKEND_URL, timeout=120):
+            logger.warning("后端未在120秒内就绪，跳过预热")
+            print(f"{Colors.WARNING}[预热] 后端未在120秒内就绪，跳过预热{Colors.ENDC}")
+            return
+        ready_seconds = time.time() - spawned_at
+        print(f"{Colors.GREEN}[预热] 后端已就绪，启动耗时 {ready_seconds:.2f}s，开始预热...{Colors.ENDC}")
+
+        status = call_backend_api("POST", "/api/system/warmup")
+        last_progress = None
+        while status and status.get("state") == "running" and processes:
+            progress = (status.get("completed", 0), status.get("failed", 0))
+            if progress != last_progress:
+                print(f"{Colors.HEADER}[预热] {progress[0] + progress[1]}/{status.get('total', 0)} 个文件, "
+                      f"{status.get('bytes', 0) / 1024 / 1024:.1f}MB{Colors.ENDC}")
+                last_progress = progress
+            time.sleep(WARMUP_POLL_INTERVAL)
+            status = call_backend_api("GET", "/api/system/warmup")
+
+        if not status or status.get("state") != "done":
+            logger.warning("无法获取预热结果")
+            return
+
+        hot_seconds = time.time() - spawned_at
+        summary = (f"预热完成: {status.get('completed', 0)} 个文件, 失败 {status.get('failed', 0)}, "
+                   f"跳过 {status.get('skipped', 0)}, 预热耗时 {(status.get('durationMs') or 0) / 1000:.2f}s, "
+                   f"启动到就绪 {ready_seconds:.2f}s, 启动到全部预热 {hot_seconds:.2f}s")
+        if status.get("stopReason"):
+            summary += f" ({status['stopReason']})"
+        logger.info(summary)
+        print(f"{Colors.GREEN}[预热] {summary}{Colors.ENDC}")
+
+    threading.Thread(target=run, name="warmup-reporter", daemon=True).start()
+
+def compute_frontend_fingerprint():
+    """
+    计算前端源码的指纹，源码、依赖声明或构建配置变化时指纹随之变化
+
+    返回:
+        str: 十六进制指纹
+    """
+    return compute_directory_fingerprint(FRONTEND_DIR, FRONTEND_FINGERPRINT_EXCLUDES)
+
+def compute_directory_fingerprint(directory, excludes=()):
+    """
+    按文件路径和内容计算目录的指纹，只更新修改时间不会改变指纹
+
+    参数:
+        directory: 目录路径
+        excludes: 跳过的子目录名
+
+    返回:
+        str: 十六进制指纹
+    """
+    import hashlib
+
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(directory):
+        # 跳过排除的目录和隐藏目录
+        dirs[:] = sorted(d for d in dirs if d not in excludes and not d.startswith("."))
+        for name in sorted(files):
+            # 隐藏文件中只有.env会影响构建
+            if name.startswith(".") and not name.startswith(".env"):
+                continue
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, directory).replace(os.sep, "/").encode("utf-8"))
+            digest.update(b"\0")
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+def precompress_frontend_assets():
+    """
+    为前端构建产物生成brotli和gzip预压缩版本
+
+    返回:
+        bool: 是否成功
+    """
+    try:
+        result = subprocess.run(
+            [NODE_EXE, "-e", PRECOMPRESS_SCRIPT, FRONTEND_DIST_DIR],
+            capture_output=True,
+            text=True,
+            check=False
+        )
+    except OSError as e:
+        logger.error(f"预压缩前端资源失败: {str(e)}")
+        return False
+
+    if result.returncode != 0:
+        logger.error(f"预压缩前端资源失败: {result.stderr}")
+        print(f"{Colors.FAIL}预压缩前端资源失败: {result.stderr}{Colors.ENDC}")
+        return False
+
+    try:
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        logger.info(f"前端资源预压缩完成: {stats}")
+        print(f"{Colors.GREEN}已预压缩 {stats['files']} 个文件: "
+              f"{stats['before'] / 1024:.0f}KB -> {stats['after'] / 1024:.0f}KB{Colors.ENDC}")
+    except (ValueError, IndexError, KeyError):
+        logger.info("前端资源预压缩完成")
+    return True
+
+def build_frontend():
+    """
+    构建前端生产版本，源码指纹与上次构建一致时直接复用
+
+    返回:
+        bool: 构建产物是否可用
+    """
+    fingerprint = compute_frontend_fingerprint()
+    index_file = os.path.join(FRONTEND_DIST_DIR, "index.html")
+    try:
+        with open(FRONTEND_FINGERPRINT_FILE, "r", encoding="utf-8") as f:
+            built_fingerprint = f.read().strip()
+    except OSError:
+        built_fingerprint = None
+
+    if built_fingerprint == fingerprint and os.path.exists(index_file):
+        logger.info("前端源码未变化，复用已有构建")
+        print(f"{Colors.GREEN}前端源码未变化，复用已有构建{Colors.ENDC}")
+        return True
+
+    logger.info("构建前端生产版本")
+    print(f"{Colors.BLUE}构建前端生产版本...{Colors.ENDC}")
+    started = time.time()
+    npm_cmd = create_npm_command(NPM_EXE, NODE_EXE, "run", "build")
+    try:
+        result = subprocess.run(
+            npm_cmd["command"],
+            cwd=FRONTEND_DIR,
+            check=False,
+            shell=npm_cmd["shell"],
+            text=True,
+            capture_output=True,
+            env=npm_cmd["env"]
+        )
+    except Exception as e:
+        error_msg = f"构建前端时发生错误: {str(e)}"
+        logger.error(error_msg)
+        print(f"{Colors.FAIL}{error_msg}{Colors.ENDC}")
+        return False
+
+    if result.returncode != 0 or not os.path.exists(index_file):
+        logger.error(f"前端构建失败: {result.stderr or result.stdout}")
+        print(f"{Colors.FAIL}前端构建失败{Colors.ENDC}")
+        print(f"{Colors.FAIL}错误信息: {result.stderr or result.stdout}{Colors.ENDC}")
+        return False
+
+    if not precompress_frontend_assets():
+        return False
+
+    # 最后写入指纹，构建或压缩中断时下次会重新构建
+    with open(FRONTEND_FINGERPRINT_FILE, "w", encoding="utf-8") as f:
+        f.write(fingerprint)
+
+    logger.info(f"前端构建完成，耗时 {time.time() - started:.1f}s")
+    print(f"{Colors.GREEN}前端构建完成，耗时 {time.time() - started:.1f}s{Colors.ENDC}")
+    return True
+
 def download_nodejs():
     """
     下载Node.js并解压到项目根目录的nodejs文件夹
@@ -126,6 +639,11 @@ def download_nodejs():
     返回:
         bool: 下载并设置成功返回True，否则返回False
     """
+    # 下载相关模块只在需要下载Node.js时导入，缩短启动器的启动时间
+    import tempfile
+    import zipfile
+    import requests
+
     try:
         print(f"{Colors.BLUE}正在准备下载Node.js...{Colors.ENDC}")
         logger.info("准备下载Node.js")
@@ -268,9 +786,30 @@ def parse_arguments():
     解析命令行参数
     """
     parser = argparse.ArgumentParser(description="项目服务统一启动器")
-    parser.add_argument("--no-check", action="store_true", help="跳过环境检查直接启动")
+    parser.add_argument("--no-check", action="store_true",
+                        help="跳过环境检查和依赖安装直接启动，只确认根目录下的Node.js存在")
     parser.add_argument("--frontend-only", action="store_true", help="仅启动前端服务")
     parser.add_argument("--backend-only", action="store_true", help="仅启动后端服务")
+    parser.add_argument("--prod", action="store_true",
+                        help="生产模式：使用预构建的前端，由后端直接托管，不启动Vite开发服务器")
+    parser.add_argument("--no-warmup", action="store_true", help="启动后不预热监控目录中的文件")
+    parser.add_argument("--metrics-interval", type=int, default=DEFAULT_METRICS_INTERVAL,
+                        help="后端性能摘要的输出间隔(秒)，0表示不输出")
+    parser.add_argument("--resource-interval", type=int, default=DEFAULT_RESOURCE_INTERVAL,
+                        help="服务内存、CPU和文件描述符的采样间隔(秒)，0表示不采样")
+    parser.add_argument("--rolling", action="store_true",
+                        help="滚动重启模式：后端经由启动器代理，构建产物变化时不中断服务地重启后端")
+    parser.add_argument("--control-port", type=int, default=CONTROL_PORT,
+                        help=f"本机控制接口端口，供 start.py ctl 使用，0表示不启用，默认{CONTROL_PORT}")
+    parser.add_argument("--bench", action="store_true", help="运行基准测试并输出JSON报告")
+    parser.add_argument("--bench-rows", default="10000,100000",
+                        help="基准测试数据集的行数，逗号分隔，例如 10000,1000000,10000000")
+    parser.add_argument("--bench-formats", default="csv,xlsx,json", help="基准测试数据集的格式，逗号分隔")
+    parser.add_argument("--bench-duration", type=float, default=10, help="每个压测场景的持续时间(秒)")
+    parser.add_argument("--bench-concurrency", type=int, default=8, help="压测并发数")
+    parser.add_argument("--bench-port", type=int, default=BENCH_PORT, help="基准测试时后端使用的端口")
+    parser.add_argument("--bench-baseline", default=BENCH_BASELINE_FILE, help="用于对比的基线报告路径")
+    parser.add_argument("--bench-save-baseline", action="store_true", help="将本次结果保存为基线")
     return parser.parse_args()
 
 def print_banner():
@@ -340,6 +879,104 @@ def print_separator():
     print(f"\n{Colors.BLUE}{separator}{Colors.ENDC}\n")
     logger.debug("输出分隔线")
 
+def get_nodejs_paths():
+    """
+    获取根目录下Node.js和npm可执行文件的路径
+
+    返回:
+        tuple: (node路径, npm路径)
+    """
+    nodejs_dir = os.path.join(BASE_DIR, "nodejs")
+    node_exe = os.path.join(nodejs_dir, "node.exe" if IS_WINDOWS else "bin/node")
+    npm_exe = os.path.join(nodejs_dir, "npm.cmd" if IS_WINDOWS else "bin/npm")
+    return node_exe, npm_exe
+
+def set_nodejs_paths(node_exe, npm_exe):
+    """
+    设置全局的Node.js和npm路径，供其他函数使用
+
+    参数:
+        node_exe: Node.js可执行文件路径
+        npm_exe: npm可执行文件路径
+    """
+    global NODE_EXE, NPM_EXE
+    NODE_EXE = node_exe
+    NPM_EXE = npm_exe
+
+def get_file_signature(file_path):
+    """
+    获取文件签名(路径、修改时间、大小)，用于判断可执行文件是否被替换或升级
+
+    参数:
+        file_path: 文件路径
+
+    返回:
+        dict: 文件签名
+    """
+    stat = os.stat(file_path)
+    return {"path": os.path.abspath(file_path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+def load_probe_cache(node_exe, npm_exe):
+    """
+    读取环境探测缓存，只有Node.js和npm的签名都与缓存一致时才视为命中
+
+    参数:
+        node_exe: Node.js可执行文件路径
+        npm_exe: npm可执行文件路径
+
+    返回:
+        dict或None: 缓存的探测结果，未命中时返回None
+    """
+    try:
+        with open(ENV_PROBE_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("node") == get_file_signature(node_exe) and cache.get("npm") == get_file_signature(npm_exe):
+            return cache
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+def save_probe_cache(node_exe, npm_exe, node_version, npm_version):
+    """
+    保存环境探测结果，写入临时文件后重命名，避免中断时留下残缺的缓存
+
+    参数:
+        node_exe: Node.js可执行文件路径
+        npm_exe: npm可执行文件路径
+        node_version: Node.js版本
+        npm_version: npm版本
+    """
+    cache = {
+        "node": get_file_signature(node_exe),
+        "npm": get_file_signature(npm_exe),
+        "node_version": node_version,
+        "npm_version": npm_version,
+        "probed_at": datetime.now().isoformat(timespec="seconds")
+    }
+    temp_path = f"{ENV_PROBE_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temp_path, ENV_PROBE_CACHE_FILE)
+    except OSError as e:
+        logger.warning(f"保存环境探测缓存失败: {str(e)}")
+
+def locate_nodejs():
+    """
+    跳过环境检查时使用：只确认根目录下的Node.js和npm存在，不执行版本检测
+
+    返回:
+        bool: Node.js和npm是否存在
+    """
+    node_exe, npm_exe = get_nodejs_paths()
+    if not os.path.exists(node_exe) or not os.path.exists(npm_exe):
+        error_msg = "未检测到根目录下的Node.js或npm，请去掉 --no-check 参数运行以检查或下载Node.js"
+        logger.error(error_msg)
+        print(f"{Colors.FAIL}{error_msg}{Colors.ENDC}")
+        return False
+    set_nodejs_paths(node_exe, npm_exe)
+    return True
+
 def check_nodejs():
     """
     检查根目录下的Node.js是否存在并且版本是否满足要求
@@ -351,9 +988,7 @@ def check_nodejs():
     print(f"{Colors.BLUE}检查根目录下的Node.js环境...{Colors.ENDC}")
     
     # 定义根目录下Node.js和npm的路径
-    nodejs_dir = os.path.join(BASE_DIR, "nodejs")
-    node_exe = os.path.join(nodejs_dir, "node.exe" if IS_WINDOWS else "bin/node")
-    npm_exe = os.path.join(nodejs_dir, "npm.cmd" if IS_WINDOWS else "bin/npm")
+    node_exe, npm_exe = get_nodejs_paths()
     
     # 检查Node.js可执行文件是否存在
     if not os.path.exists(node_exe):
@@ -364,9 +999,7 @@ def check_nodejs():
         if choice.lower() == 'y':
             if download_nodejs():
                 # 重新定义路径（因为下载可能创建了不同的目录结构）
-                nodejs_dir = os.path.join(BASE_DIR, "nodejs")
-                node_exe = os.path.join(nodejs_dir, "node.exe" if IS_WINDOWS else "bin/node")
-                npm_exe = os.path.join(nodejs_dir, "npm.cmd" if IS_WINDOWS else "bin/npm")
+                node_exe, npm_exe = get_nodejs_paths()
                 
                 # 再次检查文件是否存在
                 if not os.path.exists(node_exe):
@@ -397,6 +1030,15 @@ def check_nodejs():
         print(f"{Colors.FAIL}{error_msg}{Colors.ENDC}")
         return False
     
+    # Node.js和npm未变化时直接使用缓存的版本，省去两次子进程调用
+    cached = load_probe_cache(node_exe, npm_exe)
+    if cached:
+        logger.info(f"检测到根目录Node.js版本: {cached['node_version']}, npm版本: {cached['npm_version']} (缓存)")
+        print(f"{Colors.GREEN}检测到根目录Node.js版本: {cached['node_version']} (缓存){Colors.ENDC}")
+        print(f"{Colors.GREEN}检测到根目录npm版本: {cached['npm_version']} (缓存){Colors.ENDC}")
+        set_nodejs_paths(node_exe, npm_exe)
+        return True
+    
     # 获取Node.js版本
     node_command = [node_exe, "--version"]
     
@@ -481,10 +1123,10 @@ def check_nodejs():
         print(f"{Colors.FAIL}{error_msg}{Colors.ENDC}")
         return False
     
+    save_probe_cache(node_exe, npm_exe, node_version, npm_version)
+    
     # 设置全局变量以便其他函数使用
-    global NODE_EXE, NPM_EXE
-    NODE_EXE = node_exe
-    NPM_EXE = npm_exe
+    set_nodejs_paths(node_exe, npm_exe)
     
     return True
 
@@ -556,8 +1198,8 @@ def setup_environment():
     logger.info("开始环境检查")
     print(f"{Colors.BLUE}开始环境检查...{Colors.ENDC}")
     
-    # 检查Node.js
-    if not check_nodejs():
+    # 检查Node.js，main中已检查过时不再重复检测
+    if NODE_EXE is None and not check_nodejs():
         return False
     
     # 检查后端依赖
@@ -577,10 +1219,28 @@ def setup_environment():
     print(f"{Colors.GREEN}环境检查完成，所有依赖已安装{Colors.ENDC}")
     return True
 
-def start_backend():
+def report_first_spawn(name):
+    """
+    输出从启动器开始运行到第一个服务进程启动的耗时，只在第一次调用时输出
+
+    参数:
+        name: 服务名称
+    """
+    global first_spawn_reported
+    if first_spawn_reported:
+        return
+    first_spawn_reported = True
+    elapsed = time.perf_counter() - LAUNCHER_STARTED_AT
+    logger.info(f"启动器到第一个服务进程({name})启动耗时: {elapsed:.3f}s")
+    print(f"{Colors.BLUE}启动器到第一个服务进程({name})启动耗时: {elapsed:.3f}s{Colors.ENDC}")
+
+def start_backend(port=None):
     """
     启动后端服务
 
+    参数:
+        port: 监听端口，滚动重启模式下为只在本机监听的内部端口，未指定时使用后端的默认端口
+
     返回:
         subprocess.Popen或None: 后端服务进程，如果启动失败则返回None
     """
@@ -628,6 +1288,17 @@ def start_backend():
     
     # 使用根目录的Node.js启动后端
     npm_cmd = create_npm_command(NPM_EXE, NODE_EXE, "start")
+    if port:
+        npm_cmd["env"]["PORT"] = str(port)
+        npm_cmd["env"]["HOST"] = "127.0.0.1"
+
+    # 按配置的内存预算设置Node.js堆上限
+    budget_mb, heap_limit_mb = get_backend_heap_limit_mb()
+    node_options = npm_cmd["env"].get("NODE_OPTIONS", "")
+    if "--max-old-space-size" not in node_options:
+        npm_cmd["env"]["NODE_OPTIONS"] = f"{node_options} --max-old-space-size={heap_limit_mb}".strip()
+    logger.info(f"后端内存预算: {budget_mb}MB, Node.js堆上限: {heap_limit_mb}MB")
+    print(f"{Colors.BLUE}后端内存预算: {budget_mb}MB, Node.js堆上限: {heap_limit_mb}MB{Colors.ENDC}")
     
     try:
         if IS_WINDOWS:
@@ -649,9 +1320,10 @@ def start_backend():
                 shell=npm_cmd["shell"],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                preexec_fn=os.setsid,
+                preexec_fn=create_preexec_fn("backend", port),
                 env=npm_cmd["env"]  # 传递环境变量
             )
+        report_first_spawn("后端")
         
         # 等待服务启动
         time.sleep(2)
@@ -705,9 +1377,10 @@ def start_frontend():
                 shell=npm_cmd["shell"],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                preexec_fn=os.setsid,
+                preexec_fn=create_preexec_fn("frontend"),
                 env=npm_cmd["env"]  # 传递环境变量
             )
+        report_first_spawn("前端")
         
         # 等待服务启动
         time.sleep(2)
@@ -744,23 +1417,8 @@ def cleanup_processes():
                 process_id = process.pid
                 logger.info(f"正在终止进程: {process_id}")
                 
-                if IS_WINDOWS:
-                    # Windows下强制终止进程树
-                    subprocess.call(['taskkill', '/F', '/T', '/PID', str(process_id)])
-                else:
-                    # Unix下终止进程组
-                    os.killpg(os.getpgid(process_id), signal.SIGTERM)
-                    
-                # 给进程一些时间来优雅地关闭
-                time.sleep(1)
-                
-                # 如果进程仍在运行，强制终止
-                if process.poll() is None:
-                    logger.warning(f"进程 {process_id} 未正常终止，强制关闭")
-                    if IS_WINDOWS:
-                        subprocess.call(['taskkill', '/F', '/PID', str(process_id)])
-                    else:
-                        os.killpg(os.getpgid(process_id), signal.SIGKILL)
+                # 给进程一些时间来优雅地关闭，超时后强制终止
+                terminate_process(process, 1)
                 
                 logger.info(f"进程 {process_id} 已终止")
             except Exception as e:
@@ -794,49 +1452,34 @@ def monitor_processes():
     logger.info("开始监控进程状态")
     
     try:
-        while processes:
-            for i, process in enumerate(processes[:]):
-                # 检查进程是否仍在运行
-                if process.poll() is not None:
+        while True:
+            # 进程输出由start_output_readers的后台线程处理，这里只检查进程状态
+            with services_lock:
+                for process in processes[:]:
+                    # 检查进程是否仍在运行
+                    if process.poll() is None:
+                        continue
+                    service = find_service(process)
+                    # 通过控制接口重启或排空的进程由对应操作处理
+                    if service and service["state"] in ("restarting", "draining"):
+                        continue
                     logger.warning(f"进程 {process.pid} 已终止，退出代码: {process.returncode}")
                     print(f"{Colors.WARNING}进程 {process.pid} 已终止，退出代码: {process.returncode}{Colors.ENDC}")
                     processes.remove(process)
-                    continue
-                
-                # 处理标准输出 - 修改为安全解码
-                while True:
-                    line = process.stdout.readline()
-                    if not line:
-                        break
-                    try:
-                        # 使用UTF-8解码，errors='replace'参数会用替换无法解码的字符
-                        decoded_line = line.decode('utf-8', errors='replace').strip()
-                        print(decoded_line)
-                    except Exception as e:
-                        logger.error(f"解码进程输出时发生错误: {str(e)}")
-                        continue
+                    if service:
+                        service["state"] = "exited"
                 
-                # 处理标准错误 - 修改为安全解码
-                while True:
-                    line = process.stderr.readline()
-                    if not line:
-                        break
-                    try:
-                        # 使用UTF-8解码，errors='replace'参数会用替换无法解码的字符
-                        decoded_line = line.decode('utf-8', errors='replace').strip()
-                        print(f"{Colors.WARNING}{decoded_line}{Colors.ENDC}")
-                    except Exception as e:
-                        logger.error(f"解码进程错误输出时发生错误: {str(e)}")
-                        continue
+                # 排空或重启失败的服务可以通过控制接口重新启动，此时启动器继续运行
+                waiting = any(service["state"] in ("restarting", "draining", "drained", "failed") for service in services.values())
             
             # 如果所有进程都已退出，则退出循环
-            if not processes:
+            if not processes and not waiting:
                 logger.warning("所有服务已停止，启动器退出")
                 print(f"{Colors.FAIL}所有服务已停止，启动器退出{Colors.ENDC}")
                 break
             
             # 休眠一段时间再检查
-            time.sleep(0.1)
+            time.sleep(0.5)
     except KeyboardInterrupt:
         # 捕获键盘中断(Ctrl+C)
         logger.info("接收到键盘中断，正在关闭服务")
@@ -848,20 +1491,1653 @@ def monitor_processes():
         print(f"{Colors.FAIL}{error_msg}{Colors.ENDC}")
         cleanup_processes()
 
-def welcome():
+def start_output_readers(service, process):
     """
-    显示欢迎信息并解析命令行参数
+    在后台线程中读取服务进程的输出，打印到控制台并写入服务的日志环形缓冲区
+
+    参数:
+        service: 服务状态
+        process: 服务进程
     """
-    # 显示欢迎横幅
-    print_banner()
-    
-    # 解析命令行参数
-    args = parse_arguments()
-    
-    # 注册信号处理函数，确保能够正确处理Ctrl+C
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
+    def read(stream, stream_name):
+        for line in iter(stream.readline, b""):
+            # 使用UTF-8解码，errors='replace'参数会用替换无法解码的字符
+            decoded_line = line.decode("utf-8", errors="replace").rstrip()
+            with services_lock:
+                service["log_seq"] += 1
+                service["logs"].append({
+                    "seq": service["log_seq"],
+                    "time": time.time(),
+                    "stream": stream_name,
+                    "line": decoded_line
+                })
+            if stream_name == "stderr":
+                print(f"{Colors.WARNING}{decoded_line}{Colors.ENDC}")
+            else:
+                print(decoded_line)
+
+    for stream, stream_name in ((process.stdout, "stdout"), (process.stderr, "stderr")):
+        thread = threading.Thread(target=read, args=(stream, stream_name),
+                                  name=f"{service['name']}-{stream_name}", daemon=True)
+        thread.start()
+
+def register_service(name, process, starter, port=None):
+    """
+    登记受控服务，加入进程监控列表并开始收集输出
+
+    参数:
+        name: 服务名称
+        process: 服务进程
+        starter: 重新启动服务的函数，返回新进程或None
+        port: 服务实例监听的端口
+    """
+    with services_lock:
+        service = services.get(name)
+        if service is None:
+            service = {
+                "name": name,
+                "starter": starter,
+                "restarts": 0,
+                "logs": deque(maxlen=LOG_RING_SIZE),
+                "log_seq": 0,
+                "cpu_sample": None
+            }
+            services[name] = service
+        service.update(process=process, port=port, started_at=time.time(), state="running", cpu_sample=None)
+        if process not in processes:
+            processes.append(process)
+    start_output_readers(service, process)
+
+def find_service(process):
+    """
+    查找进程对应的受控服务
+
+    参数:
+        process: 子进程
+
+    返回:
+        dict或None: 服务状态
+    """
+    with services_lock:
+        for service in services.values():
+            if service["process"] is process:
+                return service
+    return None
+
+def terminate_process(process, timeout):
+    """
+    终止进程及其子进程：先发送SIGTERM等待优雅退出，超时后强制终止
+
+    参数:
+        process: 子进程
+        timeout: 等待优雅退出的时间(秒)
+    """
+    if process.poll() is not None:
+        return
+    process_id = process.pid
+    if IS_WINDOWS:
+        # Windows下强制终止进程树
+        subprocess.call(['taskkill', '/F', '/T', '/PID', str(process_id)])
+    else:
+        # Unix下终止进程组
+        try:
+            os.killpg(os.getpgid(process_id), signal.SIGTERM)
+        except ProcessLookupError:
+            return
+
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        logger.warning(f"进程 {process_id} 未正常终止，强制关闭")
+        if IS_WINDOWS:
+            subprocess.call(['taskkill', '/F', '/PID', str(process_id)])
+        else:
+            os.killpg(os.getpgid(process_id), signal.SIGKILL)
+        process.wait(timeout=5)
+
+def read_process_group_usage(pgid):
+    """
+    汇总进程组内所有进程的内存和CPU时间，通过npm启动的服务实际运行在子进程中
+    依赖/proc文件系统，非Linux系统返回None
+
+    参数:
+        pgid: 进程组ID
+
+    返回:
+        dict或None: {"rssBytes", "cpuSeconds", "processCount", "openFds", "maxProcessFds"}
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    clock_ticks = os.sysconf("SC_CLK_TCK")
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    usage = {"rssBytes": 0, "cpuSeconds": 0.0, "processCount": 0, "openFds": 0, "maxProcessFds": 0}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                data = f.read().decode("utf-8", errors="replace")
+        except OSError:
+            continue
+        # 进程名可能包含空格和括号，从最后一个")"之后开始按字段切分
+        fields = data[data.rindex(")") + 2:].split()
+        if int(fields[2]) != pgid:
+            continue
+        usage["cpuSeconds"] += (int(fields[11]) + int(fields[12])) / clock_ticks
+        usage["rssBytes"] += int(fields[21]) * page_size
+        usage["processCount"] += 1
+        try:
+            fds = len(os.listdir(f"/proc/{entry}/fd"))
+        except OSError:
+            continue
+        usage["openFds"] += fds
+        usage["maxProcessFds"] = max(usage["maxProcessFds"], fds)
+    return usage
+
+def get_service_status(service):
+    """
+    获取服务的运行状态和资源占用
+
+    参数:
+        service: 服务状态
+
+    返回:
+        dict: 服务状态摘要
+    """
+    process = service["process"]
+    running = process.poll() is None
+    now = time.time()
+    status = {
+        "name": service["name"],
+        "state": service["state"],
+        "pid": process.pid,
+        "port": service["port"],
+        "running": running,
+        "exitCode": process.returncode,
+        "uptimeSeconds": round(now - service["started_at"], 1) if running else None,
+        "restarts": service["restarts"],
+        "rssBytes": None,
+        "cpuPercent": None,
+        "cpuSeconds": None,
+        "processCount": None,
+        "openFds": None,
+        "maxProcessFds": None
+    }
+    usage = read_process_group_usage(process.pid) if running and not IS_WINDOWS else None
+    if usage:
+        # CPU占用按两次查询之间的增量计算，首次查询时取启动以来的平均值
+        previous = service["cpu_sample"] or (service["started_at"], 0.0)
+        elapsed = now - previous[0]
+        if elapsed > 0:
+            status["cpuPercent"] = round(max(0.0, usage["cpuSeconds"] - previous[1]) / elapsed * 100, 1)
+        service["cpu_sample"] = (now, usage["cpuSeconds"])
+        status.update(usage)
+        status["cpuSeconds"] = round(usage["cpuSeconds"], 2)
+    return status
+
+def get_service_limits(name):
+    """
+    获取服务的资源限制，环境变量 LAUNCHER_<服务>_<项> 可覆盖默认值，
+    例如 LAUNCHER_BACKEND_MEMORY_MB=4096，设为0表示不限制
+
+    参数:
+        name: 服务名称
+
+    返回:
+        dict: 资源限制，值为None的项不限制
+    """
+    limits = dict(SERVICE_LIMITS.get(name, {}))
+    if name == "backend" and limits.get("memory_mb") is None:
+        # 在Node.js堆上限之外，再留出与内存预算相同的空间给Buffer等堆外内存
+        budget_mb, heap_limit_mb = get_backend_heap_limit_mb()
+        limits["memory_mb"] = heap_limit_mb + budget_mb
+    for key in list(limits):
+        value = os.environ.get(f"LAUNCHER_{name.upper()}_{key.upper()}")
+        if not value:
+            continue
+        try:
+            limits[key] = int(value) or None
+        except ValueError:
+            logger.warning(f"忽略无效的资源限制: LAUNCHER_{name.upper()}_{key.upper()}={value}")
+    return limits
+
+def get_cgroup_base():
+    """
+    准备cgroup v2：把启动器自身移入 <当前cgroup>/launcher 叶子节点，并为子cgroup启用memory和cpu控制器
+    需要当前cgroup已委派给当前用户(例如通过 systemd-run --user --scope -p Delegate=yes 启动)且其中只有启动器自身，
+    否则返回None并保持启动器所在的cgroup不变，此时只应用rlimit和nice
+
+    返回:
+        str或None: 可在其下创建服务cgroup的目录
+    """
+    if cgroup_state["checked"]:
+        return cgroup_state["base"]
+    cgroup_state["checked"] = True
+    if IS_WINDOWS or not os.path.exists(os.path.join(CGROUP_ROOT, "cgroup.controllers")):
+        return None
+    try:
+        with open("/proc/self/cgroup", "r", encoding="utf-8") as f:
+            relative = next(line.strip()[3:] for line in f if line.startswith("0::"))
+        base = os.path.join(CGROUP_ROOT, relative.lstrip("/"))
+        with open(os.path.join(base, "cgroup.controllers"), "r", encoding="utf-8") as f:
+            available = f.read().split()
+        controllers = [name for name in ("memory", "cpu") if name in available]
+        if not controllers:
+            raise OSError("当前cgroup没有可用的memory/cpu控制器")
+
+        # 先确认当前cgroup已委派：可写，且其中只有启动器自身，否则启用控制器必然失败(EBUSY)
+        for name in ("", "cgroup.procs", "cgroup.subtree_control"):
+            if not os.access(os.path.join(base, name), os.W_OK):
+                raise OSError(f"当前cgroup未委派给当前用户: {base}")
+        with open(os.path.join(base, "cgroup.procs"), "r", encoding="utf-8") as f:
+            others = [pid for pid in f.read().split() if pid != str(os.getpid())]
+        if others:
+            raise OSError(f"当前cgroup中还有其他进程({len(others)}个)，无法为子cgroup启用控制器")
+
+        # cgroup v2中有进程的节点不能再为子节点启用控制器，先把启动器移到叶子节点，失败时移回并删除叶子节点
+        leaf = os.path.join(base, "launcher")
+        created = not os.path.isdir(leaf)
+        os.makedirs(leaf, exist_ok=True)
+        moved = False
+        try:
+            with open(os.path.join(leaf, "cgroup.procs"), "w", encoding="utf-8") as f:
+                f.write(str(os.getpid()))
+            moved = True
+            with open(os.path.join(base, "cgroup.subtree_control"), "w", encoding="utf-8") as f:
+                f.write(" ".join(f"+{name}" for name in controllers))
+        except OSError:
+            try:
+                if moved:
+                    with open(os.path.join(base, "cgroup.procs"), "w", encoding="utf-8") as f:
+                        f.write(str(os.getpid()))
+                if created:
+                    os.rmdir(leaf)
+            except OSError as cleanup_error:
+                logger.warning(f"恢复启动器cgroup失败: {str(cleanup_error)}")
+            raise
+    except (OSError, StopIteration) as e:
+        logger.info(f"cgroup v2不可用，只应用rlimit和nice限制: {str(e)}")
+        return None
+
+    cgroup_state["base"] = base
+    logger.info(f"使用cgroup v2限制服务资源: {base}")
+    return base
+
+def setup_service_cgroup(key, limits):
+    """
+    为服务实例创建cgroup并写入memory.max和cpu.max
+
+    参数:
+        key: cgroup名称，滚动重启时新旧实例各用一个，避免重叠期间共享内存上限
+        limits: 资源限制
+
+    返回:
+        str或None: 子进程需要写入的cgroup.procs路径，不可用时返回None
+    """
+    if not limits.get("memory_mb") and not limits.get("cpu_percent"):
+        return None
+    base = get_cgroup_base()
+    if not base:
+        return None
+    path = os.path.join(base, key)
+    try:
+        os.makedirs(path, exist_ok=True)
+        memory_max = str(limits["memory_mb"] * 1024 * 1024) if limits.get("memory_mb") else "max"
+        with open(os.path.join(path, "memory.max"), "w", encoding="utf-8") as f:
+            f.write(memory_max)
+        cpu_quota = int(limits["cpu_percent"] * CGROUP_CPU_PERIOD / 100) if limits.get("cpu_percent") else "max"
+        with open(os.path.join(path, "cpu.max"), "w", encoding="utf-8") as f:
+            f.write(f"{cpu_quota} {CGROUP_CPU_PERIOD}")
+    except OSError as e:
+        logger.warning(f"设置cgroup {key} 失败: {str(e)}")
+        return None
+
+    if not cgroup_state["created"]:
+        atexit.register(remove_service_cgroups)
+    cgroup_state["created"].add(path)
+    return os.path.join(path, "cgroup.procs")
+
+def remove_service_cgroups():
+    """
+    删除启动器创建的服务cgroup，仍有进程的cgroup会删除失败，直接忽略
+    """
+    for path in cgroup_state["created"]:
+        try:
+            os.rmdir(path)
+        except OSError:
+            pass
+
+def get_ioprio_setter():
+    """
+    获取设置IO优先级的函数，Python没有对应接口，通过ctypes调用ioprio_set系统调用
+
+    返回:
+        函数或None: 接受best-effort优先级(0-7)，不支持的平台返回None
+    """
+    syscall_number = IOPRIO_SET_SYSCALLS.get(platform.machine())
+    if IS_WINDOWS or syscall_number is None:
+        return None
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+    except (ImportError, OSError):
+        return None
+
+    def set_ioprio(level):
+        # IOPRIO_WHO_PROCESS=1，进程号0表示当前进程，IOPRIO_CLASS_BE=2
+        libc.syscall(syscall_number, 1, 0, (2 << 13) | level)
+
+    return set_ioprio
+
+def create_preexec_fn(name, instance=None):
+    """
+    生成子进程exec之前执行的函数：新建进程组，并应用服务的资源限制
+    cgroup目录和系统调用在fork之前准备好，子进程中只做系统调用，失败时忽略
+
+    参数:
+        name: 服务名称
+        instance: 实例标识(如端口)，用于区分cgroup
+
+    返回:
+        函数: 传给Popen的preexec_fn
+    """
+    import resource
+
+    limits = get_service_limits(name)
+    cgroup_procs = setup_service_cgroup(name if instance is None else f"{name}-{instance}", limits)
+    set_ioprio = get_ioprio_setter() if limits.get("ionice") is not None else None
+    nofile = limits.get("nofile")
+    nice = limits.get("nice")
+    ionice = limits.get("ionice")
+
+    applied = [f"内存 {limits['memory_mb']}MB" if limits.get("memory_mb") and cgroup_procs else None,
+               f"CPU {limits['cpu_percent']}%" if limits.get("cpu_percent") and cgroup_procs else None,
+               f"文件描述符 {nofile}" if nofile else None,
+               f"nice {nice}" if nice else None,
+               f"ionice {ionice}" if set_ioprio else None]
+    applied = [item for item in applied if item]
+    if applied:
+        logger.info(f"{name}服务资源限制: {', '.join(applied)}")
+
+    def preexec():
+        os.setsid()
+        if cgroup_procs:
+            try:
+                fd = os.open(cgroup_procs, os.O_WRONLY)
+                try:
+                    os.write(fd, b"0")
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass
+        if nice:
+            try:
+                os.nice(nice)
+            except OSError:
+                pass
+        if nofile:
+            # Node.js启动时会把软限制提高到硬限制，因此两者都要设置
+            try:
+                soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+                limit = nofile if hard == resource.RLIM_INFINITY else min(nofile, hard)
+                resource.setrlimit(resource.RLIMIT_NOFILE, (limit, limit))
+            except (OSError, ValueError):
+                pass
+        if set_ioprio:
+            set_ioprio(ionice)
+
+    return preexec
+
+def get_fd_limit(pid):
+    """
+    读取进程的打开文件数软限制
+
+    返回:
+        int或None: 软限制，无法读取或不限制时返回None
+    """
+    try:
+        with open(f"/proc/{pid}/limits", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("Max open files"):
+                    value = line.split()[3]
+                    return int(value) if value.isdigit() else None
+    except OSError:
+        pass
+    return None
+
+def check_resource_alerts(service, sample, limits):
+    """
+    按阈值检查服务的资源占用，进入或解除告警状态时输出一次
+
+    参数:
+        service: 服务状态
+        sample: 本次采样
+        limits: 资源限制
+    """
+    active = service.setdefault("alerts", set())
+    name = service["name"]
+    checks = []
+
+    memory_mb = limits.get("memory_mb")
+    if memory_mb:
+        ratio = sample["rssBytes"] / (memory_mb * 1024 * 1024)
+        checks.append(("memory", ratio >= RESOURCE_ALERT_RATIO,
+                       f"{name}内存 {sample['rssBytes'] / 1024 / 1024:.0f}MB，已达上限 {memory_mb}MB 的 {ratio * 100:.0f}%"))
+
+    # CPU需连续多次超过阈值才告警，避免解析等短暂高峰误报
+    cpu_limit = limits.get("cpu_percent") or 100
+    streak = service.get("cpu_streak", 0)
+    if sample["cpuPercent"] is not None:
+        streak = streak + 1 if sample["cpuPercent"] >= cpu_limit * RESOURCE_ALERT_RATIO else 0
+    service["cpu_streak"] = streak
+    checks.append(("cpu", streak >= RESOURCE_CPU_ALERT_SAMPLES,
+                   f"{name} CPU 持续 {streak} 次采样达到 {sample['cpuPercent']}%"))
+
+    fd_limit = sample.get("fdLimit")
+    if fd_limit:
+        checks.append(("fds", sample["maxProcessFds"] >= fd_limit * RESOURCE_ALERT_RATIO,
+                       f"{name}打开文件数 {sample['maxProcessFds']}，接近上限 {fd_limit}"))
+
+    for key, alerting, message in checks:
+        if alerting and key not in active:
+            active.add(key)
+            logger.warning(f"资源告警: {message}")
+            print(f"{Colors.FAIL}[资源告警] {message}{Colors.ENDC}")
+        elif not alerting and key in active:
+            active.discard(key)
+            logger.info(f"资源告警解除: {name} {key}")
+
+def format_resource_trend(service, history):
+    """
+    生成一个服务的资源趋势摘要
+
+    参数:
+        service: 服务状态
+        history: 采样历史
+
+    返回:
+        str: 摘要文本
+    """
+    first, last = history[0], history[-1]
+    elapsed_minutes = (last["time"] - first["time"]) / 60
+    rss_mb = last["rssBytes"] / 1024 / 1024
+    parts = [f"RSS {rss_mb:.0f}MB"]
+    if elapsed_minutes > 0:
+        parts.append(f"({(last['rssBytes'] - first['rssBytes']) / 1024 / 1024 / elapsed_minutes:+.1f}MB/min)")
+    cpu_values = [item["cpuPercent"] for item in history if item["cpuPercent"] is not None]
+    if cpu_values:
+        parts.append(f"CPU {last['cpuPercent'] or 0:.0f}% (平均 {sum(cpu_values) / len(cpu_values):.0f}%, 峰值 {max(cpu_values):.0f}%)")
+    parts.append(f"FD {last['openFds']}")
+    return f"{service['name']} " + " ".join(parts)
+
+def start_resource_monitor(interval):
+    """
+    启动后台线程，按间隔采样各服务进程组的内存、CPU和打开的文件描述符，
+    约每分钟输出一次趋势，超过阈值时告警
+
+    参数:
+        interval: 采样间隔(秒)
+    """
+    if IS_WINDOWS or not os.path.isdir("/proc"):
+        logger.info("当前系统没有/proc，不采样服务资源占用")
+        return
+
+    report_every = max(1, round(RESOURCE_REPORT_INTERVAL / interval))
+
+    def sample_loop():
+        rounds = 0
+        while processes or services:
+            time.sleep(interval)
+            rounds += 1
+            summaries = []
+            with services_lock:
+                items = [service for service in services.values() if service["process"].poll() is None]
+            for service in items:
+                pid = service["process"].pid
+                usage = read_process_group_usage(pid)
+                if not usage:
+                    continue
+                # 进程更换(重启)后重新开始记录
+                if service.get("resource_pid") != pid:
+                    service["resource_pid"] = pid
+                    service["resource_history"] = deque(maxlen=RESOURCE_HISTORY_SIZE)
+                history = service["resource_history"]
+                now = time.time()
+                sample = dict(usage, time=now, cpuPercent=None, fdLimit=get_fd_limit(pid))
+                if history:
+                    previous = history[-1]
+                    sample["cpuPercent"] = round(
+                        max(0.0, usage["cpuSeconds"] - previous["cpuSeconds"]) / (now - previous["time"]) * 100, 1)
+                history.append(sample)
+                check_resource_alerts(service, sample, get_service_limits(service["name"]))
+                summaries.append(format_resource_trend(service, history))
+            if summaries and rounds % report_every == 0:
+                logger.info(f"[资源] {' | '.join(summaries)}")
+
+    threading.Thread(target=sample_loop, name="resource-monitor", daemon=True).start()
+    logger.info(f"每 {interval} 秒采样一次服务资源占用")
+
+def get_service(name):
+    """
+    获取受控服务，不存在时抛出KeyError
+    """
+    with services_lock:
+        if name not in services:
+            raise KeyError(f"服务不存在或未启动: {name}")
+        return services[name]
+
+def restart_service(name, timeout=DEFAULT_DRAIN_TIMEOUT):
+    """
+    重启单个服务，其他服务不受影响
+
+    参数:
+        name: 服务名称
+        timeout: 等待旧进程优雅退出的时间(秒)
+
+    返回:
+        dict: 重启后的服务状态
+    """
+    service = get_service(name)
+    if name == "backend" and backend_proxy:
+        # 滚动重启模式下先启动新实例再切换流量，不中断服务
+        if not rolling_restart_backend("控制接口请求"):
+            raise RuntimeError("滚动重启未完成，旧实例继续服务，详见启动器日志")
+        return get_service_status(service)
+    with services_lock:
+        if service["state"] in ("restarting", "draining"):
+            raise RuntimeError(f"服务 {name} 正在{'重启' if service['state'] == 'restarting' else '排空'}，请稍后再试")
+        old_process = service["process"]
+        service["state"] = "restarting"
+
+    logger.info(f"控制接口: 重启服务 {name}")
+    print(f"{Colors.WARNING}正在重启{name}服务...{Colors.ENDC}")
+    try:
+        terminate_process(old_process, timeout)
+        new_process = service["starter"]()
+    except Exception:
+        new_process = None
+        logger.exception(f"重启服务 {name} 时发生错误")
+
+    with services_lock:
+        if old_process in processes:
+            processes.remove(old_process)
+        if not new_process:
+            # 保留失败状态，启动器继续运行以便再次重启
+            service["state"] = "failed"
+            raise RuntimeError(f"服务 {name} 重启失败")
+        service["restarts"] += 1
+    register_service(name, new_process, service["starter"])
+    return get_service_status(service)
+
+def drain_service(name, timeout=DEFAULT_DRAIN_TIMEOUT):
+    """
+    排空单个服务：发送SIGTERM让服务处理完进行中的请求并保存数据后退出，不再自动启动
+    排空后的服务可以通过restart重新启动
+
+    参数:
+        name: 服务名称
+        timeout: 等待优雅退出的时间(秒)，超时后强制终止
+
+    返回:
+        dict: 排空后的服务状态
+    """
+    service = get_service(name)
+    with services_lock:
+        if service["state"] != "running":
+            raise RuntimeError(f"服务 {name} 当前状态为 {service['state']}，无法排空")
+        process = service["process"]
+        service["state"] = "draining"
+
+    logger.info(f"控制接口: 排空服务 {name}")
+    print(f"{Colors.WARNING}正在排空{name}服务...{Colors.ENDC}")
+    started = time.time()
+    try:
+        terminate_process(process, timeout)
+    except Exception:
+        with services_lock:
+            service["state"] = "running"
+        raise
+
+    with services_lock:
+        if process in processes:
+            processes.remove(process)
+        service["state"] = "drained"
+    logger.info(f"服务 {name} 已排空，耗时 {time.time() - started:.1f}s")
+    return get_service_status(service)
+
+def get_service_logs(name, lines=100, after=0):
+    """
+    获取服务最近的输出行
+
+    参数:
+        name: 服务名称
+        lines: 最多返回的行数
+        after: 只返回序号大于该值的行，用于持续跟踪
+
+    返回:
+        list: 日志行
+    """
+    service = get_service(name)
+    with services_lock:
+        entries = [entry for entry in service["logs"] if entry["seq"] > after]
+    return entries[-lines:] if lines > 0 else entries
+
+def start_control_server(port):
+    """
+    启动仅监听本机的控制接口，并把端口和访问令牌写入状态文件供 start.py ctl 读取
+    令牌防止本机网页等其他来源伪造请求
+
+    参数:
+        port: 监听端口
+
+    返回:
+        bool: 是否启动成功
+    """
+    import http.server
+    import secrets
+    import socketserver
+    import urllib.parse
+
+    token = secrets.token_hex(16)
+
+    class ControlHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.dispatch("GET")
+
+        def do_POST(self):
+            self.dispatch("POST")
+
+        def dispatch(self, method):
+            if not secrets.compare_digest(self.headers.get("X-Launcher-Token", ""), token):
+                return self.send_json(401, False, "令牌无效")
+
+            url = urllib.parse.urlsplit(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            parts = [part for part in url.path.split("/") if part]
+            try:
+                if method == "GET" and parts == ["status"]:
+                    with services_lock:
+                        items = list(services.values())
+                    data = {
+                        "pid": os.getpid(),
+                        "uptimeSeconds": round(time.perf_counter() - LAUNCHER_STARTED_AT, 1),
+                        "services": [get_service_status(service) for service in items]
+                    }
+                    return self.send_json(200, True, "获取状态成功", data)
+                if method == "GET" and parts == ["metrics"]:
+                    metrics = fetch_backend_metrics()
+                    if metrics is None:
+                        return self.send_json(503, False, "无法获取后端指标")
+                    # 摘要按与上次查询之间的增量计算，首次查询时覆盖启动以来的全部数据
+                    now = time.time()
+                    with services_lock:
+                        previous = metrics_snapshot.get("metrics") or {}
+                        since = metrics_snapshot.get("at") or services.get("backend", {}).get("started_at", now)
+                        metrics_snapshot.update(metrics=metrics, at=now)
+                    data = {
+                        "summary": format_metrics_summary(metrics, previous, max(now - since, 1)),
+                        "intervalSeconds": round(now - since, 1),
+                        "metrics": {name: [[labels, value] for labels, value in samples]
+                                    for name, samples in metrics.items()}
+                    }
+                    return self.send_json(200, True, "获取指标成功", data)
+                if len(parts) == 3 and parts[0] == "services":
+                    name, action = parts[1], parts[2]
+                    timeout = float(query.get("timeout", [DEFAULT_DRAIN_TIMEOUT])[0])
+                    if method == "GET" and action == "logs":
+                        lines = int(query.get("lines", ["100"])[0])
+                        after = int(query.get("after", ["0"])[0])
+                        return self.send_json(200, True, "获取日志成功", get_service_logs(name, lines, after))
+                    if method == "POST" and action == "restart":
+                        return self.send_json(200, True, f"服务 {name} 已重启", restart_service(name, timeout))
+                    if method == "POST" and action == "drain":
+                        return self.send_json(200, True, f"服务 {name} 已排空", drain_service(name, timeout))
+                return self.send_json(404, False, "未知的控制命令")
+            except KeyError as e:
+                return self.send_json(404, False, e.args[0])
+            except ValueError as e:
+                return self.send_json(400, False, f"参数错误: {str(e)}")
+            except RuntimeError as e:
+                return self.send_json(409, False, str(e))
+            except Exception as e:
+                logger.error(f"处理控制命令失败: {method} {self.path}: {str(e)}")
+                return self.send_json(500, False, str(e))
+
+        def send_json(self, status, success, message, data=None):
+            body = json.dumps({"success": success, "message": message, "data": data},
+                              ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"控制接口: {format % args}")
+
+    class ControlServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+        daemon_threads = True
+
+    try:
+        server = ControlServer((CONTROL_HOST, port), ControlHandler)
+    except OSError as e:
+        logger.warning(f"控制接口启动失败，端口 {port} 不可用: {str(e)}")
+        print(f"{Colors.WARNING}控制接口启动失败，端口 {port} 不可用，start.py ctl 将无法使用{Colors.ENDC}")
+        return False
+    threading.Thread(target=server.serve_forever, name="control-server", daemon=True).start()
+
+    # 状态文件只允许当前用户读取
+    state = {"pid": os.getpid(), "port": port, "token": token}
+    fd = os.open(CONTROL_STATE_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+    def remove_state_file():
+        try:
+            with open(CONTROL_STATE_FILE, "r", encoding="utf-8") as f:
+                if json.load(f).get("pid") == os.getpid():
+                    os.remove(CONTROL_STATE_FILE)
+        except (OSError, ValueError):
+            pass
+
+    atexit.register(remove_state_file)
+    logger.info(f"控制接口已启动: http://{CONTROL_HOST}:{port}")
+    print(f"{Colors.BLUE}控制接口已启动，可使用 python start.py ctl status 查看服务状态{Colors.ENDC}")
+    return True
+
+def call_control_api(method, path, timeout=60):
+    """
+    调用运行中启动器的控制接口
+
+    参数:
+        method: 请求方法
+        path: 接口路径
+        timeout: 超时时间(秒)
+
+    返回:
+        tuple: (HTTP状态码, 响应JSON)
+    """
+    import urllib.request
+    import urllib.error
+
+    try:
+        with open(CONTROL_STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        raise ConnectionError("未找到运行中的启动器，请先通过 python start.py 启动服务")
+
+    request = urllib.request.Request(
+        f"http://{CONTROL_HOST}:{state['port']}{path}",
+        data=b"" if method == "POST" else None,
+        method=method,
+        headers={"X-Launcher-Token": state["token"]}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode("utf-8") or "{}")
+    except urllib.error.URLError as e:
+        raise ConnectionError(f"无法连接启动器控制接口(PID {state.get('pid')}): {e.reason}")
+
+def format_duration(seconds):
+    """
+    把秒数格式化为易读的时长
+    """
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+def print_service_table(items):
+    """
+    以表格形式输出服务状态
+    """
+    print(f"{'服务':<10}{'状态':<12}{'PID':<8}{'运行时间':<10}{'重启':<6}{'内存':<10}{'CPU':<8}{'进程数':<5}{'FD'}")
+    for item in items:
+        uptime = format_duration(item["uptimeSeconds"]) if item["uptimeSeconds"] is not None else "-"
+        rss = f"{item['rssBytes'] / 1024 / 1024:.0f}MB" if item["rssBytes"] is not None else "-"
+        cpu = f"{item['cpuPercent']:.1f}%" if item["cpuPercent"] is not None else "-"
+        count = item["processCount"] if item["processCount"] is not None else "-"
+        fds = item.get("openFds") if item.get("openFds") is not None else "-"
+        state = item["state"] if item["running"] or item["state"] != "running" else f"exited({item['exitCode']})"
+        print(f"{item['name']:<12}{state:<14}{item['pid']:<8}{uptime:<14}{item['restarts']:<8}{rss:<12}{cpu:<9}{count:<8}{fds}")
+
+def run_ctl(argv):
+    """
+    start.py ctl 子命令：通过控制接口管理运行中的启动器
+
+    参数:
+        argv: 子命令参数
+
+    返回:
+        int: 退出码
+    """
+    parser = argparse.ArgumentParser(prog="start.py ctl", description="管理运行中的服务")
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+    subparsers.add_parser("status", help="查看服务状态(PID、运行时间、重启次数、内存、CPU和打开的文件数)")
+    for command, help_text in (("restart", "重启单个服务"), ("drain", "排空并停止单个服务")):
+        sub = subparsers.add_parser(command, help=help_text)
+        sub.add_argument("service", help="服务名称: backend 或 frontend")
+        sub.add_argument("--timeout", type=float, default=DEFAULT_DRAIN_TIMEOUT,
+                         help=f"等待进程优雅退出的时间(秒)，默认{DEFAULT_DRAIN_TIMEOUT}")
+    logs_parser = subparsers.add_parser("logs", help="查看服务最近的输出")
+    logs_parser.add_argument("service", help="服务名称: backend 或 frontend")
+    logs_parser.add_argument("-n", "--lines", type=int, default=100, help="输出的行数，默认100")
+    logs_parser.add_argument("-f", "--follow", action="store_true", help="持续输出新的日志")
+    metrics_parser = subparsers.add_parser("metrics", help="查看后端最新的性能指标")
+    metrics_parser.add_argument("--raw", action="store_true", help="输出全部指标的JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "status":
+            status, body = call_control_api("GET", "/status")
+            if body.get("success"):
+                data = body["data"]
+                print(f"启动器 PID {data['pid']}，已运行 {format_duration(data['uptimeSeconds'])}")
+                print_service_table(data["services"])
+        elif args.command in ("restart", "drain"):
+            print(f"{Colors.BLUE}正在{'重启' if args.command == 'restart' else '排空'} {args.service}...{Colors.ENDC}")
+            status, body = call_control_api(
+                "POST", f"/services/{args.service}/{args.command}?timeout={args.timeout}",
+                timeout=args.timeout + 60)
+            if body.get("success"):
+                print(f"{Colors.GREEN}{body['message']}{Colors.ENDC}")
+                print_service_table([body["data"]])
+        elif args.command == "logs":
+            after = 0
+            lines = args.lines
+            while True:
+                status, body = call_control_api("GET", f"/services/{args.service}/logs?lines={lines}&after={after}")
+                if not body.get("success"):
+                    break
+                for entry in body["data"]:
+                    stamp = datetime.fromtimestamp(entry["time"]).strftime("%H:%M:%S")
+                    color = Colors.WARNING if entry["stream"] == "stderr" else ""
+                    print(f"{stamp} {color}{entry['line']}{Colors.ENDC if color else ''}")
+                    after = entry["seq"]
+                if not args.follow:
+                    break
+                lines = 0
+                time.sleep(1)
+        elif args.command == "metrics":
+            status, body = call_control_api("GET", "/metrics")
+            if body.get("success"):
+                if args.raw:
+                    print(json.dumps(body["data"]["metrics"], ensure_ascii=False, indent=2))
+                else:
+                    print(f"最近 {format_duration(body['data']['intervalSeconds'])}: {body['data']['summary']}")
+    except ConnectionError as e:
+        print(f"{Colors.FAIL}{str(e)}{Colors.ENDC}")
+        return 1
+    except KeyboardInterrupt:
+        return 0
+
+    if not body.get("success"):
+        print(f"{Colors.FAIL}{body.get('message', '请求失败')} (HTTP {status}){Colors.ENDC}")
+        return 1
+    return 0
+
+class BackendProxy:
+    """
+    本地TCP代理：对外监听后端端口，把新连接转发给当前的后端实例
+    切换实例后，已建立的连接(进行中的请求、WebSocket)仍由旧实例处理，直到旧实例关闭它们
+    """
+
+    def __init__(self, listen_port, target_port):
+        """
+        参数:
+            listen_port: 对外监听的端口
+            target_port: 后端实例的端口
+        """
+        self.listen_port = listen_port
+        self.target_port = target_port
+        # 后端实例端口 -> 活动连接数
+        self.active = {}
+        self.lock = threading.Lock()
+        self.server = None
+
+    def start(self):
+        """
+        开始监听，端口被占用时抛出OSError
+        """
+        import socket
+
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if not IS_WINDOWS:
+            self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("0.0.0.0", self.listen_port))
+        self.server.listen(128)
+        threading.Thread(target=self.accept_loop, name="backend-proxy", daemon=True).start()
+        logger.info(f"后端代理已启动: {self.listen_port} -> {self.target_port}")
+
+    def switch(self, target_port):
+        """
+        把新连接切换到另一个后端实例
+        """
+        with self.lock:
+            self.target_port = target_port
+        logger.info(f"后端代理已切换: {self.listen_port} -> {target_port}")
+
+    def connections(self, target_port):
+        """
+        获取转发到指定后端实例的活动连接数
+        """
+        with self.lock:
+            return self.active.get(target_port, 0)
+
+    def accept_loop(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self.handle, args=(client,), daemon=True).start()
+
+    def handle(self, client):
+        import socket
+
+        with self.lock:
+            target_port = self.target_port
+            self.active[target_port] = self.active.get(target_port, 0) + 1
+        try:
+            try:
+                upstream = socket.create_connection(("127.0.0.1", target_port), timeout=5)
+            except OSError:
+                # 后端实例未就绪，关闭连接让客户端重试
+                client.close()
+                return
+            upstream.settimeout(None)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            # 两个方向各用一个线程转发，任一方向结束时半关闭另一端
+            reverse = threading.Thread(target=self.pipe, args=(upstream, client), daemon=True)
+            reverse.start()
+            self.pipe(client, upstream)
+            reverse.join()
+            client.close()
+            upstream.close()
+        finally:
+            with self.lock:
+                self.active[target_port] -= 1
+
+    @staticmethod
+    def pipe(source, target):
+        import socket
+
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                target.sendall(data)
+        except OSError:
+            pass
+        finally:
+            try:
+                target.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+def warm_backend_instance(base_url, timeout):
+    """
+    让尚未接收流量的后端实例预热文件缓存，完成或超时后返回
+
+    参数:
+        base_url: 后端实例地址
+        timeout: 最长等待时间(秒)
+
+    返回:
+        bool: 是否在超时前完成预热
+    """
+    status = call_backend_api("POST", "/api/system/warmup", base_url=base_url)
+    deadline = time.time() + timeout
+    while status and status.get("state") == "running" and time.time() < deadline:
+        time.sleep(WARMUP_POLL_INTERVAL)
+        status = call_backend_api("GET", "/api/system/warmup", base_url=base_url)
+    if not status or status.get("state") != "done":
+        logger.warning("新的后端实例预热未完成，直接切换")
+        return False
+    logger.info(f"新的后端实例预热完成: {status.get('completed', 0)} 个文件")
+    return True
+
+def rolling_restart_backend(reason):
+    """
+    滚动重启后端：在备用端口启动新实例，健康检查和预热通过后把代理切换过去，再排空旧实例
+    新实例未能就绪时保留旧实例继续服务
+
+    参数:
+        reason: 重启原因
+
+    返回:
+        bool: 是否完成切换
+    """
+    if not rolling_restart_lock.acquire(blocking=False):
+        logger.info(f"滚动重启正在进行，忽略本次请求: {reason}")
+        return False
+    try:
+        service = get_service("backend")
+        old_process, old_port = service["process"], service["port"]
+        new_port = next(port for port in ROLLING_INSTANCE_PORTS if port != old_port)
+        logger.info(f"开始滚动重启后端({reason}): {old_port} -> {new_port}")
+        print(f"{Colors.BLUE}开始滚动重启后端({reason})，新实例端口 {new_port}...{Colors.ENDC}")
+        started = time.time()
+
+        new_process = start_backend(new_port)
+        if not new_process:
+            print(f"{Colors.FAIL}新的后端实例启动失败，继续使用旧实例{Colors.ENDC}")
+            return False
+        start_output_readers(service, new_process)
+
+        base_url = f"http://127.0.0.1:{new_port}"
+        if not wait_for_backend(base_url, ROLLING_READY_TIMEOUT):
+            logger.error("新的后端实例未通过健康检查，继续使用旧实例")
+            print(f"{Colors.FAIL}新的后端实例未通过健康检查，继续使用旧实例{Colors.ENDC}")
+            terminate_process(new_process, 5)
+            return False
+        if rolling_warmup:
+            warm_backend_instance(base_url, ROLLING_WARMUP_TIMEOUT)
+
+        # 旧实例先停止接收可视化配置的修改并写回，新实例接管后从存储读到的是最新的配置，
+        # 两个实例不会同时写入同一份存储；切换前到达旧实例的修改会收到503并由客户端重试
+        handoff = call_backend_api("POST", "/api/system/drain", timeout=ROLLING_HANDOFF_TIMEOUT,
+                                   base_url=f"http://127.0.0.1:{old_port}")
+        if handoff is None:
+            logger.warning("旧的后端实例未确认停止写入，直接切换")
+            print(f"{Colors.WARNING}旧的后端实例未确认停止写入，直接切换{Colors.ENDC}")
+
+        backend_proxy.switch(new_port)
+        with services_lock:
+            if old_process in processes:
+                processes.remove(old_process)
+            processes.append(new_process)
+            service.update(
+                process=new_process,
+                port=new_port,
+                starter=functools.partial(start_backend, new_port),
+                started_at=started,
+                state="running",
+                cpu_sample=None
+            )
+            service["restarts"] += 1
+        logger.info(f"后端流量已切换到新实例 PID {new_process.pid}，耗时 {time.time() - started:.1f}s")
+        print(f"{Colors.GREEN}后端流量已切换到新实例 PID {new_process.pid}，耗时 {time.time() - started:.1f}s{Colors.ENDC}")
+
+        # 在后台排空旧实例：进行中的请求处理完后退出，WebSocket客户端会重连到新实例
+        def drain_old():
+            terminate_process(old_process, DEFAULT_DRAIN_TIMEOUT)
+            remaining = backend_proxy.connections(old_port)
+            logger.info(f"旧的后端实例 PID {old_process.pid} 已停止，剩余连接 {remaining}")
+
+        threading.Thread(target=drain_old, name="backend-drain", daemon=True).start()
+        return True
+    except Exception as e:
+        logger.exception(f"滚动重启后端时发生错误: {str(e)}")
+        return False
+    finally:
+        rolling_restart_lock.release()
+
+def start_backend_dist_watcher():
+    """
+    启动后台线程，监控后端构建产物的指纹，变化时滚动重启后端
+    构建过程中文件陆续写入，连续两次检查指纹一致后才重启
+    """
+    def watch():
+        current = None
+        pending = None
+        while True:
+            try:
+                fingerprint = compute_directory_fingerprint(BACKEND_DIST_DIR)
+            except OSError:
+                # 构建过程中文件可能被删除重建，下次再检查
+                fingerprint = None
+
+            if fingerprint is None:
+                pass
+            elif current is None:
+                # 首次成功计算的指纹作为基准
+                current = fingerprint
+            elif fingerprint == current:
+                pending = None
+            elif fingerprint != pending:
+                pending = fingerprint
+            else:
+                logger.info("检测到后端构建产物变化")
+                print(f"{Colors.BLUE}检测到后端构建产物变化{Colors.ENDC}")
+                rolling_restart_backend("构建产物变化")
+                # 重启失败时同样记录新指纹，避免对同一次构建反复重试
+                current = fingerprint
+                pending = None
+            time.sleep(ROLLING_WATCH_INTERVAL)
+
+    threading.Thread(target=watch, name="backend-dist-watcher", daemon=True).start()
+    logger.info(f"正在监控后端构建产物: {BACKEND_DIST_DIR}")
+
+def get_git_commit():
+    """
+    获取当前代码的git提交号
+
+    返回:
+        str或None: 短提交号，不在git仓库中时返回None
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                capture_output=True, text=True, check=False)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def generate_bench_row(index, shape, rng):
+    """
+    生成一行基准测试数据
+
+    参数:
+        index: 行号
+        shape: 数据形状，narrow为5列，wide为50列
+        rng: 随机数生成器
+
+    返回:
+        list: (列名, 值)列表
+    """
+    categories = ("华东", "华南", "华北", "西南", "西北", "东北", "华中", "海外")
+    row = [
+        ("id", index),
+        ("name", f"item_{index:08d}"),
+        ("category", categories[index % len(categories)]),
+        ("value", round(rng.uniform(0, 10000), 2)),
+        ("date", f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d}"),
+    ]
+    if shape == "wide":
+        for col in range(BENCH_WIDE_COLUMNS - len(row)):
+            if col % 3 == 2:
+                row.append((f"label_{col}", f"L{rng.randint(0, 999)}"))
+            else:
+                row.append((f"metric_{col}", round(rng.gauss(100, 25), 3)))
+    return row
+
+def write_bench_xlsx(file_path, rows, shape, rng):
+    """
+    以流式方式写出最简xlsx文件，不依赖第三方库
+
+    参数:
+        file_path: 输出路径
+        rows: 行数
+        shape: 数据形状
+        rng: 随机数生成器
+    """
+    import zipfile
+    from xml.sax.saxutils import escape
+
+    def cell(value):
+        if isinstance(value, str):
+            return f'<c t="inlineStr"><is><t>{escape(value)}</t></is></c>'
+        return f'<c><v>{value}</v></c>'
+
+    with zipfile.ZipFile(file_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        zf.writestr("[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '</Types>')
+        zf.writestr("_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>')
+        zf.writestr("xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>')
+        zf.writestr("xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+            '</Relationships>')
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            header = [name for name, _ in generate_bench_row(0, shape, rng)]
+            sheet.write(("<row>" + "".join(cell(name) for name in header) + "</row>").encode("utf-8"))
+            for index in range(rows):
+                values = [value for _, value in generate_bench_row(index, shape, rng)]
+                sheet.write(("<row>" + "".join(cell(value) for value in values) + "</row>").encode("utf-8"))
+            sheet.write(b"</sheetData></worksheet>")
+
+def generate_bench_dataset(data_dir, rows, shape, fmt):
+    """
+    生成一个基准测试数据集，相同参数的文件已存在时直接复用
+
+    参数:
+        data_dir: 数据目录
+        rows: 行数
+        shape: 数据形状，narrow或wide
+        fmt: 文件格式，csv、json或xlsx
+
+    返回:
+        str或None: 文件路径，格式不支持该行数时返回None
+    """
+    import csv
+    import random
+
+    if fmt == "xlsx" and rows >= BENCH_XLSX_MAX_ROWS:
+        logger.warning(f"xlsx单个工作表最多 {BENCH_XLSX_MAX_ROWS} 行，跳过 {shape}/{rows}")
+        print(f"{Colors.WARNING}xlsx单个工作表最多 {BENCH_XLSX_MAX_ROWS} 行，跳过 {shape}/{rows}{Colors.ENDC}")
+        return None
+
+    file_path = os.path.join(data_dir, f"bench_{shape}_{rows}.{fmt}")
+    if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+        return file_path
+
+    print(f"{Colors.BLUE}生成数据集: {os.path.basename(file_path)}...{Colors.ENDC}")
+    started = time.time()
+    # 固定随机种子，保证每次生成的数据相同
+    rng = random.Random(BENCH_SEED + rows)
+    temp_path = f"{file_path}.tmp"
+
+    if fmt == "csv":
+        with open(temp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([name for name, _ in generate_bench_row(0, shape, rng)])
+            for index in range(rows):
+                writer.writerow([value for _, value in generate_bench_row(index, shape, rng)])
+    elif fmt == "json":
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for index in range(rows):
+                if index:
+                    f.write(",\n")
+                f.write(json.dumps(dict(generate_bench_row(index, shape, rng)), ensure_ascii=False))
+            f.write("]")
+    else:
+        write_bench_xlsx(temp_path, rows, shape, rng)
+
+    # 写完后再改名，避免中断后留下不完整的数据集
+    os.replace(temp_path, file_path)
+    logger.info(f"数据集已生成: {file_path}, 耗时 {time.time() - started:.1f}s")
+    return file_path
+
+def drain_process_output(process):
+    """
+    在后台线程中读取子进程输出并写入日志，避免管道写满阻塞子进程
+
+    参数:
+        process: 子进程
+    """
+    def drain(stream):
+        for line in iter(stream.readline, b""):
+            logger.debug(line.decode("utf-8", errors="replace").rstrip())
+
+    for stream in (process.stdout, process.stderr):
+        threading.Thread(target=drain, args=(stream,), daemon=True).start()
+
+def wait_for_backend(base_url, timeout=60):
+    """
+    等待后端健康检查通过
+
+    参数:
+        base_url: 后端地址
+        timeout: 最长等待时间(秒)
+
+    返回:
+        bool: 是否在超时前就绪
+    """
+    import urllib.request
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/api/health", timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            pass
+        time.sleep(0.1)
+    return False
+
+def bench_request(base_url, method, path, body=None, timeout=300):
+    """
+    发送一次请求并读取完整响应
+
+    参数:
+        base_url: 后端地址
+        method: 请求方法
+        path: 请求路径
+        body: JSON请求体
+        timeout: 超时时间(秒)
+
+    返回:
+        tuple: (是否成功, 耗时秒, 响应字节数, 响应内容)
+    """
+    import urllib.request
+
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(f"{base_url}{path}", data=data, method=method)
+    if data is not None:
+        request.add_header("Content-Type", "application/json")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            content = response.read()
+            return 200 <= response.status < 300, time.perf_counter() - started, len(content), content
+    except Exception as e:
+        logger.debug(f"基准测试请求失败: {method} {path}: {str(e)}")
+        return False, time.perf_counter() - started, 0, b""
+
+def percentile(sorted_values, q):
+    """
+    按最近秩法计算分位数
+
+    参数:
+        sorted_values: 已排序的数值列表
+        q: 分位数，0到1之间
+
+    返回:
+        float或None: 分位数，列表为空时返回None
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(q * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def run_bench_scenario(base_url, name, method, path, duration, concurrency, body=None):
+    """
+    以固定并发持续压测一个接口
+
+    参数:
+        base_url: 后端地址
+        name: 场景名称
+        method: 请求方法
+        path: 请求路径
+        duration: 持续时间(秒)
+        concurrency: 并发数
+        body: JSON请求体
+
+    返回:
+        dict: 场景结果
+    """
+    # 首次请求单独计时，反映冷缓存时的延迟
+    ok, cold_seconds, _, _ = bench_request(base_url, method, path, body)
+
+    latencies = []
+    stats = {"errors": 0 if ok else 1, "bytes": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        local_latencies = []
+        errors = 0
+        received = 0
+        while time.perf_counter() < deadline:
+            success, seconds, size, _ = bench_request(base_url, method, path, body)
+            if success:
+                local_latencies.append(seconds)
+                received += size
+            else:
+                errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            stats["errors"] += errors
+            stats["bytes"] += received
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "method": method,
+        "path": path,
+        "requests": len(latencies),
+        "errors": stats["errors"],
+        "throughput": len(latencies) / elapsed if elapsed > 0 else 0,
+        "bytesPerSecond": stats["bytes"] / elapsed if elapsed > 0 else 0,
+        "coldMs": cold_seconds * 1000,
+        "p50Ms": (percentile(latencies, 0.5) or 0) * 1000,
+        "p95Ms": (percentile(latencies, 0.95) or 0) * 1000,
+        "p99Ms": (percentile(latencies, 0.99) or 0) * 1000,
+    }
+    print(f"  {name}: {result['throughput']:.1f} req/s, p50 {result['p50Ms']:.1f}ms, "
+          f"p95 {result['p95Ms']:.1f}ms, p99 {result['p99Ms']:.1f}ms, 冷启动 {result['coldMs']:.1f}ms, "
+          f"错误 {result['errors']}")
+    return result
+
+def compare_with_baseline(report, baseline):
+    """
+    对比本次结果与基线，吞吐下降或延迟上升超过阈值视为退化
+
+    参数:
+        report: 本次测试报告
+        baseline: 基线报告
+
+    返回:
+        list: 退化项描述
+    """
+    def change(now, before):
+        return (now - before) / before * 100 if before else 0.0
+
+    regressions = []
+    print_separator()
+    print(f"{Colors.BLUE}与基线对比 ({baseline.get('commit') or '未知版本'}, {baseline.get('timestamp', '')}):{Colors.ENDC}")
+
+    checks = [("startupSeconds", "启动时间", True), ("peakRssBytes", "峰值RSS", True)]
+    for key, label, lower_is_better in checks:
+        now, before = report.get(key), baseline.get(key)
+        if not now or not before:
+            continue
+        delta = change(now, before)
+        worse = delta > BENCH_REGRESSION_PERCENT if lower_is_better else delta < -BENCH_REGRESSION_PERCENT
+        color = Colors.FAIL if worse else Colors.GREEN
+        print(f"{color}  {label}: {delta:+.1f}%{Colors.ENDC}")
+        if worse:
+            regressions.append(f"{label} {delta:+.1f}%")
+
+    for name, result in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            print(f"  {name}: 基线中无此场景")
+            continue
+        throughput_delta = change(result["throughput"], before["throughput"])
+        p95_delta = change(result["p95Ms"], before["p95Ms"])
+        worse = throughput_delta < -BENCH_REGRESSION_PERCENT or p95_delta > BENCH_REGRESSION_PERCENT
+        color = Colors.FAIL if worse else Colors.GREEN
+        print(f"{color}  {name}: 吞吐 {throughput_delta:+.1f}%, p95 {p95_delta:+.1f}%{Colors.ENDC}")
+        if worse:
+            regressions.append(f"{name} 吞吐 {throughput_delta:+.1f}%, p95 {p95_delta:+.1f}%")
+
+    return regressions
+
+def run_benchmark(args):
+    """
+    运行基准测试：生成数据集、启动后端、压测主要接口并输出JSON报告
+
+    参数:
+        args: 命令行参数
+
+    返回:
+        int: 退出码，出现退化或启动失败时为1
+    """
+    import base64
+    import urllib.parse
+
+    logger.info("开始基准测试")
+    print_separator()
+    print(f"{Colors.HEADER}基准测试模式{Colors.ENDC}")
+
+    try:
+        row_counts = [int(value) for value in args.bench_rows.split(",") if value.strip()]
+    except ValueError:
+        print(f"{Colors.FAIL}--bench-rows 格式错误，应为逗号分隔的行数{Colors.ENDC}")
+        return 1
+    formats = [value.strip() for value in args.bench_formats.split(",") if value.strip()]
+
+    # 生成数据集
+    data_dir = os.path.join(BENCH_DIR, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    datasets = []
+    for rows in row_counts:
+        for shape in ("narrow", "wide"):
+            for fmt in formats:
+                file_path = generate_bench_dataset(data_dir, rows, shape, fmt)
+                if file_path:
+                    datasets.append(os.path.basename(file_path))
+
+    # 后端使用独立的端口和数据目录，不影响正在运行的服务
+    work_dir = os.path.join(BENCH_DIR, "work")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    os.environ["PORT"] = str(args.bench_port)
+    os.environ["DATA_DIR"] = data_dir
+    os.environ["UPLOADS_DIR"] = os.path.join(work_dir, "uploads")
+    os.environ["VISUALIZATIONS_DIR"] = os.path.join(work_dir, "visualizations")
+    base_url = f"http://127.0.0.1:{args.bench_port}"
+
+    started = time.time()
+    backend_process = start_backend()
+    if not backend_process:
+        return 1
+    processes.append(backend_process)
+    drain_process_output(backend_process)
+
+    try:
+        if not wait_for_backend(base_url):
+            print(f"{Colors.FAIL}后端在60秒内未就绪{Colors.ENDC}")
+            return 1
+        startup_seconds = time.time() - started
+        print(f"{Colors.GREEN}后端已就绪，启动耗时 {startup_seconds:.2f}s{Colors.ENDC}")
+
+        # 压测期间采样后端RSS峰值
+        peak = {"rss": 0}
+        sampling = threading.Event()
+
+        def sample_rss():
+            while not sampling.is_set():
+                metrics = fetch_backend_metrics(timeout=2, base_url=base_url)
+                if metrics:
+                    peak["rss"] = max(peak["rss"], sum_metric(metrics, "process_resident_memory_bytes"))
+                sampling.wait(0.5)
+
+        sampler = threading.Thread(target=sample_rss, daemon=True)
+        sampler.start()
+
+        # 获取数据集的文件ID
+        ok, _, _, content = bench_request(base_url, "GET", "/api/files")
+        files = json.loads(content).get("data", []) if ok else []
+        file_ids = {item["name"]: item["id"] for item in files if item.get("name") in datasets}
+
+        print(f"{Colors.BLUE}压测中，每个场景 {args.bench_duration}s，并发 {args.bench_concurrency}...{Colors.ENDC}")
+        scenarios = {}
+
+        def run(name, method, path, body=None):
+            scenarios[name] = run_bench_scenario(
+                base_url, name, method, path, args.bench_duration, args.bench_concurrency, body)
+
+        run("files:list", "GET", "/api/files")
+        for name in datasets:
+            if name in file_ids:
+                run(f"content:{name}", "GET", f"/api/files/{urllib.parse.quote(file_ids[name], safe='')}/content")
+
+        if datasets and datasets[0] in file_ids:
+            visualization = {
+                "name": "bench",
+                "type": "bar",
+                "dataMapping": {"x": "category", "y": "value"},
+                "options": {}
+            }
+
+            # 列表场景读取固定数量的配置，先写入再压测
+            vis_path = f"/api/files/{urllib.parse.quote(file_ids[datasets[0]], safe='')}/visualizations"
+            seeded = sum(
+                1 for _ in range(BENCH_VISUALIZATION_COUNT)
+                if bench_request(base_url, "POST", vis_path, visualization)[0]
+            )
+            if seeded == BENCH_VISUALIZATION_COUNT:
+                run("visualizations:list", "GET", vis_path)
+            else:
+                print(f"{Colors.WARNING}预置可视化配置失败({seeded}/{BENCH_VISUALIZATION_COUNT})，跳过 visualizations:list{Colors.ENDC}")
+
+            # 创建场景写入另一个文件ID，写入的数量随机器速度变化，不影响其他场景
+            create_id = base64.b64encode(BENCH_CREATE_FILE_NAME.encode("utf-8")).decode("ascii")
+            create_path = f"/api/files/{urllib.parse.quote(create_id, safe='')}/visualizations"
+            run("visualizations:create", "POST", create_path, visualization)
+
+        sampling.set()
+        sampler.join()
+    finally:
+        cleanup_processes()
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": get_git_commit(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "parameters": {
+            "rows": row_counts,
+            "formats": formats,
+            "duration": args.bench_duration,
+            "concurrency": args.bench_concurrency,
+        },
+        "startupSeconds": startup_seconds,
+        "peakRssBytes": peak["rss"],
+        "scenarios": scenarios,
+    }
+
+    report_path = os.path.join(BENCH_DIR, f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print_separator()
+    print(f"{Colors.GREEN}基准测试报告已保存: {report_path}{Colors.ENDC}")
+    print(f"{Colors.GREEN}峰值RSS: {peak['rss'] / 1024 / 1024:.0f}MB, 启动耗时: {startup_seconds:.2f}s{Colors.ENDC}")
+
+    regressions = []
+    baseline_path = args.bench_baseline
+    if os.path.exists(baseline_path):
+        try:
+            with open(baseline_path, "r", encoding="utf-8") as f:
+                regressions = compare_with_baseline(report, json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取基线失败: {str(e)}")
+    else:
+        print(f"{Colors.WARNING}未找到基线 {baseline_path}，使用 --bench-save-baseline 保存本次结果作为基线{Colors.ENDC}")
+
+    if args.bench_save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        shutil.copyfile(report_path, baseline_path)
+        print(f"{Colors.GREEN}已保存为基线: {baseline_path}{Colors.ENDC}")
+
+    if regressions:
+        print(f"{Colors.FAIL}检测到性能退化(阈值 {BENCH_REGRESSION_PERCENT}%):{Colors.ENDC}")
+        for item in regressions:
+            print(f"{Colors.FAIL}  - {item}{Colors.ENDC}")
+        return 1
+    return 0
+
+def welcome():
+    """
+    显示欢迎信息并解析命令行参数
+    """
+    # 显示欢迎横幅
+    print_banner()
+    
+    # 解析命令行参数
+    args = parse_arguments()
+    
+    # 注册信号处理函数，确保能够正确处理Ctrl+C
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
     # 如果有帮助参数，显示帮助信息并退出
     if '--help' in sys.argv or '-h' in sys.argv:
         print_help()
@@ -943,14 +3219,47 @@ def start_app():
     start_backend_service = not args.frontend_only
     start_frontend_service = not args.backend_only
     
+    # 生产模式下前端由后端托管，不需要单独的前端进程
+    if args.prod:
+        if args.frontend_only:
+            print(f"{Colors.FAIL}--prod 模式下前端由后端托管，不能与 --frontend-only 同时使用{Colors.ENDC}")
+            return False
+        if not args.backend_only:
+            if not build_frontend():
+                return False
+            os.environ["FRONTEND_DIST"] = FRONTEND_DIST_DIR
+        os.environ["NODE_ENV"] = "production"
+        start_frontend_service = False
+    
     success = True
     
+    # 滚动重启模式: 启动器代理后端端口，后端实例在内部端口上运行
+    backend_port = None
+    if args.rolling and start_backend_service:
+        global backend_proxy, rolling_warmup
+        backend_port = ROLLING_INSTANCE_PORTS[0]
+        rolling_warmup = not args.no_warmup
+        proxy = BackendProxy(BACKEND_PORT, backend_port)
+        try:
+            proxy.start()
+        except OSError as e:
+            print(f"{Colors.FAIL}后端代理启动失败，端口 {BACKEND_PORT} 不可用: {str(e)}{Colors.ENDC}")
+            return False
+        backend_proxy = proxy
+    
     # 启动后端服务
     if start_backend_service:
-        backend_process = start_backend()
+        backend_spawned_at = time.time()
+        backend_process = start_backend(backend_port)
         if backend_process:
-            processes.append(backend_process)
+            register_service("backend", backend_process, functools.partial(start_backend, backend_port), backend_port)
+            if backend_proxy:
+                start_backend_dist_watcher()
             logger.info("后端服务已添加到进程监控列表")
+            if not args.no_warmup:
+                start_warmup_reporter(backend_spawned_at)
+            if os.environ.get("FRONTEND_DIST"):
+                print(f"{Colors.GREEN}访问地址: http://localhost:{BACKEND_PORT}{Colors.ENDC}")
         else:
             logger.error("后端服务启动失败")
             success = False
@@ -959,7 +3268,7 @@ def start_app():
     if start_frontend_service:
         frontend_process = start_frontend()
         if frontend_process:
-            processes.append(frontend_process)
+            register_service("frontend", frontend_process, start_frontend)
             logger.info("前端服务已添加到进程监控列表")
         else:
             logger.error("前端服务启动失败")
@@ -968,6 +3277,12 @@ def start_app():
     # 如果有进程成功启动，则开始监控
     if processes:
         print(f"{Colors.GREEN}服务启动成功，正在监控服务状态...{Colors.ENDC}")
+        if start_backend_service and args.metrics_interval > 0:
+            start_metrics_reporter(args.metrics_interval)
+        if args.resource_interval > 0:
+            start_resource_monitor(args.resource_interval)
+        if args.control_port > 0:
+            start_control_server(args.control_port)
         # 在主线程中监控进程
         monitor_processes()
     
@@ -993,15 +3308,36 @@ def print_help():
 {Colors.BLUE}命令行参数:{Colors.ENDC}
 python start.py            # 正常启动
 python start.py --help     # 显示此帮助信息
-python start.py --no-check # 跳过环境检查直接启动
+python start.py --no-check # 跳过环境检查和依赖安装直接启动
 python start.py --frontend-only # 仅启动前端服务
 python start.py --backend-only  # 仅启动后端服务
+python start.py --prod     # 生产模式：构建前端(源码未变化时跳过)并由后端托管
+python start.py --no-warmup # 启动后不预热文件缓存
+python start.py --metrics-interval 30 # 每30秒输出后端性能摘要(0为关闭)
+python start.py --control-port 3099 # 本机控制接口端口(0为关闭)
+python start.py --resource-interval 5 # 每5秒采样服务的内存、CPU和文件描述符(0为关闭)
+python start.py --rolling  # 滚动重启模式：后端构建产物变化时自动切换到新实例，不中断服务
+python start.py --bench    # 运行基准测试，报告保存在 bench/ 目录下
+python start.py --bench --bench-rows 10000,1000000 --bench-save-baseline # 指定数据规模并保存为基线
 
 {Colors.BLUE}操作说明:{Colors.ENDC}
 - 按 Ctrl+C 终止所有服务并退出启动器
+- 在另一个终端中使用 start.py ctl 管理运行中的服务，无需重启整个启动器:
+  python start.py ctl status            # 查看各服务的PID、运行时间、重启次数、内存和CPU
+  python start.py ctl restart backend   # 只重启后端
+  python start.py ctl drain frontend    # 优雅停止前端，之后可用 restart 重新启动
+  python start.py ctl logs backend -n 50 -f  # 查看并持续跟踪后端最近的输出
+  python start.py ctl metrics           # 查看后端最新的性能指标摘要
+
+{Colors.BLUE}资源限制:{Colors.ENDC}
+- 启动服务时应用文件描述符上限、nice和ionice；当前cgroup已委派给用户时，还会通过cgroup v2限制内存和CPU
+- 通过环境变量覆盖，设为0表示不限制，例如:
+  LAUNCHER_BACKEND_MEMORY_MB=4096 LAUNCHER_BACKEND_CPU_PERCENT=200 LAUNCHER_FRONTEND_NICE=10 python start.py
+- 内存、CPU或文件描述符接近上限时在控制台告警，每分钟在日志中记录资源趋势
 
 {Colors.BLUE}日志位置:{Colors.ENDC}
 - 日志文件保存在 logs/ 目录下
+- 后端性能指标: http://localhost:3001/metrics (Prometheus格式)
 """
     print(help_text)
 
@@ -1009,41 +3345,55 @@ def main():
     """
     主函数
     """
-    welcome()
+    # ctl子命令只与运行中的启动器通信，不显示欢迎信息也不检查环境
+    if len(sys.argv) > 1 and sys.argv[1] == "ctl":
+        return run_ctl(sys.argv[2:])
+    
+    args = welcome()
     
     # 创建日志目录
     os.makedirs(os.path.join(BASE_DIR, "log"), exist_ok=True)
     
-    # 检查环境
-    environment_check_failed = False
-    
-    if not check_python():
-        print_separator()
-        print(f"{Colors.WARNING}Python环境检查未通过，程序可能无法正常运行{Colors.ENDC}")
-        environment_check_failed = True
-    
-    if not check_nodejs():
-        print_separator()
-        print(f"{Colors.WARNING}Node.js环境检查未通过，程序可能无法正常运行{Colors.ENDC}")
-        environment_check_failed = True
-    
-    if environment_check_failed:
+    if args.no_check:
+        # 跳过版本检测和依赖安装，只确认Node.js存在
+        logger.info("已跳过环境检查")
+        print(f"{Colors.WARNING}已跳过环境检查和依赖安装{Colors.ENDC}")
+        if not locate_nodejs():
+            return 1
+    else:
+        # 检查环境
+        environment_check_failed = False
+        
+        if not check_python():
+            print_separator()
+            print(f"{Colors.WARNING}Python环境检查未通过，程序可能无法正常运行{Colors.ENDC}")
+            environment_check_failed = True
+        
+        if not check_nodejs():
+            print_separator()
+            print(f"{Colors.WARNING}Node.js环境检查未通过，程序可能无法正常运行{Colors.ENDC}")
+            environment_check_failed = True
+        
+        if environment_check_failed:
+            print_separator()
+            print(f"{Colors.WARNING}环境检查未通过，请先解决上述问题再继续{Colors.ENDC}")
+            # 等待用户按键，而不是自动退出
+            input(f"{Colors.BLUE}按任意键继续...{Colors.ENDC}")
+            return 1
+        
+        # 环境检查通过，继续运行
         print_separator()
-        print(f"{Colors.WARNING}环境检查未通过，请先解决上述问题再继续{Colors.ENDC}")
-        # 等待用户按键，而不是自动退出
-        input(f"{Colors.BLUE}按任意键继续...{Colors.ENDC}")
-        return 1
-    
-    # 环境检查通过，继续运行
-    print_separator()
-    print(f"{Colors.GREEN}环境检查通过，准备启动程序{Colors.ENDC}")
+        print(f"{Colors.GREEN}环境检查通过，准备启动程序{Colors.ENDC}")
+        
+        # 在这里调用其他函数，如安装依赖、启动应用等
+        if not install_dependencies():
+            print_separator()
+            print(f"{Colors.FAIL}依赖安装失败，程序可能无法正常运行{Colors.ENDC}")
+            input(f"{Colors.BLUE}按任意键继续...{Colors.ENDC}")
+            return 1
     
-    # 在这里调用其他函数，如安装依赖、启动应用等
-    if not install_dependencies():
-        print_separator()
-        print(f"{Colors.FAIL}依赖安装失败，程序可能无法正常运行{Colors.ENDC}")
-        input(f"{Colors.BLUE}按任意键继续...{Colors.ENDC}")
-        return 1
+    if args.bench:
+        return run_benchmark(args)
     
     if not start_app():
         print_separator()